@@ -1,7 +1,21 @@
 import streamlit as st
 
+from dlog import startup
+
 st.set_page_config(page_title="DLOG PMAL - Home", page_icon="🛡️", layout="wide")
 
+# Aquecimento dos caches das páginas em segundo plano, uma vez por processo; a home
+# continua leve (ver dlog/startup.py)
+startup.iniciar()
+
+# Painel de diagnóstico oculto (?diagnostico=<token>; ver dlog/diagnostics.py). Importado só
+# quando pedido, para a home continuar sem carregar pandas.
+if "diagnostico" in st.query_params:
+    from dlog import diagnostics
+    if diagnostics.autorizado(st.query_params.get("diagnostico")):
+        diagnostics.render()
+        st.stop()
+
 # CSS personalizado
 st.markdown(
     """
@@ -0,0 +1,79 @@
+# ---------- Benchmark: laço aninhado original x dlog.redistribution ----------
+# Uso: python benchmarks/bench_redistribution.py [n_opms ...]
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dlog.redistribution import distancias_opm, plano_transferencias  # noqa: E402
+
+LIMITE_LACO = 2000      # acima disso o laço original leva minutos
+LIMITE_MIN_COST = 5000  # a matriz densa de distâncias passa de 1 GB acima disso
+
+
+def resumo_sintetico(n, seed=0):
+    rng = np.random.default_rng(seed)
+    summary = pd.DataFrame({
+        'OPM': [f'{i} BPM' for i in range(n)],
+        'Viaturas': rng.integers(1, 60, n),
+        'Municípios': rng.integers(0, 12, n),
+        'Bairros': rng.integers(0, 8, n),
+    })
+    summary['Vtr/Município'] = (summary['Viaturas']/summary['Municípios']).replace(np.inf,0).round(2)
+    return summary
+
+def coordenadas_sinteticas(summary, seed=1):
+    # OPMs espalhadas na caixa de Alagoas: custos geográficos, como na página
+    rng = np.random.default_rng(seed)
+    n = len(summary)
+    return pd.DataFrame({
+        'OPM': summary['OPM'],
+        'Latitude': rng.uniform(-10.5, -8.8, n),
+        'Longitude': rng.uniform(-38.2, -35.2, n),
+    })
+
+def laco_original(summary):
+    # Cópia da SUGESTÃO 1 original de pages/viaturas.py (iterrows x iterrows)
+    valid = summary[summary['Municípios']>0].copy()
+    valid['Dif'] = valid['Vtr/Município'] - valid['Vtr/Município'].mean()
+    acima = valid[valid['Dif'] > 0].sort_values('Dif', ascending=False)
+    abaixo = valid[valid['Dif'] < 0].sort_values('Dif')
+    transferencias = []
+    for idx_b, row_b in abaixo.iterrows():
+        diff_abaixo = abs(row_b['Dif'])
+        for idx_a, row_a in acima.iterrows():
+            diff_acima = acima.at[idx_a, 'Dif']
+            if diff_acima > 0 and diff_abaixo > 0:
+                mover = int(min(diff_acima, diff_abaixo))
+                if mover > 0:
+                    transferencias.append((row_a['OPM'], row_b['OPM'], mover))
+                    acima.at[idx_a, 'Dif'] -= mover
+                    valid.at[idx_b, 'Dif'] += mover
+                    diff_abaixo -= mover
+    return transferencias
+
+def cronometrar(func, *args, **kwargs):
+    t = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - t
+
+def main(argv=None):
+    tamanhos = [int(a) for a in (argv if argv is not None else sys.argv[1:])] or [50, 500, 2000, 5000, 10000]
+    print(f"{'n_opms':>8} {'laco_original_s':>16} {'greedy_s':>10} {'min_cost_s':>11}")
+    for n in tamanhos:
+        summary = resumo_sintetico(n)
+        laco = cronometrar(laco_original, summary) if n <= LIMITE_LACO else float('nan')
+        greedy = cronometrar(plano_transferencias, summary, 'Municípios')
+        if n <= LIMITE_MIN_COST:
+            dist = distancias_opm(summary['OPM'], coordenadas_sinteticas(summary))
+            min_cost = cronometrar(plano_transferencias, summary, 'Municípios', 'min_cost', dist)
+        else:
+            min_cost = float('nan')
+        print(f"{n:>8} {laco:>16.4f} {greedy:>10.4f} {min_cost:>11.4f}")
+
+
+if __name__ == '__main__':
+    main()
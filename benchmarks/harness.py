@@ -0,0 +1,251 @@
+# ---------- Harness de benchmark das páginas (AppTest headless) ----------
+# Cada (escala, alvo) roda num subprocesso próprio, lendo os dados sintéticos de
+# benchmarks/synthetic.py. Mede o tempo de importação dos módulos pesados (processo novo),
+# tempo das etapas do pipeline (sem cache), tempo da primeira execução da página (cache
+# frio), das reexecuções (cache quente) e pico de memória. O aquecimento do boot
+# (dlog/startup.py) fica desligado para não competir com as medições.
+#
+# Uso:
+#   python benchmarks/harness.py run [--escalas 1 10 100 1000] [--alvos app viaturas efetivo dashboard]
+#                                     [--reexecucoes 3] [--saida arquivo.json]
+#   python benchmarks/harness.py compare antes.json depois.json
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+DADOS = RAIZ / "benchmarks" / ".dados"
+RESULTADOS = RAIZ / "benchmarks" / "resultados"
+ALVOS = ("app", "viaturas", "efetivo", "dashboard")
+ARQUIVOS = {"app": "app.py", "viaturas": "pages/viaturas.py", "efetivo": "pages/efetivo.py"}
+TIMEOUT = 1800
+
+
+def _cronometro(etapas, nome, func, *args):
+    t = time.perf_counter()
+    r = func(*args)
+    etapas[nome] = round(time.perf_counter() - t, 4)
+    return r
+
+# ---------- Etapas medidas fora do Streamlit (funções sem o decorator de cache) ----------
+def etapas_viaturas():
+    from dlog import pipeline, snapshot
+    from dlog.filters import FilterIndex
+    from dlog.plates import Conciliador, aplicar
+    from dlog.redistribution import plano_transferencias
+    e = {}
+    versao = _cronometro(e, "snapshot.version", snapshot.version, *pipeline.FONTES_VIATURAS)
+    df_abast, df_frota, df_opm = _cronometro(e, "load_viaturas", pipeline.load_viaturas.__wrapped__, versao)
+    conciliacao = _cronometro(e, "conciliação de placas", lambda: Conciliador(df_frota["PLACA"]).conciliar(df_abast["PLACA"]))
+    df_abast = aplicar(df_abast, conciliacao)
+    indice = _cronometro(e, "FilterIndex", FilterIndex, df_abast, df_frota)
+    _cronometro(e, "select (tudo)", indice.select, indice.options("UNIDADE"), indice.options("COMBUSTIVEL_DOMINANTE"))
+    _cronometro(e, "select (1 OPM)", indice.select, indice.options("UNIDADE")[:1], indice.options("COMBUSTIVEL_DOMINANTE"))
+    summary = df_frota.groupby("OPM")["PLACA"].nunique().reset_index(name="Viaturas")
+    summary["Municípios"] = df_opm.groupby("UNIDADE")["MUNICIPIO"].nunique().reindex(summary["OPM"]).fillna(0).astype(int).values
+    _cronometro(e, "plano_transferencias", plano_transferencias, summary, "Municípios")
+    return e
+
+def etapas_efetivo():
+    from dlog import pipeline, snapshot
+    e = {}
+    versao = _cronometro(e, "snapshot.version", snapshot.version, *pipeline.FONTES_EFETIVO)
+    modelo = _cronometro(e, "roster", pipeline.roster.__wrapped__, versao)
+    _cronometro(e, "busca", modelo.busca.search, "sgt silva")
+    return e
+
+def etapas_dashboard():
+    import pandas as pd
+
+    from dlog.anomaly import AnomalyEngine
+    from dlog.fuel_store import FuelStore
+    from dlog.rollup import DailyRollup
+    e = {}
+    store = _cronometro(e, "FuelStore", FuelStore)
+    versao, dados = store.estado()
+    cubo = _cronometro(e, "DailyRollup", DailyRollup, dados)
+    _cronometro(e, "AnomalyEngine", AnomalyEngine().atualizar, dados, versao)
+    ini, fim = cubo.inicio, cubo.inicio + pd.Timedelta(days=cubo.n_dias)
+    _cronometro(e, "totais", cubo.totais, ini, fim, None)
+    _cronometro(e, "mensal", cubo.mensal, ini, fim, None)
+    _cronometro(e, "por_opm", cubo.por_opm, ini, fim, None)
+    return e
+
+def tempos_importacao():
+    # ms de cada importação, na ordem (um módulo já trazido por outro custa ~0)
+    import importlib
+    t = time.perf_counter()
+    from dlog import startup
+    tempos = {"streamlit": round((time.perf_counter() - t) * 1000, 1)}
+    for nome in (*startup.IMPORTACOES, "dlog.pipeline"):
+        t = time.perf_counter()
+        try:
+            importlib.import_module(nome)
+        except ImportError:
+            continue
+        tempos[nome] = round((time.perf_counter() - t) * 1000, 1)
+    return tempos
+
+ETAPAS = {"app": dict, "viaturas": etapas_viaturas, "efetivo": etapas_efetivo, "dashboard": etapas_dashboard}
+
+def _script_dashboard(caminho):
+    import runpy
+    runpy.run_path(caminho, run_name="__main__")
+
+def _apptest(alvo):
+    from streamlit.testing.v1 import AppTest
+    if alvo == "dashboard":
+        return AppTest.from_function(_script_dashboard, args=(str(RAIZ / "Dashboard"),), default_timeout=TIMEOUT)
+    return AppTest.from_file(str(RAIZ / ARQUIVOS[alvo]), default_timeout=TIMEOUT)
+
+def _execucoes(alvo, reexecucoes):
+    import streamlit as st
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = _apptest(alvo)
+    t = time.perf_counter()
+    at.run()
+    fria = time.perf_counter() - t
+    erros = [str(e.value) for e in at.exception]
+    quentes = []
+    for _ in range(reexecucoes):
+        t = time.perf_counter()
+        at.run()
+        quentes.append(round(time.perf_counter() - t, 4))
+    r = {"fria": round(fria, 4), "quentes": quentes}
+    # Viaturas: cada seção é um fragmento atrás do seletor 'secao'
+    if alvo == "viaturas":
+        secoes = {}
+        for opcao in at.radio(key="secao").options:
+            t = time.perf_counter()
+            at.radio(key="secao").set_value(opcao).run()
+            secoes[opcao] = round(time.perf_counter() - t, 4)
+            erros += [str(e.value) for e in at.exception]
+        r["secoes"] = secoes
+    r["erros"] = erros[:5]
+    return r
+
+def worker(alvo, escala, reexecucoes):
+    # Processo filho: o ambiente DLOG_* já aponta para os dados da escala
+    import logging
+    logging.disable(logging.WARNING)
+    os.environ.setdefault("DLOG_AQUECER", "0")
+    sys.path.insert(0, str(RAIZ))
+    os.chdir(RAIZ)
+    r = {"alvo": alvo, "escala": escala}
+    r["importacao_ms"] = tempos_importacao()
+    r["etapas"] = ETAPAS[alvo]()
+    r.update(_execucoes(alvo, reexecucoes))
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    r["pico_mb"] = round(pico / (2**20 if sys.platform == "darwin" else 2**10), 1)
+    print(json.dumps(r, ensure_ascii=False))
+
+# ---------- Execução e comparação ----------
+def _ambiente():
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+        except OSError:
+            return None
+    import numpy
+    import pandas
+    import streamlit
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "alterado": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "streamlit": streamlit.__version__,
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def run(escalas, alvos, reexecucoes, saida):
+    resultados = []
+    for escala in escalas:
+        t = time.perf_counter()
+        saida_gen = subprocess.run(
+            [sys.executable, str(RAIZ / "benchmarks" / "synthetic.py"), str(DADOS / f"escala_{escala}"), str(escala)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        env = dict(linha.split("=", 1) for linha in saida_gen.split())
+        print(f"[{escala}x] dados prontos em {time.perf_counter() - t:.1f}s", file=sys.stderr)
+        for alvo in alvos:
+            proc = subprocess.run(
+                [sys.executable, __file__, "_worker", alvo, str(escala), str(reexecucoes)],
+                env={**os.environ, **env}, capture_output=True, text=True, timeout=TIMEOUT * (reexecucoes + 6),
+            )
+            linhas = proc.stdout.strip().splitlines()
+            if proc.returncode or not linhas:
+                r = {"alvo": alvo, "escala": escala, "erros": [proc.stderr.strip()[-2000:]]}
+            else:
+                r = json.loads(linhas[-1])
+            resultados.append(r)
+            print(f"[{escala}x] {alvo}: fria={r.get('fria')}s quentes={r.get('quentes')} "
+                  f"pico={r.get('pico_mb')}MB erros={len(r.get('erros', []))}", file=sys.stderr)
+    doc = {"ambiente": _ambiente(), "resultados": resultados}
+    if saida is None:
+        RESULTADOS.mkdir(parents=True, exist_ok=True)
+        commit = (doc["ambiente"]["commit"] or "sem-git")[:10]
+        saida = RESULTADOS / f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+    Path(saida).write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(saida)
+
+def _metricas(r):
+    m = {"fria (s)": r.get("fria"), "pico (MB)": r.get("pico_mb")}
+    if r.get("quentes"):
+        m["quente mediana (s)"] = sorted(r["quentes"])[len(r["quentes"]) // 2]
+    for k, v in r.get("secoes", {}).items():
+        m[f"seção {k} (s)"] = v
+    for k, v in r.get("etapas", {}).items():
+        m[f"etapa {k} (s)"] = v
+    for k, v in r.get("importacao_ms", {}).items():
+        m[f"import {k} (ms)"] = v
+    return m
+
+def compare(antes, depois):
+    a = json.loads(Path(antes).read_text(encoding="utf-8"))
+    b = json.loads(Path(depois).read_text(encoding="utf-8"))
+    print(f"antes:  {a['ambiente']['commit']}  depois: {b['ambiente']['commit']}")
+    indice = {(r["alvo"], r["escala"]): r for r in a["resultados"]}
+    for r in b["resultados"]:
+        base = indice.get((r["alvo"], r["escala"]))
+        if base is None:
+            continue
+        print(f"\n{r['alvo']} @ {r['escala']}x")
+        ma, mb = _metricas(base), _metricas(r)
+        for k, v in mb.items():
+            va = ma.get(k)
+            if v is None or va is None:
+                continue
+            razao = f"{v / va:6.2f}x" if va else "   n/a"
+            print(f"  {k:<40} {va:>10} -> {v:>10}  {razao}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "_worker":
+        worker(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        sys.exit()
+    parser = argparse.ArgumentParser(description="Benchmark das páginas em escala sintética")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_run = sub.add_parser("run")
+    p_run.add_argument("--escalas", type=int, nargs="+", default=[1, 10, 100])
+    p_run.add_argument("--alvos", nargs="+", choices=ALVOS, default=list(ALVOS))
+    p_run.add_argument("--reexecucoes", type=int, default=3)
+    p_run.add_argument("--saida")
+    p_cmp = sub.add_parser("compare")
+    p_cmp.add_argument("antes")
+    p_cmp.add_argument("depois")
+    args = parser.parse_args()
+    if args.comando == "run":
+        run(args.escalas, args.alvos, args.reexecucoes, args.saida)
+    else:
+        compare(args.antes, args.depois)
@@ -0,0 +1,183 @@
+# ---------- Gerador de dados sintéticos nos esquemas das planilhas ----------
+# Reproduz as colunas de Abastecimentos_Consolidados, Frota_Master_Enriched,
+# OPM_Municipios_Enriched, PADRÕES_LOCADOS, EFETIVO_GERAL_DA_DLOG, FUNCOES_DE_PRACAS e do
+# upload do Dashboard, em escala 1x, 10x, 100x e 1000x (1x = tamanho das planilhas reais).
+# Os quadros são gravados direto como snapshot Parquet (dlog/snapshot.py) e na base de
+# combustível (dlog/fuel_store.py) de uma pasta própria, sem passar por .xlsx.
+#
+# Uso: python benchmarks/synthetic.py <pasta> <escala>
+import math
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Tamanhos 1x (linhas das planilhas do repositório; o upload do Dashboard não tem planilha)
+BASE = {"abastecimentos": 949, "frota": 1020, "opm": 156, "padroes": 27,
+        "efetivo": 117, "funcoes": 71, "dashboard": 5000}
+ESCALAS = (1, 10, 100, 1000)
+COMBUSTIVEIS = ['Gasolina (Lts)','Álcool (Lts)','Diesel (Lts)','Diesel S10 (Lts)']
+GRADS = ["Cel", "Ten Cel", "Maj", "Cap", "1º Ten", "2º Ten", "Subten", "1º Sgt", "2º Sgt", "3º Sgt", "Cb", "Sd"]
+SETORES = ["DLOG 1", "DLOG 2", "DLOG 3", "DLOG 4", "DLOG 5", "DLOG 6", "CMM", "CMO", "CMB",
+           "DIRETORIA", "SUBDIRETORIA", "SECRETARIA", "DINT", "DPS", "DF"]
+MESES = ["JAN", "FEV", "MAR", "ABR", "MAI", "JUN", "JUL", "AGO", "SET", "OUT", "NOV", "DEZ"]
+LETRAS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+
+def _opms(n):
+    # Nomes com as variações de grafia que unify_opm precisa resolver
+    bpm = [f"{i}º BPM" if i % 3 else f"{i} BPM" for i in range(1, max(n - 4, 2))]
+    return (bpm + ["1ª CPM/I", "2 CPM I", "ROTAM", "DINT"])[:n]
+
+def _placas(rng, n):
+    letras = LETRAS[rng.integers(0, 26, (n, 3))]
+    nums = rng.integers(0, 10, (n, 4))
+    mercosul = rng.random(n) < 0.5
+    meio = np.where(mercosul, LETRAS[nums[:, 1]], nums[:, 1].astype(str))
+    placas = pd.Series([''.join(l) for l in letras]) + nums[:, 0].astype(str) + meio + nums[:, 2].astype(str) + nums[:, 3].astype(str)
+    traco = rng.random(n) < 0.2
+    return placas.where(~traco, placas.str[:3] + '-' + placas.str[3:]).drop_duplicates().tolist()
+
+def _nomes(rng, n):
+    primeiros = np.array(["JOÃO", "JOSÉ", "MARIA", "ANTÔNIO", "CÍCERO", "FRANCISCO", "ANA", "PAULO", "CARLOS", "LUIZ"])
+    sobrenomes = np.array(["SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "LIMA", "COSTA", "GUIMARÃES", "FREITAS", "BEZERRA", "DANTAS"])
+    nomes = (pd.Series(primeiros[rng.integers(0, 10, n)]) + ' ' + sobrenomes[rng.integers(0, 10, n)]
+             + ' ' + sobrenomes[rng.integers(0, 10, n)] + ' ' + pd.Series(np.arange(n)).astype(str))
+    return nomes
+
+def gerar(escala, seed=0):
+    rng = np.random.default_rng(seed)
+    n = {k: v * escala for k, v in BASE.items()}
+    n_opm = max(40, int(40 * math.sqrt(escala)))
+    opms = _opms(n_opm)
+    placas = _placas(rng, int(n["frota"] * 1.1))
+    frota_placas = placas[:n["frota"]]
+    q = {}
+
+    padroes = [f'Grupo {i // 3 + 1} Padrão "{chr(65 + i % 26)}"' for i in range(BASE["padroes"])]
+    q["padroes"] = pd.DataFrame({
+        "ITEM": np.arange(1, len(padroes) + 1).astype(object),
+        "PADRÃO": padroes,
+        "QUANT": rng.integers(1, 60, len(padroes)),
+        "CUSTO MENSAL": [f"R$ {v:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.') for v in rng.uniform(1500, 9000, len(padroes))],
+    })
+
+    nf = len(frota_placas)
+    ano = rng.integers(2012, 2025, nf).astype(float)
+    q["frota"] = pd.DataFrame({
+        "PLACA": frota_placas,
+        "Frota": rng.choice(["LOCADA", "PRÓPRIA"], nf),
+        "OPM": rng.choice(opms, nf),
+        "PADRAO": rng.choice(padroes, nf),
+        "MARCA": rng.choice(["GM", "FIAT", "TOYOTA", "RENAULT", "HONDA"], nf),
+        "MODELO": rng.choice(["S-10", "STRADA", "HILUX", "DUSTER", "XRE 300"], nf),
+        "OBSERVACAO": rng.choice(["CARACTERIZADO", "DESCARACTERIZADO"], nf),
+        "LOCADORA": rng.choice(["COSTA DOURADA", "SÃO SEBASTIÃO LTDA", None], nf),
+        "ANO_FABRICACAO": ano,
+        "CARACTERIZACAO": rng.choice(["CARACTERIZADO", "DESCARACTERIZADO"], nf),
+        "IDADE_FROTA": 2025 - ano,
+        "CUSTO_PADRAO_MENSAL": rng.uniform(1500, 9000, nf),
+        "CUSTO_COMBUSTIVEL_TOTAL": rng.uniform(0, 20000, nf),
+    })
+
+    na = n["abastecimentos"]
+    litros = rng.gamma(2.0, 150.0, na)
+    q["abastecimentos"] = pd.DataFrame({
+        "ARQUIVO": pd.Series(rng.choice(opms, na)) + ' ' + rng.choice(MESES, na) + '.xlsx',
+        "UNIDADE": rng.choice(opms, na),
+        "PLACA": rng.choice(placas, na),
+        "COMBUSTIVEL_DOMINANTE": rng.choice(COMBUSTIVEIS, na, p=[0.55, 0.05, 0.1, 0.3]),
+        "TOTAL_LITROS": litros,
+        "VALOR_TOTAL": litros * rng.uniform(5.5, 7.2, na),
+    })
+
+    no = n["opm"]
+    bairro = rng.random(no) < 0.4
+    munis = [f"MUNICÍPIO {i}" for i in range(max(102, no // 2))]
+    muni = np.where(bairro, "Maceio", rng.choice(munis, no))
+    q["opm"] = pd.DataFrame({
+        "UNIDADE": rng.choice([o.replace('º', '').replace('ª', '') for o in opms], no),
+        "LOCAL": np.where(bairro, pd.Series(np.arange(no)).map(lambda i: f"Bairro {i}"), muni),
+        "TIPO_LOCAL": np.where(bairro, "Bairro", "Municipio"),
+        "MUNICIPIO_REFERENCIA": muni,
+        "MUNICIPIO": muni,
+        "POP_2022": np.where(bairro, np.nan, rng.integers(3000, 300000, no)),
+        "AREA_KM2": np.where(bairro, np.nan, rng.uniform(50, 2000, no)),
+    })
+
+    ne = n["efetivo"]
+    nomes = _nomes(rng, ne)
+    guerra = nomes.str.split().str[1] + ' ' + nomes.str.split().str[-1]
+    q["efetivo"] = pd.DataFrame({
+        "ORD.": np.arange(1, ne + 1).astype(str),
+        "P/G": rng.choice(GRADS + ["2º Sgt\xa0", "2º Ten "], ne),
+        "NOME": nomes,
+        "CPF": pd.Series(rng.integers(10**9, 10**11, ne)).astype(str).str.zfill(11),
+        "MAT": pd.Series(rng.integers(10000, 130000, ne)).astype(str),
+        "Nº ORDEM": pd.Series(rng.integers(70000, 90000, ne)).astype(str),
+        "QUADRO": rng.choice(["QOEM", "QP", "QOAS"], ne),
+        "N GUERRA": guerra,
+        "LOTAÇÃO": rng.choice(["DLOG", "APM", "DLOG"], ne),
+        "SETOR": rng.choice(SETORES, ne),
+    })
+
+    nfu = n["funcoes"]
+    q["funcoes"] = pd.DataFrame({
+        "Ordem": np.arange(1, nfu + 1).astype(str),
+        "Quantidade vagas por graduação": rng.integers(1, 5, nfu).astype(str),
+        "Graduação da função": rng.choice(["Subtenente", "1º Sargento", "2º Sargento", "Cabo"], nfu),
+        "FUNÇÃO": rng.choice(["Aux. SEÇÃO DE ESTOQUE", "Aux. APROVISIONAMENTO", "Aux. PREGOARIA"], nfu),
+        "GRADUAÇÃO": rng.choice(["1º SGT", "ST", "CB"], nfu),
+        "NOME DE GUERRA": rng.choice(guerra, nfu),
+        "BGO": "189 DE 13 DE OUTUBRO DE 2023",
+    })
+
+    # ---------- Formato de upload do Dashboard ----------
+    nd = n["dashboard"]
+    dash = pd.DataFrame({
+        "Placa": rng.choice(placas, nd),
+        "Data": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 540 * 86400, nd), unit="s"),
+    })
+    combustivel = rng.integers(0, 4, nd)
+    for k, c in enumerate(COMBUSTIVEIS):
+        dash[c] = np.where(combustivel == k, rng.gamma(2.0, 20.0, nd), np.nan)
+    dash["Custo"] = dash[COMBUSTIVEIS].sum(axis=1) * rng.uniform(5.5, 7.2, nd)
+    q["dashboard_abast"] = dash
+    q["dashboard_frota"] = q["frota"].rename(columns={"PLACA": "Placa"})[["Placa", "OPM", "PADRAO", "CARACTERIZACAO", "Frota"]]
+    q["dashboard_opm"] = pd.DataFrame({
+        "OPM": opms,
+        "Latitude": -9.6 + rng.normal(0, 0.4, len(opms)),
+        "Longitude": -36.6 + rng.normal(0, 0.7, len(opms)),
+    })
+    return q
+
+def materializar(pasta, escala, seed=0):
+    # Grava os quadros como snapshot + base de combustível em `pasta` e devolve o ambiente
+    # (variáveis DLOG_*) que as páginas devem usar para lê-los. dlog.snapshot fixa a pasta
+    # no import: rode uma escala por processo (o harness chama este script via subprocess).
+    pasta = Path(pasta)
+    env = {"DLOG_SNAPSHOT_DIR": str(pasta / "snapshot"), "DLOG_DATA_DIR": str(pasta / "planilhas")}
+    marca = pasta / f".escala_{escala}_{seed}"
+    if marca.exists():
+        return env
+    os.environ.update(env)
+    (pasta / "planilhas").mkdir(parents=True, exist_ok=True)
+    from dlog import snapshot
+    from dlog.fuel_store import FuelStore
+    q = gerar(escala, seed)
+    for nome in snapshot.SOURCES:
+        snapshot.store(nome, q[nome], f"sintetico:{escala}x")
+    FuelStore(Path(env["DLOG_SNAPSHOT_DIR"]) / "combustivel").ingest_frames(
+        abast=q["dashboard_abast"], frota=q["dashboard_frota"], opm=q["dashboard_opm"])
+    marca.touch()
+    return env
+
+
+if __name__ == "__main__":
+    destino, escala = sys.argv[1], int(sys.argv[2])
+    for k, v in materializar(destino, escala).items():
+        print(f"{k}={v}")
@@ -0,0 +1 @@
+# Pacote de apoio do Dashboard DLOG/PMAL (carga, normalização e agregações).
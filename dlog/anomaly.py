@@ -0,0 +1,202 @@
+# ---------- Motor de anomalias por viatura (aba Anomalias do Dashboard) ----------
+# Cada abastecimento é comparado com a própria viatura: mediana e MAD móveis dos últimos
+# JANELA abastecimentos da placa (escore z robusto). Viaturas com histórico curto usam a
+# coorte PADRAO x CARACTERIZACAO como referência, também numa janela móvel (os últimos
+# JANELA_COORTE abastecimentos da coorte), o que mantém limitado o estado de cada coorte.
+# A ordem é cronológica (Data e, no empate, o índice do registro). Os escores são
+# incrementais: append() só pontua as linhas cuja janela anterior mudou, isto é, as linhas
+# novas ou alteradas e as que vêm logo depois delas na mesma placa ou coorte. Uma carga
+# antiga (retroativa) repontua a placa a partir da primeira data afetada; a troca de
+# PADRAO/CARACTERIZACAO de uma placa (nova frota) repontua as linhas dela. Pontuar em
+# várias cargas dá o mesmo resultado que pontuar tudo de uma vez. Filtros de data apenas
+# fatiam os escores já calculados.
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from dlog.rollup import COMBUSTIVEIS
+
+JANELA = 20
+JANELA_COORTE = 100
+MIN_HISTORICO = 5
+LIMIAR = 3.5             # |z robusto| acima disso é anomalia (Iglewicz & Hoaglin)
+K_MAD = 0.6745
+COORTE = ['PADRAO', 'CARACTERIZACAO']
+BLOCO = 200_000          # linhas por bloco na janela deslizante (limita a memória)
+
+
+def total_litros(df, combustiveis=COMBUSTIVEIS):
+    cols = [c for c in combustiveis if c in df.columns]
+    return df[cols].apply(pd.to_numeric, errors='coerce').sum(axis=1)
+
+def _janela_anterior(valores, grupos, janela):
+    # Mediana, MAD e tamanho dos `janela` valores anteriores do mesmo grupo, por linha
+    n = len(valores)
+    med, mad, cnt = np.full(n, np.nan), np.full(n, np.nan), np.zeros(n, dtype=int)
+    pad_v = np.concatenate([np.full(janela, np.nan), valores])
+    pad_g = np.concatenate([np.full(janela, -1), grupos])
+    for ini in range(0, n, BLOCO):
+        fim = min(ini + BLOCO, n)
+        win = sliding_window_view(pad_v[ini:fim + janela - 1], janela).copy()
+        gwin = sliding_window_view(pad_g[ini:fim + janela - 1], janela)
+        win[gwin != grupos[ini:fim, None]] = np.nan
+        c = (~np.isnan(win)).sum(axis=1)
+        # Janelas cheias (a maioria) vão pelo np.median, bem mais rápido que o nanmedian
+        cheia = c == janela
+        m, d = np.full(len(win), np.nan), np.full(len(win), np.nan)
+        if cheia.any():
+            w = win[cheia]
+            m[cheia] = np.median(w, axis=1)
+            d[cheia] = np.median(np.abs(w - m[cheia, None]), axis=1)
+        if not cheia.all():
+            w = win[~cheia]
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                m[~cheia] = np.nanmedian(w, axis=1)
+                d[~cheia] = np.nanmedian(np.abs(w - m[~cheia, None]), axis=1)
+        med[ini:fim], mad[ini:fim], cnt[ini:fim] = m, d, c
+    return med, mad, cnt
+
+def _grupo_pos(grupos, ordem):
+    # Permutação que ordena por (grupo, ordem) e a posição de cada linha dentro do grupo
+    perm = np.lexsort((ordem, grupos))
+    g = grupos[perm]
+    inicio = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    pos = np.arange(len(g)) - np.repeat(inicio, np.diff(np.r_[inicio, len(g)]))
+    return perm, g, pos
+
+def _afetadas(grupos, ordem, ev_grupos, ev_ordem, janela):
+    # Linhas cuja janela anterior do grupo contém algum evento (linha incluída, removida ou
+    # alterada): do primeiro evento do grupo até `janela` linhas depois do último
+    n = len(grupos)
+    if not len(ev_grupos):
+        return np.zeros(n, dtype=bool)
+    ev = pd.DataFrame({'g': ev_grupos, 'o': ev_ordem}).groupby('g')['o'].agg(['min', 'max'])
+    lo = pd.Series(ev['min']).reindex(grupos).to_numpy(dtype=float)
+    hi = pd.Series(ev['max']).reindex(grupos).to_numpy(dtype=float)
+    perm, g, pos = _grupo_pos(grupos, ordem)
+    ate = (ordem <= hi)[perm]
+    n_ate = pd.Series(ate).groupby(g).transform('sum').to_numpy()
+    dentro = (ordem >= lo)[perm] & (pos < n_ate + janela)
+    afetada = np.zeros(n, dtype=bool)
+    afetada[perm[dentro]] = True
+    return afetada
+
+def _janela_nas_linhas(grupos, ordem, valores, alvo, janela):
+    # _janela_anterior só para as linhas `alvo`, lendo de cada grupo apenas as `janela`
+    # linhas antes da primeira linha-alvo; devolve arrays alinhados às linhas (NaN fora do alvo)
+    n = len(grupos)
+    med, mad, cnt = np.full(n, np.nan), np.full(n, np.nan), np.zeros(n, dtype=int)
+    if not alvo.any():
+        return med, mad, cnt
+    perm, g, pos = _grupo_pos(grupos, ordem)
+    a = alvo[perm]
+    ult = pd.Series(np.where(a, pos, -1)).groupby(g).transform('max').to_numpy()
+    prim = pd.Series(np.where(a, pos, np.iinfo(np.int64).max)).groupby(g).transform('min').to_numpy()
+    usar = (ult >= 0) & (pos >= prim - janela) & (pos <= ult)
+    sub = perm[usar]
+    m, d, c = _janela_anterior(valores[sub], grupos[sub], janela)
+    sel = alvo[sub]
+    med[sub[sel]], mad[sub[sel]], cnt[sub[sel]] = m[sel], d[sel], c[sel]
+    return med, mad, cnt
+
+def _z(x, med, mad):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = K_MAD * (x - med) / mad
+    return np.where(np.isfinite(z), z, 0.0)
+
+
+class AnomalyEngine:
+    COLUNAS = ['Total_L', 'Base', 'MAD', 'Referência', 'Score', 'Anomalia']
+
+    def __init__(self, janela=JANELA, min_historico=MIN_HISTORICO, limiar=LIMIAR, janela_coorte=JANELA_COORTE):
+        self.janela, self.min_historico, self.limiar = janela, min_historico, limiar
+        self.janela_coorte = janela_coorte
+        self.scores = pd.DataFrame(columns=self.COLUNAS)
+        # Placa, Data, total e coorte de cada registro pontuado: de onde saem as janelas
+        # quando uma carga retroativa ou uma troca de coorte exige repontuar
+        self.registros = pd.DataFrame(columns=['Placa', 'Data', 'Total_L', 'Coorte'])
+        self.versao = None
+        self._lock = threading.Lock()
+
+    def atualizar(self, df, versao, alteradas=()):
+        # Pontua as linhas de df ainda sem escore e repontua as das placas com frota/OPM
+        # alterada (FuelStore.placas_alteradas); uma vez por versão da base
+        with self._lock:
+            if versao == self.versao:
+                return
+            faltam = df.index.difference(self.scores.index)
+            if alteradas:
+                faltam = faltam.union(df.index[df['Placa'].astype(str).isin(alteradas)])
+            if len(faltam):
+                self.append(df.loc[faltam])
+            self.versao = versao
+
+    def _coorte(self, df):
+        cols = [c for c in COORTE if c in df.columns]
+        if not cols:
+            return pd.Series('(todas)', index=df.index)
+        partes = [df[c].astype(object).fillna('N/D').astype(str) for c in cols]
+        coorte = partes[0]
+        for p in partes[1:]:
+            coorte = coorte + ' / ' + p
+        return coorte
+
+    def append(self, df):
+        # Pontua os registros de df (novos ou já vistos com dados alterados) e repontua as
+        # linhas seguintes da mesma placa/coorte cuja janela mudou; devolve as linhas pontuadas
+        df = df[df['Data'].notna()]
+        if df.empty:
+            return self.scores.iloc[0:0]
+        novos = pd.DataFrame({
+            'Placa': df['Placa'].astype(str).to_numpy(),
+            'Data': pd.to_datetime(df['Data']).to_numpy(dtype='datetime64[ns]'),
+            'Total_L': total_litros(df).to_numpy(dtype=float),
+            'Coorte': self._coorte(df).to_numpy(dtype=object),
+        }, index=df.index)
+        novos = novos[~novos.index.duplicated(keep='last')]
+        substituidos = self.registros[self.registros.index.isin(novos.index)]
+        registros = novos if self.registros.empty else pd.concat([self.registros.drop(substituidos.index), novos])
+
+        # Ordem cronológica (Data, índice) comum às linhas atuais e às versões substituídas
+        n = len(registros)
+        datas = np.concatenate([registros['Data'].to_numpy(dtype='datetime64[ns]'),
+                                substituidos['Data'].to_numpy(dtype='datetime64[ns]')]).astype(np.int64)
+        indices = pd.factorize(np.concatenate([registros.index.to_numpy(), substituidos.index.to_numpy()]), sort=True)[0]
+        ordem = np.empty(len(datas), dtype=np.int64)
+        ordem[np.lexsort((indices, datas))] = np.arange(len(datas))
+        ordem, ordem_sub = ordem[:n], ordem[n:]
+        ordem_novos = ordem[registros.index.get_indexer(novos.index)]
+
+        # Eventos por placa e por coorte: linhas novas/alteradas e o lugar que as substituídas
+        # ocupavam (a janela das linhas seguintes muda nos dois)
+        alvo = np.zeros(n, dtype=bool)
+        valores = registros['Total_L'].to_numpy(dtype=float)
+        grupos_por = {}
+        for col, janela in (('Placa', self.janela), ('Coorte', self.janela_coorte)):
+            codigos = pd.factorize(np.concatenate([registros[col].to_numpy(dtype=object),
+                                                   novos[col].to_numpy(dtype=object),
+                                                   substituidos[col].to_numpy(dtype=object)]))[0]
+            grupos = codigos[:n]
+            ev_grupos = codigos[n:]
+            ev_ordem = np.concatenate([ordem_novos, ordem_sub])
+            grupos_por[col] = grupos
+            alvo |= _afetadas(grupos, ordem, ev_grupos, ev_ordem, janela)
+        med, mad, cnt = _janela_nas_linhas(grupos_por['Placa'], ordem, valores, alvo, self.janela)
+        usa_placa = (cnt >= self.min_historico) & (mad > 0)
+        # A janela da coorte só é lida para as linhas sem histórico suficiente da placa
+        c_med, c_mad, _ = _janela_nas_linhas(grupos_por['Coorte'], ordem, valores, alvo & ~usa_placa, self.janela_coorte)
+
+        res = registros[alvo][['Total_L']].copy()
+        med, mad, usa_placa, c_med, c_mad = med[alvo], mad[alvo], usa_placa[alvo], c_med[alvo], c_mad[alvo]
+        res['Base'] = np.where(usa_placa, med, c_med)
+        res['MAD'] = np.where(usa_placa, mad, c_mad)
+        res['Referência'] = np.where(usa_placa, 'placa', 'coorte')
+        res['Score'] = _z(res['Total_L'].to_numpy(), res['Base'].to_numpy(), res['MAD'].to_numpy())
+        res['Anomalia'] = np.abs(res['Score']) > self.limiar
+        self.scores = res if self.scores.empty else pd.concat([self.scores.drop(res.index, errors='ignore'), res])
+        self.registros = registros
+        return res
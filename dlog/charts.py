@@ -0,0 +1,56 @@
+# ---------- Figuras Plotly cacheadas e redução de dados no servidor ----------
+# As figuras montadas pelo plotly.express custam dezenas de ms por rerun; aqui elas são
+# construídas uma vez por (visão, estado de filtro, versão do snapshot) e guardadas prontas
+# (validadas) no cache de visões; o st.plotly_chart só serializa. Antes de montar, barras
+# horizontais podem ser reduzidas às N maiores + "Outros" e séries longas reduzidas a um
+# número máximo de pontos (mínimos e máximos de cada bloco), sem perder os picos.
+# O plotly.express só é importado quando a primeira figura é montada (ver dlog/startup.py).
+import numpy as np
+import pandas as pd
+
+MAX_BARRAS = 20
+MAX_PONTOS = 500
+
+
+def top_n_outros(df, rotulo, valor, n=MAX_BARRAS, outros='Outros'):
+    # As n maiores linhas por `valor`; as demais somadas numa linha "Outros (k)"
+    if len(df) <= n + 1:
+        return df
+    ordem = df.sort_values(valor, ascending=False, kind='stable')
+    resto = ordem.iloc[n:]
+    linha = pd.DataFrame({rotulo: [f"{outros} ({len(resto)})"], valor: [resto[valor].sum()]})
+    return pd.concat([ordem.iloc[:n][[rotulo, valor]], linha], ignore_index=True)
+
+def reduzir_serie(df, x, colunas=None, max_pontos=MAX_PONTOS):
+    # Mantém, em cada bloco de linhas consecutivas, as de mínimo e máximo de cada coluna
+    # (e a primeira/última da série); séries curtas voltam intactas
+    colunas = list(colunas if colunas is not None else df.columns.drop(x))
+    if len(df) <= max_pontos or not colunas:
+        return df
+    por_bloco = max(2 * len(colunas), 2)
+    blocos = max(max_pontos // por_bloco, 1)
+    bloco = np.arange(len(df)) * blocos // len(df)
+    valores = df[colunas].apply(pd.to_numeric, errors='coerce').fillna(0.0)
+    valores.index = np.arange(len(df))
+    grupos = valores.groupby(bloco)
+    manter = np.unique(np.r_[0, len(df) - 1, grupos.idxmin().to_numpy().ravel(), grupos.idxmax().to_numpy().ravel()])
+    return df.iloc[manter]
+
+def _px():
+    import plotly.express as px
+    return px
+
+def barras_h(df, x, y, labels, title, top=None):
+    if top:
+        df = top_n_outros(df, y, x, top)
+    return _px().bar(df, x=x, y=y, orientation='h', labels=labels, title=title)
+
+def linhas(df, x, max_pontos=MAX_PONTOS):
+    df = reduzir_serie(df, x, max_pontos=max_pontos)
+    return _px().line(df, x=x, y=df.columns.drop(x), markers=True)
+
+def pizza(df, nomes, valores, hole=0.4):
+    return _px().pie(df, names=nomes, values=valores, hole=hole)
+
+def barras(df, x, y, **kwargs):
+    return _px().bar(df, x=x, y=y, **kwargs)
@@ -0,0 +1,125 @@
+# ---------- Índice de cobertura das OPMs e simulador de transferências ----------
+# Cobertura: montada uma vez por snapshot a partir do quadro de OPMs (OPM_Municipios_Enriched):
+# para cada OPM, os municípios do interior e os bairros de Maceió que ela atende. A
+# normalização dos nomes é feita só nos valores distintos (map_distinct).
+# Simulador: parte do resumo (viaturas, municípios e bairros por OPM) e, a cada transferência,
+# atualiza só as duas OPMs envolvidas, as somas das médias e as listas "menos de 1 viatura".
+import numpy as np
+import pandas as pd
+
+from dlog.normalize import map_distinct, normalize_text
+
+
+def _norm(s, caixa):
+    return map_distinct(s.astype(object), lambda x: caixa(normalize_text(x))).fillna('')
+
+
+class Cobertura:
+    def __init__(self, df_opm):
+        unidade = df_opm['UNIDADE'].astype(object)
+        tipo = _norm(df_opm['TIPO_LOCAL'], str.lower)
+        muni = _norm(df_opm['MUNICIPIO'], str.upper)
+        muni_ref = _norm(df_opm['MUNICIPIO_REFERENCIA'], str.upper)
+        interior = (tipo == 'municipio') & (muni != 'MACEIO')
+        bairros = (tipo == 'bairro') & (muni_ref == 'MACEIO')
+        self.municipios = self._conjuntos(unidade[interior], df_opm['MUNICIPIO'][interior])
+        self.bairros = self._conjuntos(unidade[bairros], df_opm['LOCAL'][bairros])
+
+    @staticmethod
+    def _conjuntos(chaves, valores):
+        valores = valores.astype(object).dropna()
+        grupos = valores.groupby(chaves.loc[valores.index], sort=False)
+        return {opm: frozenset(v) for opm, v in grupos}
+
+    def contagem(self):
+        opms = sorted(set(self.municipios) | set(self.bairros))
+        return pd.DataFrame({
+            'OPM': opms,
+            'Municípios': [len(self.municipios.get(o, ())) for o in opms],
+            'Bairros': [len(self.bairros.get(o, ())) for o in opms],
+        })
+
+    def resumo(self, viaturas):
+        # viaturas: DataFrame (OPM, Viaturas); mesmo formato do resumo da página
+        summary = viaturas.merge(self.contagem(), on='OPM', how='left')
+        summary[['Municípios','Bairros']] = summary[['Municípios','Bairros']].fillna(0).astype(int)
+        summary['Vtr/Município'] = (summary['Viaturas']/summary['Municípios']).replace(np.inf,0).round(2)
+        summary['Vtr/Bairro'] = (summary['Viaturas']/summary['Bairros']).replace(np.inf,0).round(2)
+        return summary
+
+
+class Simulador:
+    ALVOS = {'Municípios': 'Vtr/Município', 'Bairros': 'Vtr/Bairro'}
+
+    def __init__(self, summary):
+        self.opms = summary['OPM'].tolist()
+        self.pos = {opm: i for i, opm in enumerate(self.opms)}
+        self.original = summary['Viaturas'].to_numpy(dtype=int).copy()
+        self.viaturas = self.original.copy()
+        self.alvos = {a: summary[a].to_numpy(dtype=int) for a in self.ALVOS}
+        self.validas = {a: int((n > 0).sum()) for a, n in self.alvos.items()}
+        self.razao, self.soma, self.abaixo = {}, {}, {}
+        for alvo in self.ALVOS:
+            self.razao[alvo] = np.zeros(len(self.opms))
+            self.soma[alvo] = 0.0
+            self.abaixo[alvo] = set()
+            for i in np.flatnonzero(self.alvos[alvo] > 0):
+                self._atualizar(alvo, i)
+        # (média, OPMs abaixo de 1) antes de qualquer transferência, para os deltas
+        self.inicial = {alvo: (self.media(alvo), len(self.abaixo[alvo])) for alvo in self.ALVOS}
+        self.movimentos = []
+
+    def _atualizar(self, alvo, i):
+        # Recalcula a razão de uma OPM e ajusta a soma e a lista "abaixo de 1"
+        n = self.alvos[alvo][i]
+        if n <= 0:
+            return
+        nova = round(self.viaturas[i] / n, 2)
+        self.soma[alvo] += nova - self.razao[alvo][i]
+        self.razao[alvo][i] = nova
+        if nova < 1:
+            self.abaixo[alvo].add(i)
+        else:
+            self.abaixo[alvo].discard(i)
+
+    def mover(self, origem, destino, n):
+        o, d = self.pos[origem], self.pos[destino]
+        n = int(min(n, self.viaturas[o]))
+        if n <= 0 or o == d:
+            return 0
+        self.viaturas[o] -= n
+        self.viaturas[d] += n
+        for alvo in self.ALVOS:
+            self._atualizar(alvo, o)
+            self._atualizar(alvo, d)
+        self.movimentos.append((origem, destino, n))
+        return n
+
+    def desfazer(self):
+        if self.movimentos:
+            origem, destino, n = self.movimentos.pop()
+            self.mover(destino, origem, n)
+            self.movimentos.pop()
+
+    def media(self, alvo):
+        return self.soma[alvo] / self.validas[alvo] if self.validas[alvo] else 0.0
+
+    def abaixo_de_1(self, alvo):
+        idx = sorted(self.abaixo[alvo])
+        return pd.DataFrame({
+            'OPM': [self.opms[i] for i in idx],
+            alvo: self.alvos[alvo][idx],
+            'Viaturas': self.viaturas[idx],
+            self.ALVOS[alvo]: self.razao[alvo][idx],
+        })
+
+    def alteradas(self):
+        # Só as OPMs cujo número de viaturas mudou em relação ao resumo original
+        idx = np.flatnonzero(self.viaturas != self.original)
+        return pd.DataFrame({
+            'OPM': [self.opms[i] for i in idx],
+            'Viaturas (antes)': self.original[idx],
+            'Viaturas (simulado)': self.viaturas[idx],
+            'Vtr/Município': self.razao['Municípios'][idx],
+            'Vtr/Bairro': self.razao['Bairros'][idx],
+        })
@@ -0,0 +1,28 @@
+# ---------- Cubo de agregados por viatura (PLACA) ----------
+# Um único groupby por estado de filtro; KPIs, Top-N, múltiplas OPMs e ranking leem daqui.
+import pandas as pd
+
+from dlog.memory import como_texto
+
+
+def vehicle_cube(df):
+    cube = df.groupby('PLACA', sort=False).agg(
+        Litros=('TOTAL_LITROS', 'sum'),
+        Valor=('VALOR_TOTAL', 'sum'),
+        Unidade=('UNIDADE', 'first'),
+        N_OPMS=('UNIDADE', 'nunique'),
+    ).reset_index()
+    cube['Unidade'] = como_texto(cube['Unidade'])
+    cube['Posição'] = cube['Litros'].rank(method='first', ascending=False).astype(int)
+    return cube
+
+def top_n(cube, coluna, n=20):
+    # Seleção parcial (nlargest) em vez de ordenar o cubo inteiro
+    return cube.nlargest(n, coluna).copy()
+
+def ranking(cube):
+    return cube.sort_values('Posição').reset_index(drop=True)
+
+def frotas_abastecidas(df, cube):
+    # Equivalente a groupby('PLACA')['UNIDADE'].transform('nunique'), via lookup no cubo
+    return df['PLACA'].map(pd.Series(cube['N_OPMS'].to_numpy(), index=cube['PLACA']))
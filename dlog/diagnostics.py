@@ -0,0 +1,130 @@
+# ---------- Painel de diagnóstico (oculto) ----------
+# Aberto pela home com ?diagnostico=<token>, igual a DLOG_DIAGNOSTICO_TOKEN; sem o token
+# configurado o painel fica fechado. Não aparece na navegação. Mostra os últimos reruns por sessão com o tempo
+# de cada etapa, as taxas de acerto dos caches, o custo em memória de cada conjunto de
+# referência (dlog/memory.py), o aquecimento do boot e a primeira renderização de cada
+# página (dlog/startup.py) e exporta tudo em JSON/CSV.
+import hmac
+import json
+import os
+
+import pandas as pd
+import streamlit as st
+
+from dlog import memory, pipeline, profiling, startup
+
+TOKEN = os.environ.get("DLOG_DIAGNOSTICO_TOKEN")
+
+
+def autorizado(valor):
+    # Fechado por padrão: sem DLOG_DIAGNOSTICO_TOKEN ninguém abre o painel
+    if not TOKEN or valor is None:
+        return False
+    return hmac.compare_digest(valor.encode(), TOKEN.encode())
+
+def tabela_reruns(regs):
+    return pd.DataFrame([
+        {"sessão": r["sessao"][:8], "página": r["pagina"], "tipo": r["tipo"],
+         "início": pd.Timestamp(r["inicio"], unit="s", tz="UTC").tz_convert("America/Maceio").strftime("%d/%m %H:%M:%S"),
+         "total (ms)": r["total_ms"], "RSS (MB)": r["rss_mb"], "Δ RSS (MB)": r["delta_rss_mb"],
+         "etapas": len(r["etapas"]), "erro": r["erro"]}
+        for r in regs
+    ])
+
+def tabela_etapas(regs):
+    linhas = [{"sessão": r["sessao"][:8], "página": r["pagina"], "inicio": r["inicio"], **e}
+              for r in regs for e in r["etapas"]]
+    return pd.DataFrame(linhas, columns=["sessão", "página", "inicio", "etapa", "ms", "delta_rss_mb"])
+
+def render():
+    st.title("🩺 Diagnóstico")
+    if not profiling.ATIVO:
+        st.warning("Instrumentação desligada (DLOG_PROFILING=0).")
+
+    sessoes = profiling.sessoes()
+    atual = profiling.sessao_atual()
+    opcoes = ["Todas"] + [s for s in sessoes if s != atual]
+    escolha = st.selectbox("Sessão", opcoes, format_func=lambda s: s if s == "Todas" else f"{s[:8]} ({sessoes[s]} reruns)")
+    regs = profiling.reruns(None if escolha == "Todas" else escolha)
+    regs = sorted(regs, key=lambda r: r["inicio"], reverse=True)
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Sessões", len(sessoes))
+    c2.metric("Reruns registrados", len(regs))
+    c3.metric("RSS atual (MB)", f"{profiling.rss_mb():,.0f}" if profiling.rss_mb() is not None else "N/D")
+
+    st.subheader("Inicialização")
+    aquecimento = startup.estado()
+    if aquecimento is None:
+        st.caption("Aquecimento no boot desligado (DLOG_AQUECER=0)." if not startup.ATIVO else "Aquecimento não iniciado neste processo.")
+    else:
+        st.caption(f"Aquecimento: {'concluído' if aquecimento.concluido.is_set() else 'em andamento'}"
+                   + (f" em {aquecimento.total_ms:,.0f} ms" if aquecimento.total_ms is not None else "")
+                   + (f" · erro: {aquecimento.erro}" if aquecimento.erro else ""))
+        tempos = [{"etapa": f"import {m}", "ms": ms} for m, ms in aquecimento.importacoes.items()]
+        tempos += [{"etapa": f"aquecer {e}", "ms": ms} for e, ms in aquecimento.etapas.items()]
+        if tempos:
+            st.dataframe(pd.DataFrame(tempos), use_container_width=True, hide_index=True)
+    primeiras = profiling.primeiras_renderizacoes()
+    if primeiras:
+        st.dataframe(pd.DataFrame([
+            {"página": p["pagina"], "primeira renderização (ms)": p["render_ms"],
+             "segundos após o início do processo": p["desde_inicio_s"]}
+            for p in primeiras
+        ]), use_container_width=True, hide_index=True)
+
+    st.subheader("Caches")
+    caches = pd.DataFrame(profiling.estatisticas_cache())
+    if caches.empty:
+        st.info("Nenhuma função cacheada chamada ainda.")
+    else:
+        st.dataframe(caches.sort_values("chamadas", ascending=False), use_container_width=True, hide_index=True)
+
+    st.subheader("Cache de visões (entre sessões)")
+    st.dataframe(pd.DataFrame([pipeline.view_cache().estatisticas()]), use_container_width=True, hide_index=True)
+    atualizador = pipeline.atualizador()
+    if atualizador is None:
+        st.caption("Atualização em segundo plano desligada (DLOG_VIEWS_INTERVALO=0).")
+    else:
+        st.caption(f"Atualização em segundo plano a cada {atualizador.intervalo}s · "
+                   f"{atualizador.rodadas} aquecimento(s), último em {atualizador.ultimo_ms} ms"
+                   + (f" · erro: {atualizador.erro}" if atualizador.erro else ""))
+
+    st.subheader("Memória por conjunto de dados")
+    uso = memory.relatorio()
+    if uso.empty:
+        st.info("Nenhum conjunto de referência carregado neste processo.")
+    else:
+        rss = profiling.rss_mb()
+        if rss:
+            uso["% do RSS"] = (100 * uso["MB"] / rss).round(1)
+        st.dataframe(uso.sort_values("MB", ascending=False), use_container_width=True, hide_index=True)
+        for nome, df in memory.conjuntos().items():
+            with st.expander(f"Colunas: {nome}"):
+                st.dataframe(memory.uso_colunas(df), use_container_width=True, hide_index=True)
+
+    st.subheader("Últimos reruns")
+    if not regs:
+        st.info("Nenhum rerun registrado.")
+        return
+    st.dataframe(tabela_reruns(regs), use_container_width=True, hide_index=True)
+
+    etapas = tabela_etapas(regs)
+    st.subheader("Tempo por etapa")
+    if not etapas.empty:
+        resumo = etapas.groupby(["página", "etapa"])["ms"].agg(["count", "median", "max", "sum"]).reset_index()
+        resumo.columns = ["página", "etapa", "n", "mediana (ms)", "máx (ms)", "total (ms)"]
+        st.dataframe(resumo.sort_values("total (ms)", ascending=False), use_container_width=True, hide_index=True)
+
+    st.subheader("Exportar")
+    c1, c2, c3 = st.columns(3)
+    doc = {"primeiras_renderizacoes": primeiras, "caches": profiling.estatisticas_cache(), "visoes": pipeline.view_cache().estatisticas(), "memoria": memory.relatorio().to_dict("records"), "reruns": regs}
+    c1.download_button("JSON completo", json.dumps(doc, ensure_ascii=False, default=str),
+                       "diagnostico.json", "application/json")
+    c2.download_button("CSV de reruns", tabela_reruns(regs).to_csv(index=False).encode("utf-8"),
+                       "diagnostico_reruns.csv", "text/csv")
+    c3.download_button("CSV de etapas", etapas.to_csv(index=False).encode("utf-8"),
+                       "diagnostico_etapas.csv", "text/csv")
+    if st.button("Limpar registros"):
+        profiling.limpar()
+        st.rerun()
@@ -0,0 +1,183 @@
+# ---------- Exportações sob demanda (CSV, Excel, PDF) ----------
+# Nada é gerado no rerun: o arquivo só é montado quando alguém pede, num pool de threads,
+# e fica em disco (SNAPSHOT_DIR/exportacoes) indexado pela chave da visão (versão do
+# snapshot, seleção, nome, formato). Pedidos repetidos da mesma chave reaproveitam o arquivo
+# ou o job em andamento. CSVs grandes são escritos em blocos, sem montar o texto inteiro.
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from dlog.memory import como_texto
+from dlog.snapshot import SNAPSHOT_DIR
+
+PASTA = SNAPSHOT_DIR / "exportacoes"
+BLOCO_CSV = 50_000
+MIME = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+
+
+class Exportador:
+    def __init__(self, pasta=PASTA, max_workers=2, maxsize=32):
+        self.pasta = Path(pasta)
+        self.maxsize = maxsize
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dlog-export")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        # O nome do arquivo deriva da chave (que inclui a versão do snapshot): arquivos de
+        # execuções anteriores continuam válidos e entram no LRU pela data de modificação
+        self._prontos = OrderedDict()
+        if self.pasta.exists():
+            existentes = [p for p in self.pasta.iterdir() if p.suffix[1:] in MIME]
+            for p in sorted(existentes, key=lambda p: p.stat().st_mtime):
+                self._prontos[p] = True
+
+    def _caminho(self, chave, formato):
+        nome = hashlib.sha256(repr(chave).encode()).hexdigest()[:20]
+        return self.pasta / f"{nome}.{formato}"
+
+    def pronto(self, chave, formato):
+        caminho = self._caminho(chave, formato)
+        with self._lock:
+            if caminho in self._prontos and caminho.exists():
+                self._prontos.move_to_end(caminho)
+                return caminho
+        return None
+
+    def solicitar(self, chave, formato, gerar):
+        # gerar(destino: Path) escreve o arquivo; devolve um Future com o caminho final
+        caminho = self._caminho(chave, formato)
+        with self._lock:
+            if caminho in self._prontos and caminho.exists():
+                feito = Future()
+                feito.set_result(caminho)
+                return feito
+            job = self._jobs.get(caminho)
+            if job is None:
+                job = self._jobs[caminho] = self._pool.submit(self._executar, caminho, gerar)
+            return job
+
+    def _executar(self, caminho, gerar):
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        tmp = caminho.with_name(caminho.name + f".{threading.get_ident()}.tmp")
+        try:
+            gerar(tmp)
+            os.replace(tmp, caminho)
+        finally:
+            tmp.unlink(missing_ok=True)
+            with self._lock:
+                self._jobs.pop(caminho, None)
+        with self._lock:
+            self._prontos[caminho] = True
+            while len(self._prontos) > self.maxsize:
+                antigo, _ = self._prontos.popitem(last=False)
+                antigo.unlink(missing_ok=True)
+        return caminho
+
+    def em_andamento(self):
+        with self._lock:
+            return len(self._jobs)
+
+
+def botao(exportador, chave, formato, gerar, rotulo, nome_arquivo, key):
+    # Arquivo já gerado: botão de download direto. Senão, "Preparar" dispara a geração e
+    # espera o job (compartilhado com outras sessões que pediram a mesma chave).
+    caminho = exportador.pronto(chave, formato)
+    if caminho is None:
+        if not st.button(f"Preparar {rotulo}", key=f"{key}_preparar"):
+            return
+        with st.spinner(f"Gerando {rotulo}..."):
+            caminho = exportador.solicitar(chave, formato, gerar).result()
+    with open(caminho, "rb") as f:
+        st.download_button(f"Baixar {rotulo}", data=f, file_name=nome_arquivo,
+                           mime=MIME[formato], key=f"{key}_baixar")
+
+
+# ---------- Escritores ----------
+def csv_em_blocos(df, destino, bloco=BLOCO_CSV):
+    with open(destino, "w", encoding="utf-8", newline="") as f:
+        if df.empty:
+            df.to_csv(f, index=False)
+        for inicio in range(0, len(df), bloco):
+            df.iloc[inicio:inicio + bloco].to_csv(f, index=False, header=inicio == 0)
+
+def excel(abas, destino):
+    # abas: {nome da aba: DataFrame}; limite de linhas por aba do Excel
+    with pd.ExcelWriter(destino, engine="openpyxl") as writer:
+        for nome, df in abas.items():
+            df.head(1_048_575).to_excel(writer, sheet_name=nome[:31], index=False)
+
+
+# ---------- Relatório gerencial em PDF (fpdf) ----------
+def _latin1(texto):
+    # As fontes padrão do fpdf só cobrem latin-1 (acentos sim, emojis/setas não)
+    return str(texto).replace("→", "->").encode("latin-1", "replace").decode("latin-1")
+
+def _tabela(pdf, df, larguras, max_linhas=40):
+    pdf.set_font("Arial", "B", 8)
+    for col, w in zip(df.columns, larguras):
+        pdf.cell(w, 6, _latin1(col)[:40], border=1)
+    pdf.ln()
+    pdf.set_font("Arial", "", 8)
+    for linha in df.head(max_linhas).itertuples(index=False):
+        for valor, w in zip(linha, larguras):
+            texto = "" if pd.isna(valor) else valor
+            pdf.cell(w, 5, _latin1(texto)[:int(w / 1.6)], border=1)
+        pdf.ln()
+    if len(df) > max_linhas:
+        pdf.set_font("Arial", "I", 7)
+        pdf.cell(0, 5, _latin1(f"... {len(df) - max_linhas} linhas omitidas (ver exportação Excel)"), ln=1)
+    pdf.ln(3)
+
+def _secao(pdf, titulo):
+    pdf.set_font("Arial", "B", 11)
+    pdf.cell(0, 8, _latin1(titulo), ln=1)
+
+def relatorio_pdf(destino, titulo, filtros, kpis, top, frota, plano, plano_bairros):
+    from fpdf import FPDF
+
+    pdf = FPDF(orientation="P", unit="mm", format="A4")
+    pdf.set_auto_page_break(True, margin=12)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, _latin1(titulo), ln=1)
+    pdf.set_font("Arial", "", 8)
+    pdf.multi_cell(0, 4, _latin1(filtros))
+    pdf.ln(2)
+
+    _secao(pdf, "Indicadores principais")
+    pdf.set_font("Arial", "", 9)
+    for rotulo, valor in kpis.items():
+        pdf.cell(60, 5, _latin1(rotulo))
+        pdf.cell(0, 5, _latin1(valor), ln=1)
+    pdf.ln(3)
+
+    _secao(pdf, "Top 20 viaturas por consumo (litros)")
+    _tabela(pdf, top, [30, 60, 40, 50])
+
+    _secao(pdf, "Frota por OPM")
+    frota = frota.reset_index().apply(como_texto).fillna("NÃO LOCALIZADO")
+    larg = [50] + [max(18, 130 // max(len(frota.columns) - 1, 1))] * (len(frota.columns) - 1)
+    _tabela(pdf, frota, larg, max_linhas=80)
+
+    _secao(pdf, "Sugestões de redistribuição (municípios)")
+    _sugestoes(pdf, plano)
+    _secao(pdf, "Sugestões de redistribuição (bairros de Maceió)")
+    _sugestoes(pdf, plano_bairros)
+    pdf.output(str(destino))
+
+def _sugestoes(pdf, plano):
+    pdf.set_font("Arial", "", 8)
+    if plano.empty:
+        pdf.cell(0, 5, _latin1("Nenhuma transferência sugerida."), ln=1)
+    for r in plano.itertuples():
+        pdf.multi_cell(0, 4, _latin1(f"-> Transferir {r.Viaturas} viatura(s) de {r.Origem} para {r.Destino}."))
+    pdf.ln(3)
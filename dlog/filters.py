@@ -0,0 +1,75 @@
+# ---------- Motor de filtros indexado (OPM de abastecimento x combustível) ----------
+# O merge com a frota é feito uma única vez sobre todos os registros. As colunas filtráveis
+# ficam como códigos categóricos e cada seleção vira uma tabela booleana por código,
+# aplicada aos códigos (OR dentro da coluna, AND entre colunas). Os resultados já
+# filtrados, com o cubo por viatura, ficam num LRU indexado pela seleção.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from dlog.cube import frotas_abastecidas, vehicle_cube
+
+MERGE_COLS = ['PLACA','OPM','Frota','PADRAO','CARACTERIZACAO','CUSTO_PADRAO_MENSAL']
+
+
+class FilterIndex:
+    def __init__(self, df_abast, df_frota, colunas=('UNIDADE', 'COMBUSTIVEL_DOMINANTE'), maxsize=16):
+        # merge final com frota (uma vez por snapshot)
+        base = df_abast.merge(df_frota[MERGE_COLS], on='PLACA', how='left')
+        preencher = {'Frota':'NÃO LOCALIZADO','PADRAO':'N/D','CARACTERIZACAO':'N/D'}
+        for col, valor in preencher.items():
+            # Frota compartilhada vem com categóricas (dlog/memory.py): o rótulo vira categoria
+            if isinstance(base[col].dtype, pd.CategoricalDtype) and valor not in base[col].cat.categories:
+                base[col] = base[col].cat.add_categories([valor])
+        base.fillna(preencher, inplace=True)
+        self.base = base
+        self.colunas = tuple(colunas)
+        self.codes = {}
+        self.categorias = {}
+        for col in self.colunas:
+            cat = pd.Categorical(base[col])
+            self.codes[col] = cat.codes
+            self.categorias[col] = list(cat.categories)
+        self.maxsize = maxsize
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def options(self, col):
+        return sorted(self.categorias[col])
+
+    def _mask(self, selecao):
+        mask = np.ones(len(self.base), dtype=bool)
+        for col, valores in zip(self.colunas, selecao):
+            cats = self.categorias[col]
+            # última posição = código -1 (valor ausente), nunca selecionado
+            tabela = np.zeros(len(cats) + 1, dtype=bool)
+            tabela[:-1] = pd.Index(cats).isin(valores)
+            if tabela[:-1].all() and not (self.codes[col] == -1).any():
+                continue
+            mask &= tabela[self.codes[col]]
+        return mask
+
+    def _build(self, selecao):
+        mask = self._mask(selecao)
+        df = self.base if mask.all() else self.base.loc[mask]
+        cube = vehicle_cube(df)
+        df = df.assign(**{'Nº de frotas abastecidas': frotas_abastecidas(df, cube)})
+        return df, cube
+
+    def select(self, *selecao):
+        key = tuple(frozenset(v) for v in selecao)
+        with self._lock:
+            if key in self._lru:
+                self.hits += 1
+                self._lru.move_to_end(key)
+                return self._lru[key]
+            self.misses += 1
+        result = self._build(selecao)
+        with self._lock:
+            self._lru[key] = result
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+        return result
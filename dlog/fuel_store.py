@@ -0,0 +1,250 @@
+# ---------- Base local incremental de abastecimentos (Dashboard de combustível) ----------
+# As planilhas enviadas são identificadas pelo hash do conteúdo: uma planilha já vista é
+# ignorada. Dos abastecimentos só entram as linhas novas (chave Placa + Data + valores),
+# gravadas em partições Parquet mensais. Frota e OPMs ficam numa tabela de enriquecimento
+# por placa, recalculada apenas para as placas novas ou alteradas. O quadro consolidado
+# fica em memória e é atualizado só com as linhas novas e as placas alteradas.
+# O quadro publicado nunca é alterado no lugar: a ingestão monta um novo e troca o par
+# (versão, dados) de uma vez sob o lock; quem lê pega o par inteiro com estado().
+import hashlib
+import io
+import json
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dlog.rollup import COMBUSTIVEIS
+from dlog.snapshot import SNAPSHOT_DIR
+
+PASTA = SNAPSHOT_DIR / "combustivel"
+CHAVE = ['Placa', 'Data'] + COMBUSTIVEIS + ['Custo']
+COLS_OPM = ['OPM', 'Latitude', 'Longitude']
+ID = '_id'
+HASH = '_chave'
+
+
+def _placa(s):
+    return s.astype(str).str.upper().str.replace('[^A-Z0-9]', '', regex=True)
+
+def preparar_abast(ab):
+    ab = ab.copy()
+    ab['Placa'] = _placa(ab['Placa'])
+    # Data
+    if 'Data' in ab.columns:
+        ab['Data'] = pd.to_datetime(ab['Data'])
+    else:
+        for c in ab.columns:
+            if 'data' in c.lower():
+                ab['Data'] = pd.to_datetime(ab[c])
+                break
+    return ab
+
+def chave_linhas(ab):
+    return pd.util.hash_pandas_object(ab.reindex(columns=CHAVE), index=False).to_numpy()
+
+def _hash_por(df, chave):
+    h = pd.util.hash_pandas_object(df, index=False)
+    return pd.Series(h.to_numpy(), index=df[chave].to_numpy())
+
+def _alteradas(novo, antigo):
+    anterior = antigo.to_dict()
+    return {k for k, h in novo.items() if anterior.get(k) != h}
+
+
+class FuelStore:
+    def __init__(self, pasta=PASTA):
+        self.pasta = pasta
+        self._lock = threading.Lock()
+        self.manifesto = self._ler_json("manifesto.json", {"uploads": {}, "versao": 0})
+        self.frota = self._ler_parquet("frota.parquet")
+        self.opm = self._ler_parquet("opm.parquet")
+        partes = sorted(self.pasta.glob("ano_mes=*/*.parquet")) if self.pasta.exists() else []
+        abast = pd.concat([pd.read_parquet(p) for p in partes], ignore_index=True) if partes else pd.DataFrame()
+        if not abast.empty:
+            abast = abast.set_index(ID).sort_index()
+            abast.index.name = None
+        self.chaves = set(abast[HASH].tolist()) if not abast.empty else set()
+        self.hash_frota = _hash_por(self.frota, 'Placa') if not self.frota.empty else pd.Series(dtype='uint64')
+        self.hash_opm = _hash_por(self.opm, 'OPM') if not self.opm.empty else pd.Series(dtype='uint64')
+        self.enriquecimento = self._enriquecer(None)
+        self._estado = (self.manifesto["versao"], self._consolidar(abast))
+        self._alteracoes = []     # (versão, placas com enriquecimento trocado nela)
+
+    def estado(self):
+        # Par (versão, dados) consistente: uma única leitura do atributo trocado na ingestão
+        return self._estado
+
+    def placas_alteradas(self, desde=None):
+        # Placas cujo enriquecimento (frota/OPM) mudou depois da versão `desde`: quem guarda
+        # resultados por linha (ex.: dlog/anomaly.py) refaz só as linhas delas
+        placas = set()
+        for versao, alteradas in self._alteracoes:
+            if desde is None or versao > desde:
+                placas |= alteradas
+        return placas
+
+    @property
+    def versao(self):
+        return self._estado[0]
+
+    @property
+    def dados(self):
+        return self._estado[1]
+
+    # ---------- persistência ----------
+    def _ler_json(self, nome, padrao):
+        path = self.pasta / nome
+        return json.loads(path.read_text(encoding="utf-8")) if path.exists() else padrao
+
+    def _ler_parquet(self, nome):
+        path = self.pasta / nome
+        return pd.read_parquet(path) if path.exists() else pd.DataFrame()
+
+    def _gravar(self, nome, df):
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        tmp = self.pasta / (nome + ".tmp")
+        df.to_parquet(tmp, index=False)
+        tmp.replace(self.pasta / nome)
+
+    def _gravar_manifesto(self):
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        tmp = self.pasta / "manifesto.json.tmp"
+        tmp.write_text(json.dumps(self.manifesto, indent=2, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.pasta / "manifesto.json")
+
+    # ---------- enriquecimento por placa (frota + coordenadas da OPM) ----------
+    def _enriquecer(self, placas):
+        if self.frota.empty:
+            return pd.DataFrame(columns=['Placa'])
+        fr = self.frota if placas is None else self.frota[self.frota['Placa'].isin(placas)]
+        fr = fr.drop_duplicates('Placa')
+        if not self.opm.empty and 'OPM' in fr.columns:
+            op = self.opm[[c for c in COLS_OPM if c in self.opm.columns]].drop_duplicates('OPM')
+            fr = fr.merge(op, on='OPM', how='left')
+        return fr.reset_index(drop=True)
+
+    def _consolidar(self, abast):
+        if abast.empty:
+            return abast
+        cols = [c for c in abast.columns if c != HASH and (c not in self.enriquecimento.columns or c == 'Placa')]
+        dados = abast[cols].reset_index().merge(self.enriquecimento, on='Placa', how='left')
+        dados = dados.set_index('index')
+        dados.index.name = None
+        return dados
+
+    # ---------- ingestão ----------
+    def _registrar(self, tipo, digest, novas):
+        self.manifesto["uploads"][digest] = {
+            "tipo": tipo, "linhas_novas": int(novas), "em": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.manifesto["versao"] += 1
+        self._gravar_manifesto()
+
+    def _ingest_frota(self, fr):
+        fr = fr.copy()
+        fr['Placa'] = _placa(fr['Placa'])
+        fr = fr.drop_duplicates('Placa', keep='last')
+        alteradas = _alteradas(_hash_por(fr, 'Placa'), self.hash_frota)
+        if self.frota.empty:
+            self.frota = fr.reset_index(drop=True)
+        else:
+            self.frota = pd.concat([self.frota[~self.frota['Placa'].isin(fr['Placa'])], fr], ignore_index=True)
+        self.hash_frota = _hash_por(self.frota, 'Placa')
+        self._gravar("frota.parquet", self.frota)
+        return alteradas
+
+    def _ingest_opm(self, op):
+        op = op.drop_duplicates('OPM', keep='last')
+        alteradas = _alteradas(_hash_por(op, 'OPM'), self.hash_opm)
+        if self.opm.empty:
+            self.opm = op.reset_index(drop=True)
+        else:
+            self.opm = pd.concat([self.opm[~self.opm['OPM'].isin(op['OPM'])], op], ignore_index=True)
+        self.hash_opm = _hash_por(self.opm, 'OPM')
+        self._gravar("opm.parquet", self.opm)
+        if self.frota.empty or 'OPM' not in self.frota.columns:
+            return set()
+        return set(self.frota.loc[self.frota['OPM'].isin(alteradas), 'Placa'])
+
+    def _atualizar_placas(self, dados, placas):
+        # Recalcula o enriquecimento e devolve um novo consolidado com só as colunas de
+        # enriquecimento trocadas nas linhas dessas placas (o quadro recebido fica intacto)
+        if not placas:
+            return dados
+        novo = self._enriquecer(placas)
+        self.enriquecimento = pd.concat(
+            [self.enriquecimento[~self.enriquecimento['Placa'].isin(placas)], novo], ignore_index=True)
+        if dados.empty:
+            return dados
+        mask = dados['Placa'].isin(placas).to_numpy()
+        if not mask.any():
+            return dados
+        valores = dados.loc[mask, ['Placa']].merge(novo, on='Placa', how='left')
+        valores.index = dados.index[mask]
+        colunas = {}
+        for c in novo.columns:
+            if c != 'Placa':
+                atual = dados[c] if c in dados.columns else pd.Series(np.nan, index=dados.index)
+                colunas[c] = atual.mask(mask, valores[c])
+        return dados.assign(**colunas)
+
+    def _ingest_abast(self, dados, ab):
+        ab = preparar_abast(ab)
+        ab[HASH] = chave_linhas(ab)
+        ab = ab.drop_duplicates(HASH)
+        ab = ab[~ab[HASH].isin(self.chaves)]
+        if ab.empty:
+            return dados, ab
+        inicio = int(dados.index.max()) + 1 if not dados.empty else 0
+        ab.index = pd.RangeIndex(inicio, inicio + len(ab))
+        mes = ab['Data'].dt.strftime('%Y-%m').fillna('sem-data')
+        for valor, parte in ab.groupby(mes):
+            pasta = self.pasta / f"ano_mes={valor}"
+            pasta.mkdir(parents=True, exist_ok=True)
+            nome = hashlib.sha256(parte[HASH].to_numpy().tobytes()).hexdigest()[:16]
+            parte.rename_axis(ID).reset_index().to_parquet(pasta / f"{nome}.parquet", index=False)
+        self.chaves.update(ab[HASH].tolist())
+        novas = self._consolidar(ab)
+        return (novas if dados.empty else pd.concat([dados, novas])), novas
+
+    def ingest(self, abast=None, frota=None, opm=None):
+        # Recebe o conteúdo (bytes) das planilhas; devolve as linhas novas do consolidado
+        quadros, digests = {}, {}
+        for arg, tipo, conteudo in (("abast", "abastecimentos", abast), ("frota", "frota", frota), ("opm", "opm", opm)):
+            if conteudo is None:
+                continue
+            digest = hashlib.sha256(conteudo).hexdigest()
+            if digest in self.manifesto["uploads"]:
+                continue
+            quadros[arg] = pd.read_excel(io.BytesIO(conteudo))
+            digests[tipo] = digest
+        if not quadros:
+            return pd.DataFrame()
+        return self.ingest_frames(digests=digests, **quadros)
+
+    def ingest_frames(self, abast=None, frota=None, opm=None, digests=None):
+        # Mesma ingestão a partir de quadros já carregados (digests: tipo -> hash da origem)
+        digests = dict(digests or {})
+        for tipo, df in (("abastecimentos", abast), ("frota", frota), ("opm", opm)):
+            if df is not None and tipo not in digests:
+                digests[tipo] = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+        novas = pd.DataFrame()
+        with self._lock:
+            dados = self.dados
+            alteradas = set()
+            for tipo, df, leitor in (("frota", frota, self._ingest_frota), ("opm", opm, self._ingest_opm)):
+                if df is None or digests[tipo] in self.manifesto["uploads"]:
+                    continue
+                placas = leitor(df)
+                alteradas |= placas
+                self._registrar(tipo, digests[tipo], len(placas))
+            dados = self._atualizar_placas(dados, alteradas)
+            if abast is not None and digests["abastecimentos"] not in self.manifesto["uploads"]:
+                dados, novas = self._ingest_abast(dados, abast)
+                self._registrar("abastecimentos", digests["abastecimentos"], len(novas))
+            if alteradas:
+                self._alteracoes.append((self.manifesto["versao"], frozenset(alteradas)))
+            self._estado = (self.manifesto["versao"], dados)
+        return novas
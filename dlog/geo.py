@@ -0,0 +1,52 @@
+# ---------- Camada geoespacial pré-agregada (mapa do Dashboard) ----------
+# O consumo do período vem do cubo diário por OPM (dlog/rollup.py) e é posicionado nas
+# coordenadas da OPM ou somado numa grade fixa. Ao navegador só vão as colunas
+# lon/lat/weight, com no máximo um ponto por OPM (ou por célula), qualquer que seja o
+# número de abastecimentos.
+import numpy as np
+import pandas as pd
+
+# Estilos do mapa base: Carto não exige token; None desenha só a camada (uso offline)
+MAPAS_BASE = {
+    'Carto (online)': ('carto', 'light'),
+    'Sem mapa base (offline)': (None, None),
+}
+
+
+def coordenadas_opm(df):
+    cols = ['OPM', 'Latitude', 'Longitude']
+    if not set(cols) <= set(df.columns):
+        return pd.DataFrame(columns=cols)
+    coords = df[cols].dropna().drop_duplicates('OPM')
+    return coords.reset_index(drop=True)
+
+def pontos_opm(por_opm, coords, medida='Litros'):
+    # por_opm: saída de DailyRollup.por_opm; medida 'Litros' soma os combustíveis
+    tab = por_opm.merge(coords, on='OPM', how='inner')
+    if medida == 'Litros':
+        peso = tab[[c for c in tab.columns if c.endswith('(Lts)')]].sum(axis=1)
+    else:
+        peso = tab[medida]
+    pontos = pd.DataFrame({
+        'lon': tab['Longitude'].astype(float),
+        'lat': tab['Latitude'].astype(float),
+        'weight': peso.astype(float),
+    })
+    return pontos[pontos['weight'] > 0].reset_index(drop=True)
+
+def grade(pontos, tamanho=0.1):
+    # Soma os pesos numa grade regular de `tamanho` graus (centro da célula)
+    if pontos.empty:
+        return pontos
+    cel_lon = np.floor(pontos['lon'] / tamanho).astype(int)
+    cel_lat = np.floor(pontos['lat'] / tamanho).astype(int)
+    tab = pontos.groupby([cel_lon, cel_lat])['weight'].sum()
+    lon = (tab.index.get_level_values(0).to_numpy() + 0.5) * tamanho
+    lat = (tab.index.get_level_values(1).to_numpy() + 0.5) * tamanho
+    return pd.DataFrame({'lon': lon, 'lat': lat, 'weight': tab.to_numpy()})
+
+def centro(pontos):
+    if pontos.empty or pontos['weight'].sum() <= 0:
+        return -9.65, -36.7   # Maceió
+    w = pontos['weight']
+    return float(np.average(pontos['lat'], weights=w)), float(np.average(pontos['lon'], weights=w))
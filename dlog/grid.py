@@ -0,0 +1,89 @@
+# ---------- Grade detalhada paginada no servidor (streamlit-aggrid) ----------
+# Filtro e ordenação rodam no pandas sobre as colunas originais (numéricas continuam
+# numéricas): busca de texto nas colunas de texto e faixa mín./máx. nas numéricas. Só a
+# página visível é formatada e enviada ao navegador.
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+
+from dlog.memory import como_texto
+from dlog.normalize import truncar_series
+
+SEM_ORDEM = '(ordem original)'
+
+
+def formato_numero(s):
+    return truncar_series(s).map(lambda x: f"{x:,.2f}")
+
+def _contains(s, termo):
+    # Busca só nos valores distintos e volta aos registros pelos códigos
+    codes, uniques = pd.factorize(s)
+    achou = pd.Index(uniques).astype(str).str.contains(termo, case=False, regex=False)
+    return np.append(np.asarray(achou, dtype=bool), False)[codes]
+
+def _linhas(df, busca, ordenar, desc, faixas=None):
+    mask = np.ones(len(df), dtype=bool)
+    if busca:
+        achou = np.zeros(len(df), dtype=bool)
+        for col in df.columns:
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                achou |= _contains(df[col], busca)
+        mask &= achou
+    # faixas: {coluna numérica: (mínimo, máximo)}, None = sem limite; NaN fica de fora
+    for col, (minimo, maximo) in (faixas or {}).items():
+        valores = df[col].to_numpy(dtype=float, na_value=np.nan)
+        if minimo is not None:
+            mask &= valores >= minimo
+        if maximo is not None:
+            mask &= valores <= maximo
+    linhas = np.flatnonzero(mask)
+    if ordenar != SEM_ORDEM:
+        valores = df[ordenar].to_numpy()[linhas]
+        ordem = pd.Series(valores).sort_values(ascending=not desc, kind='stable', na_position='last').index
+        linhas = linhas[ordem.to_numpy()]
+    return linhas
+
+def paginated_grid(df, key, colunas, chave_dados, formatos=None, tamanho_pagina=50, height=500):
+    # chave_dados identifica o conteúdo de df (ex.: versão do snapshot + pipeline.selecao)
+    formatos = formatos or {}
+    rotulos = {orig: rotulo for orig, rotulo in colunas.items()}
+    c = st.columns([3, 1, 3, 1])
+    ordenar = c[0].selectbox('Ordenar por', [SEM_ORDEM] + list(colunas), key=f'{key}_ordenar',
+                             format_func=lambda col: rotulos.get(col, col))
+    desc = c[1].checkbox('Decrescente', value=True, key=f'{key}_desc')
+    busca = c[2].text_input('Filtrar', key=f'{key}_busca').strip()
+
+    faixas = {}
+    numericas = [col for col in colunas if pd.api.types.is_numeric_dtype(df[col])]
+    if numericas:
+        cf = st.columns(2 * len(numericas))
+        for k, col in enumerate(numericas):
+            minimo = cf[2 * k].number_input(f'{rotulos[col]} mín.', value=None, key=f'{key}_{col}_min')
+            maximo = cf[2 * k + 1].number_input(f'{rotulos[col]} máx.', value=None, key=f'{key}_{col}_max')
+            if minimo is not None or maximo is not None:
+                faixas[col] = (minimo, maximo)
+
+    # Índice de linhas (filtro + ordem) memorizado na sessão enquanto nada mudar
+    chave = (chave_dados, busca, tuple(faixas.items()), ordenar, desc)
+    memo = st.session_state.get(f'{key}_linhas')
+    if memo is None or memo[0] != chave:
+        memo = (chave, _linhas(df[list(colunas)], busca, ordenar, desc, faixas))
+        st.session_state[f'{key}_linhas'] = memo
+    linhas = memo[1]
+
+    n_paginas = max(1, math.ceil(len(linhas) / tamanho_pagina))
+    pagina = c[3].number_input('Página', min_value=1, max_value=n_paginas, value=1, step=1, key=f'{key}_pagina')
+    pagina = min(int(pagina), n_paginas)
+    inicio = (pagina - 1) * tamanho_pagina
+    view = df.iloc[linhas[inicio:inicio + tamanho_pagina]][list(colunas)].apply(como_texto)
+    for col, fmt in formatos.items():
+        view[col] = fmt(view[col])
+    view = view.rename(columns=rotulos).fillna('NÃO LOCALIZADO').reset_index(drop=True)
+
+    gb = GridOptionsBuilder.from_dataframe(view)
+    gb.configure_default_column(sortable=False, filter=False, resizable=True)
+    AgGrid(view, gridOptions=gb.build(), height=height, update_mode=GridUpdateMode.NO_UPDATE, key=f'{key}_grid')
+    st.caption(f'{len(linhas):,} registros · página {pagina} de {n_paginas}')
@@ -0,0 +1,234 @@
+# ---------- Histórico de versões do efetivo e da frota (viagem no tempo) ----------
+# Cada versão nova de uma planilha (sha256 do snapshot, ver dlog/snapshot.py) entra no
+# histórico só com o que mudou em relação à anterior: linhas incluídas, excluídas e
+# alteradas, identificadas pela chave (NOME/N GUERRA no efetivo, PLACA na frota) e por um
+# hash de cada linha. O estado completo mais recente fica num checkpoint para comparar a
+# próxima versão sem reconstruir nada. Diferenças entre duas versões quaisquer só olham
+# as chaves tocadas pelos deltas do intervalo. A versão atual do snapshot entra por um passo
+# explícito, pipeline.registrar_historico (boot, materialização e painel de histórico).
+#
+# Pasta: SNAPSHOT_DIR/historico/<nome>/  (manifest.json, atual.parquet, v00001.parquet, ...)
+# Versões antigas podem ser importadas depois (a cadeia de deltas é refeita na ordem das datas):
+#   python -m dlog.history <efetivo|frota> <planilha.xlsx> --data AAAA-MM-DD
+import argparse
+import json
+import threading
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from dlog.snapshot import SNAPSHOT_DIR, file_hash
+
+PASTA = SNAPSHOT_DIR / "historico"
+CHAVE = "_chave"
+HASH = "_hash"
+OP = "_op"
+
+# nome: colunas-chave (a primeira não vazia), colunas ignoradas no hash, campos acompanhados
+CONFIG = {
+    "efetivo": {"chave": ["NOME", "N GUERRA"], "ignorar": ["ORD."],
+                "campos": ["SETOR", "LOTAÇÃO", "P/G", "QUADRO"]},
+    "frota": {"chave": ["PLACA"], "ignorar": ["IDADE_FROTA", "CUSTO_COMBUSTIVEL_TOTAL"],
+              "campos": ["OPM", "Frota", "PADRAO", "CARACTERIZACAO", "LOCADORA"]},
+}
+
+
+def _naive(data):
+    data = pd.Timestamp(data)
+    return data.tz_localize(None) if data.tz is not None else data
+
+def _preparar(df, config):
+    df = df.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    df = df.drop(columns=[c for c in df.columns if c in config["ignorar"] or c.startswith("Unnamed")])
+    df = df.astype(object).where(df.notna(), "").astype(str).apply(lambda s: s.str.strip())
+    chave = pd.Series("", index=df.index)
+    for col in config["chave"]:
+        if col in df.columns:
+            chave = chave.where(chave != "", df[col].str.upper())
+    df.insert(0, CHAVE, chave)
+    df = df[df[CHAVE] != ""].drop_duplicates(CHAVE)
+    return _com_hash(df.set_index(CHAVE))
+
+def _com_hash(df):
+    df = df.drop(columns=[HASH], errors="ignore")
+    return df.assign(**{HASH: pd.util.hash_pandas_object(df, index=False).to_numpy()})
+
+
+class Historico:
+    def __init__(self, nome, pasta=None):
+        self.nome = nome
+        self.config = CONFIG[nome]
+        self.pasta = Path(pasta) if pasta else PASTA / nome
+        self._lock = threading.Lock()
+        self.versoes = []
+        self._mtime = None
+        self._estados = {}
+        self.recarregar()
+
+    def recarregar(self):
+        # Outro processo (ex.: importação pela linha de comando) pode ter registrado versões
+        path = self.pasta / "manifest.json"
+        mtime = path.stat().st_mtime_ns if path.exists() else None
+        if mtime != self._mtime:
+            self.versoes = json.loads(path.read_text(encoding="utf-8"))["versoes"] if mtime else []
+            self._mtime = mtime
+            self._estados.clear()
+        return self.versoes
+
+    # ---------- gravação ----------
+    def registrar(self, df, sha256=None, data=None):
+        # Devolve o número da versão (a existente, se o conteúdo já foi registrado)
+        sha256 = sha256 or file_hash(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        data = pd.Timestamp(data) if data is not None else pd.Timestamp.now(tz="America/Maceio")
+        with self._lock:
+            self.recarregar()
+            for v in self.versoes:
+                if v["sha256"] == sha256:
+                    return v["versao"]
+            novo = _preparar(df, self.config)
+            meta = {"sha256": sha256, "data": data.isoformat()}
+            if self.versoes and _naive(data) < _naive(self.versoes[-1]["data"]):
+                # Versão antiga importada depois: refaz a cadeia de deltas na ordem das datas
+                estados = [(v, _com_hash(self.estado(v["versao"]))) for v in self.versoes]
+                estados.append((meta, novo))
+                estados.sort(key=lambda par: _naive(par[0]["data"]))
+                self.versoes, atual = [], None
+                for v, estado in estados:
+                    self._anexar(v, estado, atual)
+                    atual = estado
+                self._estados.clear()
+            else:
+                self._anexar(meta, novo, self._ler("atual.parquet"))
+                atual = novo
+            self._gravar("atual.parquet", atual)
+            tmp = self.pasta / "manifest.json.tmp"
+            tmp.write_text(json.dumps({"nome": self.nome, "versoes": self.versoes}, indent=2, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.pasta / "manifest.json")
+            self._mtime = (self.pasta / "manifest.json").stat().st_mtime_ns
+            return next(v["versao"] for v in self.versoes if v["sha256"] == sha256)
+
+    def _anexar(self, meta, novo, atual):
+        # Grava o delta de `novo` em relação a `atual` como a próxima versão
+        if atual is None:
+            incluidas, excluidas, alteradas = novo.index, pd.Index([]), pd.Index([])
+        else:
+            comuns = novo.index.intersection(atual.index)
+            incluidas = novo.index.difference(atual.index)
+            excluidas = atual.index.difference(novo.index)
+            alteradas = comuns[novo.loc[comuns, HASH].to_numpy() != atual.loc[comuns, HASH].to_numpy()]
+        delta = pd.concat([
+            novo.loc[incluidas].assign(**{OP: "+"}),
+            novo.loc[alteradas].assign(**{OP: "~"}),
+            pd.DataFrame({OP: "-"}, index=excluidas),
+        ]).drop(columns=[HASH])
+        delta.index.name = CHAVE
+        numero = len(self.versoes) + 1
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self._gravar(f"v{numero:05d}.parquet", delta)
+        self.versoes.append({
+            "versao": numero, "sha256": meta["sha256"], "data": meta["data"],
+            "linhas": int(len(novo)), "incluidas": int(len(incluidas)),
+            "excluidas": int(len(excluidas)), "alteradas": int(len(alteradas)),
+        })
+
+    def _gravar(self, arquivo, df):
+        tmp = self.pasta / (arquivo + ".tmp")
+        df.to_parquet(tmp)
+        tmp.replace(self.pasta / arquivo)
+
+    def _ler(self, arquivo):
+        path = self.pasta / arquivo
+        return pd.read_parquet(path) if path.exists() else None
+
+    # ---------- leitura ----------
+    def _delta(self, numero):
+        return self._ler(f"v{numero:05d}.parquet")
+
+    def estado(self, numero):
+        # Estado completo na versão `numero`: última operação de cada chave até ela
+        if numero not in self._estados:
+            deltas = [self._delta(n) for n in range(1, numero + 1)]
+            todos = pd.concat(deltas) if deltas else pd.DataFrame(columns=[OP])
+            ultimo = todos[~todos.index.duplicated(keep="last")]
+            if len(self._estados) >= 4:
+                self._estados.pop(next(iter(self._estados)))
+            self._estados[numero] = ultimo[ultimo[OP] != "-"].drop(columns=[OP])
+        return self._estados[numero]
+
+    def versao_em(self, data):
+        # Última versão registrada até a data (None se nenhuma)
+        anteriores = [v for v in self.versoes if _naive(v["data"]) <= _naive(data)]
+        return anteriores[-1]["versao"] if anteriores else None
+
+    def diferencas(self, de, ate, campos=None):
+        # (entradas, saídas, mudanças campo a campo) entre as versões `de` e `ate`
+        campos = campos or self.config["campos"]
+        if de == ate:
+            vazio = pd.DataFrame(columns=["Chave", "Campo", "Antes", "Depois"])
+            return pd.Index([]), pd.Index([]), vazio
+        a, b = sorted((de, ate))
+        tocadas = pd.Index(pd.concat([self._delta(n) for n in range(a + 1, b + 1)]).index.unique())
+        antes = self.estado(de).reindex(tocadas.intersection(self.estado(de).index))
+        depois = self.estado(ate).reindex(tocadas.intersection(self.estado(ate).index))
+        entradas = depois.index.difference(antes.index)
+        saidas = antes.index.difference(depois.index)
+        comuns = antes.index.intersection(depois.index)
+        mudancas = []
+        for campo in campos:
+            if campo not in antes.columns or campo not in depois.columns:
+                continue
+            x, y = antes.loc[comuns, campo].fillna(""), depois.loc[comuns, campo].fillna("")
+            mudou = comuns[x.to_numpy() != y.to_numpy()]
+            mudancas.append(pd.DataFrame({"Chave": mudou, "Campo": campo,
+                                          "Antes": x.loc[mudou].to_numpy(), "Depois": y.loc[mudou].to_numpy()}))
+        mudancas = pd.concat(mudancas, ignore_index=True) if mudancas else pd.DataFrame(columns=["Chave", "Campo", "Antes", "Depois"])
+        return entradas, saidas, mudancas.sort_values(["Campo", "Chave"], ignore_index=True)
+
+
+# ---------- Visão de histórico (páginas Efetivo e Viaturas) ----------
+def painel(hist, rotulo_chave, key):
+    if len(hist.recarregar()) < 2:
+        st.info("Só há uma versão registrada desta planilha; as diferenças aparecem a partir da próxima.")
+        return
+    rotulos = {v["versao"]: f"v{v['versao']} · {pd.Timestamp(v['data']).strftime('%d/%m/%Y %H:%M')} ({v['linhas']:,} linhas)"
+               for v in hist.versoes}
+    numeros = list(rotulos)
+    c1, c2 = st.columns(2)
+    de = c1.selectbox("De", numeros, index=len(numeros) - 2, format_func=rotulos.get, key=f"{key}_de")
+    ate = c2.selectbox("Até", numeros, index=len(numeros) - 1, format_func=rotulos.get, key=f"{key}_ate")
+    entradas, saidas, mudancas = hist.diferencas(de, ate)
+    c = st.columns(2 + len(hist.config["campos"]))
+    c[0].metric("Entradas", f"{len(entradas):,}")
+    c[1].metric("Saídas", f"{len(saidas):,}")
+    for col, campo in zip(c[2:], hist.config["campos"]):
+        col.metric(f"Mudaram {campo}", f"{int((mudancas['Campo'] == campo).sum()):,}")
+    st.dataframe(mudancas.rename(columns={"Chave": rotulo_chave}), use_container_width=True, hide_index=True)
+    if len(entradas) or len(saidas):
+        with st.expander("Entradas e saídas"):
+            st.dataframe(pd.DataFrame({rotulo_chave: list(entradas) + list(saidas),
+                                       "Situação": ["Entrada"] * len(entradas) + ["Saída"] * len(saidas)}),
+                         use_container_width=True, hide_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa uma versão antiga de planilha para o histórico")
+    parser.add_argument("nome", choices=list(CONFIG))
+    parser.add_argument("planilha")
+    parser.add_argument("--data", required=True, help="data da versão (AAAA-MM-DD)")
+    args = parser.parse_args(argv)
+    from dlog import pipeline
+
+    data = Path(args.planilha).read_bytes()
+    df = pd.read_excel(args.planilha, dtype=str if args.nome == "efetivo" else None)
+    if args.nome == "frota":
+        df = pipeline.normalizar_frota(df)
+    hist = Historico(args.nome)
+    numero = hist.registrar(df, file_hash(data), args.data)
+    v = hist.versoes[numero - 1]
+    print(f"{args.nome}: versão {numero} ({v['data']})  +{v['incluidas']} -{v['excluidas']} ~{v['alteradas']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# ---------- Materialização offline das tabelas-resumo ----------
+# Roda fora do Streamlit: carrega as fontes (snapshot Parquet, ver dlog/snapshot.py), aplica
+# a mesma normalização e agregação das páginas e grava cada tabela-resumo em Parquet numa
+# pasta versionada: MATERIALIZADO_DIR/<conjunto>/<versão das fontes>/. Os conjuntos
+# independentes (viaturas, efetivo, combustível) rodam em paralelo num pool de processos.
+# As visões padrão da página Viaturas passam a ser lidas daqui quando existem (pipeline.view).
+#
+# Uso em linha de comando:  python -m dlog.materialize [--processos N] [--manter N] [conjunto ...]
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from dlog.snapshot import SNAPSHOT_DIR
+
+PASTA = Path(os.environ.get("DLOG_MATERIALIZADO_DIR", SNAPSHOT_DIR / "materializado"))
+MANIFESTO = "manifest.json"
+MANTER = 3
+
+
+def pasta(conjunto, versao):
+    return PASTA / conjunto / str(versao)
+
+def tabelas(conjunto, versao):
+    # {nome: {"arquivo", "linhas"} ou None (tabela vazia)}; {} quando a versão não foi materializada
+    path = pasta(conjunto, versao) / MANIFESTO
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))["tabelas"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+def ler(conjunto, versao, nome):
+    item = tabelas(conjunto, versao)[nome]
+    return None if item is None else pd.read_parquet(pasta(conjunto, versao) / item["arquivo"])
+
+def gravar(conjunto, versao, resultado, fontes=()):
+    # Escreve numa pasta temporária e troca de uma vez: leitores nunca veem versão pela metade
+    destino = pasta(conjunto, versao)
+    tmp = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    itens = {}
+    for nome, df in resultado.items():
+        if df is None:
+            itens[nome] = None
+            continue
+        df = df.copy()
+        df.columns = pd.Index([str(c) for c in df.columns], name=df.columns.name)
+        df.to_parquet(tmp / f"{nome}.parquet")
+        itens[nome] = {"arquivo": f"{nome}.parquet", "linhas": int(len(df))}
+    (tmp / MANIFESTO).write_text(json.dumps({
+        "conjunto": conjunto, "versao": str(versao), "fontes": list(fontes),
+        "gerado_em": pd.Timestamp.now(tz="America/Maceio").isoformat(), "tabelas": itens,
+    }, indent=2, ensure_ascii=False), encoding="utf-8")
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(tmp, destino)
+    return destino
+
+def podar(conjunto, manter=MANTER):
+    # Mantém só as `manter` versões mais recentes de cada conjunto
+    base = PASTA / conjunto
+    if not base.exists():
+        return
+    versoes = sorted((p for p in base.iterdir() if p.is_dir() and not p.name.endswith(".tmp")),
+                     key=lambda p: p.stat().st_mtime, reverse=True)
+    for antiga in versoes[manter:]:
+        shutil.rmtree(antiga, ignore_errors=True)
+
+
+# ---------- Conjuntos ----------
+def _viaturas():
+    from dlog import pipeline, snapshot
+
+    pipeline.LER_MATERIALIZADO = False
+    versao = snapshot.version(*pipeline.FONTES_VIATURAS)
+    resultado = {nome: pipeline.view(nome, versao) for nome in pipeline.VISOES}
+    resultado['conciliacao_placas'] = pipeline.conciliacao(versao)
+    return versao, pipeline.FONTES_VIATURAS, resultado
+
+def _efetivo():
+    from dlog import pipeline, snapshot
+
+    versao = snapshot.version(*pipeline.FONTES_EFETIVO)
+    modelo = pipeline.roster(versao)
+    resultado = {
+        'por_graduacao': modelo.por_graduacao() if modelo.cubo is not None else None,
+        'por_setor': modelo.por_setor() if modelo.cubo_unicos is not None else None,
+        'grad_setor': modelo.tabela_grad_setor() if modelo.cubo is not None else None,
+        'outros_setores': modelo.outros[[c for c in ["NOME", "P/G", "SETOR", "LOTAÇÃO"] if c in modelo.outros.columns]],
+    }
+    return versao, pipeline.FONTES_EFETIVO, resultado
+
+def _combustivel():
+    # Base incremental do Dashboard (dlog/fuel_store.py): período inteiro, todas as OPMs
+    from dlog.fuel_store import FuelStore
+    from dlog.rollup import DailyRollup
+
+    versao, dados = FuelStore().estado()
+    if dados.empty:
+        return versao, (), {}
+    cubo = DailyRollup(dados)
+    ini, fim = dados['Data'].min(), dados['Data'].max()
+    resultado = {
+        'mensal': cubo.mensal(ini, fim),
+        'por_opm': cubo.por_opm(ini, fim),
+        'totais': cubo.totais(ini, fim).rename_axis('Medida').reset_index(name='Total'),
+    }
+    return versao, ("combustivel",), resultado
+
+CONJUNTOS = {"viaturas": _viaturas, "efetivo": _efetivo, "combustivel": _combustivel}
+
+
+def materializar(conjunto, manter=MANTER):
+    t0 = time.perf_counter()
+    versao, fontes, resultado = CONJUNTOS[conjunto]()
+    if not resultado:
+        return conjunto, versao, None, 0, round((time.perf_counter() - t0) * 1000)
+    destino = gravar(conjunto, versao, resultado, list(fontes))
+    podar(conjunto, manter)
+    return conjunto, versao, destino, len(resultado), round((time.perf_counter() - t0) * 1000)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Materializa as tabelas-resumo das páginas")
+    parser.add_argument("conjuntos", nargs="*", help=f"padrão: todos ({', '.join(CONJUNTOS)})")
+    parser.add_argument("--processos", type=int, default=None, help="padrão: um por conjunto")
+    parser.add_argument("--manter", type=int, default=MANTER, help="versões guardadas por conjunto")
+    args = parser.parse_args(argv)
+    conjuntos = args.conjuntos or list(CONJUNTOS)
+    desconhecidos = set(conjuntos) - set(CONJUNTOS)
+    if desconhecidos:
+        parser.error(f"conjunto desconhecido: {', '.join(sorted(desconhecidos))}")
+
+    # As fontes (e o histórico do efetivo e da frota) são atualizadas antes, num processo só:
+    # os manifestos do snapshot e do histórico não são protegidos entre processos
+    from dlog import pipeline, snapshot
+    for nome in snapshot.SOURCES:
+        snapshot.ingest(nome)
+    for nome in pipeline.HISTORICOS:
+        pipeline.registrar_historico(nome)
+
+    falhas = 0
+    with ProcessPoolExecutor(max_workers=args.processos or len(conjuntos)) as pool:
+        jobs = {pool.submit(materializar, c, args.manter): c for c in conjuntos}
+        for job in as_completed(jobs):
+            try:
+                conjunto, versao, destino, n, ms = job.result()
+            except Exception as e:
+                falhas += 1
+                print(f"{jobs[job]:<12} ERRO: {e!r}", file=sys.stderr)
+                continue
+            if destino is None:
+                print(f"{conjunto:<12} sem dados ({ms} ms)")
+            else:
+                print(f"{conjunto:<12} {n:>3} tabelas  versão {versao}  {ms:>6} ms  {destino}")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
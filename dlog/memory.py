@@ -0,0 +1,66 @@
+# ---------- Tipos compactos e orçamento de memória dos conjuntos de referência ----------
+# Os quadros de referência (viaturas, efetivo) ficam uma vez por processo em
+# st.cache_resource e são compartilhados por todas as sessões: as páginas só leem,
+# nunca alteram no lugar. compactar() converte colunas repetitivas em categóricas e
+# números descritivos em float32; registrar() guarda uma referência fraca a cada
+# conjunto para o relatório de memória do painel de diagnóstico.
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+_lock = threading.Lock()
+_registro = {}
+
+
+def compactar(df, categorias=(), float32=()):
+    df = df.copy()
+    for col in categorias:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    for col in float32:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(np.float32)
+    return df
+
+def como_texto(s):
+    # Coluna categórica -> texto, para preencher ausentes com rótulos novos ("N/D" etc.)
+    return s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s
+
+def registrar(nome, df):
+    with _lock:
+        _registro[nome] = weakref.ref(df)
+    return df
+
+def uso_colunas(df):
+    uso = df.memory_usage(deep=True, index=False)
+    return pd.DataFrame({
+        "coluna": [str(c) for c in df.columns],
+        "tipo": [str(t) for t in df.dtypes],
+        "MB": (uso.to_numpy() / 2**20).round(3),
+    })
+
+def relatorio():
+    # Custo de cada conjunto registrado ainda vivo (linhas, colunas, MB em memória)
+    with _lock:
+        vivos = [(nome, ref()) for nome, ref in _registro.items()]
+    linhas = []
+    for nome, df in vivos:
+        if df is None:
+            continue
+        por_tipo = df.memory_usage(deep=True, index=False).groupby(df.dtypes.astype(str).to_numpy()).sum()
+        linhas.append({
+            "conjunto": nome,
+            "linhas": len(df),
+            "colunas": df.shape[1],
+            "MB": round(df.memory_usage(deep=True).sum() / 2**20, 3),
+            "MB categóricas": round(por_tipo.get("category", 0) / 2**20, 3),
+            "MB texto": round(sum(v for k, v in por_tipo.items() if k in ("object", "str", "string")) / 2**20, 3),
+        })
+    return pd.DataFrame(linhas, columns=["conjunto", "linhas", "colunas", "MB", "MB categóricas", "MB texto"])
+
+def conjuntos():
+    with _lock:
+        vivos = [(nome, ref()) for nome, ref in _registro.items()]
+    return {nome: df for nome, df in vivos if df is not None}
@@ -0,0 +1,74 @@
+# ---------- Normalização de OPMs, placas e valores monetários ----------
+# Versões escalares (usadas em valores isolados) e vetorizadas (usadas nas colunas).
+import math
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_text(s):
+    if pd.isna(s): return s
+    nk = unicodedata.normalize('NFKD', str(s))
+    return ''.join(c for c in nk if not unicodedata.combining(c))
+
+def unify_opm(name):
+    if pd.isna(name): return name
+    raw = normalize_text(name)
+    raw = re.sub(r'(?<=\d)[A-Za-zºª°]+', '', raw)
+    raw = re.sub(r'(\d+)\W*CPM\W*I', lambda m: f"{int(m.group(1))} CPMI", raw, flags=re.IGNORECASE)
+    raw = re.sub(r'(\d+)\W*BPM', lambda m: f"{int(m.group(1))} BPM", raw, flags=re.IGNORECASE)
+    raw = re.sub(r'(\d+)\W*SECAO\W*EMG', lambda m: f"{int(m.group(1))} SECAO EMG", raw, flags=re.IGNORECASE)
+    raw = raw.replace('/', ' ')
+    raw = re.sub(r'[^A-Za-z0-9 ]', ' ', raw)
+    s = ' '.join(raw.split()).upper()
+    return s
+
+def clean_plate(x):
+    return str(x).upper().replace('-', '').replace(' ', '')
+
+def parse_currency(x):
+    if pd.isna(x): return 0.0
+    if isinstance(x, (int, float)): return float(x)
+    s = re.sub(r'[^0-9,\.]', '', str(x))
+    if s.count(',') and s.count('.'):
+        s = s.replace('.', '').replace(',', '.')
+    else:
+        s = s.replace(',', '.')
+    try: return float(s)
+    except: return 0.0
+
+def truncar(x, casas=2):
+    try:
+        f = 10 ** casas
+        return math.floor(float(x) * f) / f
+    except:
+        return x
+
+
+# ---------- Versões vetorizadas ----------
+def map_distinct(s, func):
+    # Aplica func só aos valores distintos e devolve o resultado pelos códigos (lookup categórico)
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    lookup = np.array([func(u) for u in uniques] + [np.nan], dtype=object)
+    return pd.Series(lookup[codes], index=s.index, name=s.name)
+
+def unify_opm_series(s):
+    return map_distinct(s, unify_opm)
+
+def clean_plate_series(s):
+    s = s.astype(object).where(s.notna(), 'nan').astype(str)
+    return s.str.upper().str.replace('-', '', regex=False).str.replace(' ', '', regex=False)
+
+def parse_currency_series(s):
+    num = pd.to_numeric(s, errors='coerce').astype(float)
+    texto = s[num.isna() & s.notna()].astype(str).str.replace(r'[^0-9,\.]', '', regex=True)
+    ambos = texto.str.contains(',', regex=False) & texto.str.contains('.', regex=False)
+    texto = texto.where(~ambos, texto.str.replace('.', '', regex=False)).str.replace(',', '.', regex=False)
+    num.loc[texto.index] = pd.to_numeric(texto, errors='coerce')
+    return num.fillna(0.0)
+
+def truncar_series(s, casas=2):
+    f = 10 ** casas
+    return np.floor(pd.to_numeric(s, errors='coerce').astype(float) * f) / f
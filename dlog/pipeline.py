@@ -0,0 +1,260 @@
+# ---------- Estágios cacheados do pipeline das páginas ----------
+# Cada estágio recebe a versão (hash do snapshot, ver dlog/snapshot.py) e roda uma única
+# vez por conteúdo de origem; os reruns das páginas recebem os quadros já normalizados.
+# Os quadros ficam uma vez por processo (cache_resource, tipos compactos; ver dlog/memory.py)
+# e são compartilhados entre sessões: as páginas não devem alterá-los no lugar. As tabelas
+# derivadas passam pelo cache de visões (dlog/views.py), aquecido em segundo plano.
+import os
+
+from dlog import charts, coverage, exports, history, materialize, memory, plates, profiling, snapshot, views
+from dlog.anomaly import AnomalyEngine
+from dlog.filters import FilterIndex
+from dlog.fuel_store import FuelStore
+from dlog.geo import grade, pontos_opm
+from dlog.rollup import DailyRollup
+from dlog.roster import Roster
+from dlog.normalize import clean_plate_series, parse_currency_series, unify_opm_series
+
+FONTES_VIATURAS = ("abastecimentos", "frota", "opm", "padroes")
+CATEGORIAS_ABAST = ['ARQUIVO','UNIDADE','COMBUSTIVEL_DOMINANTE']
+CATEGORIAS_FROTA = ['OPM','Frota','PADRAO','CARACTERIZACAO','MARCA','MODELO','OBSERVACAO','LOCADORA']
+CATEGORIAS_OPM = ['UNIDADE','TIPO_LOCAL','MUNICIPIO_REFERENCIA','MUNICIPIO']
+
+
+def normalizar_frota(df_frota):
+    df_frota['OPM'] = unify_opm_series(df_frota['OPM'])
+    df_frota['PLACA'] = clean_plate_series(df_frota['PLACA'])
+    return df_frota
+
+@profiling.cache_resource(show_spinner=False)
+def historico(nome):
+    # Histórico de versões da planilha (dlog/history.py), um por processo
+    return history.Historico(nome)
+
+# Tabela do snapshot no formato em que o histórico a compara
+HISTORICOS = {
+    "frota": lambda: normalizar_frota(snapshot.load_table("frota")),
+    "efetivo": lambda: snapshot.load_table("efetivo").fillna(""),
+}
+
+def registrar_historico(nome):
+    # Passo explícito (boot, materialização e painel de histórico): registra a versão atual
+    # do snapshot se ela ainda não estiver no histórico. Os loaders cacheados não gravam nada.
+    hist = historico(nome)
+    sha256 = snapshot.ingest(nome)["sha256"]
+    for v in hist.recarregar():
+        if v["sha256"] == sha256:
+            return v["versao"]
+    with profiling.etapa(f"histórico {nome}"):
+        return hist.registrar(HISTORICOS[nome](), sha256)
+
+
+@profiling.cache_resource(show_spinner=False)
+def load_viaturas(versao):
+    with profiling.etapa("leitura parquet"):
+        df_abast = snapshot.load_table("abastecimentos")
+        df_frota = snapshot.load_table("frota")
+        df_opm = snapshot.load_table("opm")
+        df_padroes = snapshot.load_table("padroes")
+
+    # ---------- Ajuste colunas df_opm ----------
+    df_opm = df_opm.rename(columns={'MUNICÍPIO':'MUNICIPIO', 'MUNICÍPIO_REFERÊNCIA':'MUNICIPIO_REFERENCIA'})
+
+    # ---------- OPMs e placas ----------
+    with profiling.etapa("normalização"):
+        df_abast['UNIDADE'] = unify_opm_series(df_abast['UNIDADE'])
+        df_abast['PLACA'] = clean_plate_series(df_abast['PLACA'])
+        df_frota = normalizar_frota(df_frota)
+
+    # ---------- Padrões de locação ----------
+    idc, valc = df_padroes.columns[0], df_padroes.columns[1]
+    df_padroes = df_padroes.rename(columns={idc:'PADRAO', valc:'CUSTO_LOCACAO_PADRAO'})
+    df_padroes['CUSTO_LOCACAO_PADRAO'] = parse_currency_series(df_padroes['CUSTO_LOCACAO_PADRAO'])
+    df_frota = df_frota.merge(df_padroes[['PADRAO','CUSTO_LOCACAO_PADRAO']], on='PADRAO', how='left')
+    mask_loc = df_frota['Frota'].str.upper()=='LOCADO'
+    df_frota['CUSTO_PADRAO_MENSAL'] = 0.0
+    df_frota.loc[mask_loc,'CUSTO_PADRAO_MENSAL'] = df_frota.loc[mask_loc,'CUSTO_LOCACAO_PADRAO']
+    df_frota = df_frota.drop(columns=['CUSTO_LOCACAO_PADRAO'])
+
+    # ---------- Tipos compactos (litros/valor seguem float64: a página trunca em centavos) ----------
+    with profiling.etapa("tipos compactos"):
+        df_abast = memory.compactar(df_abast, CATEGORIAS_ABAST)
+        df_frota = memory.compactar(df_frota, CATEGORIAS_FROTA, float32=['ANO_FABRICACAO','IDADE_FROTA'])
+        df_opm = memory.compactar(df_opm, CATEGORIAS_OPM, float32=['POP_2022','AREA_KM2'])
+    memory.registrar("viaturas: abastecimentos", df_abast)
+    memory.registrar("viaturas: frota", df_frota)
+    memory.registrar("viaturas: opm", df_opm)
+    return df_abast, df_frota, df_opm
+
+
+@profiling.cache_resource(show_spinner=False)
+def conciliacao(versao):
+    # Relatório placa a placa (exata / Mercosul / aproximada / ambígua / sem correspondência)
+    df_abast, df_frota, _ = load_viaturas(versao)
+    with profiling.etapa("conciliação de placas"):
+        return plates.Conciliador(df_frota['PLACA']).conciliar(df_abast['PLACA'])
+
+
+@profiling.cache_resource(show_spinner=False)
+def filter_index(versao):
+    # Compartilhado entre sessões; os quadros devolvidos não devem ser alterados pelas páginas
+    df_abast, df_frota, _ = load_viaturas(versao)
+    # Abastecimentos conciliados passam a usar a placa do cadastro no merge com a frota
+    df_abast = plates.aplicar(df_abast, conciliacao(versao))
+    with profiling.etapa("merge frota + índice"):
+        indice = FilterIndex(df_abast, df_frota)
+    indice.select(indice.options('UNIDADE'), indice.options('COMBUSTIVEL_DOMINANTE'))
+    return indice
+
+
+@profiling.cache_resource(show_spinner=False)
+def cobertura(versao):
+    # OPM -> municípios do interior / bairros de Maceió, uma vez por snapshot
+    _, _, df_opm = load_viaturas(versao)
+    with profiling.etapa("índice de cobertura"):
+        return coverage.Cobertura(df_opm)
+
+
+# ---------- Visões derivadas (cache entre sessões) ----------
+# nome: (depende da seleção de filtros, construtor(versão, df filtrado, cubo))
+VISOES = {
+    'consumo_unidade': (True, lambda v, df, cube: views.por_unidade(df, 'TOTAL_LITROS')),
+    'gasto_unidade': (True, lambda v, df, cube: views.por_unidade(df, 'VALOR_TOTAL')),
+    'top20_litros': (True, lambda v, df, cube: views.top20(cube, 'Litros')),
+    'top20_valor': (True, lambda v, df, cube: views.top20(cube, 'Valor')),
+    'frota_pivot': (False, lambda v, df, cube: views.pivo_frota(load_viaturas(v)[1], 'Frota')),
+    'char_pivot': (False, lambda v, df, cube: views.pivo_frota(load_viaturas(v)[1], 'CARACTERIZACAO')),
+    'resumo_opm': (False, lambda v, df, cube: views.resumo_opm(load_viaturas(v)[1], cobertura(v))),
+    'resumo_municipios': (False, lambda v, df, cube: views.resumo_municipios(view('resumo_opm', v))),
+    'resumo_bairros': (False, lambda v, df, cube: views.resumo_bairros(view('resumo_opm', v))),
+    'multiplas_opms': (True, lambda v, df, cube: views.multiplas_opms(df, cube)),
+    'ranking': (True, lambda v, df, cube: views.ranking_geral(cube)),
+}
+INTERVALO_ATUALIZACAO = int(os.environ.get("DLOG_VIEWS_INTERVALO", "60"))
+# Visões padrão já gravadas por `python -m dlog.materialize` são lidas do disco
+LER_MATERIALIZADO = os.environ.get("DLOG_MATERIALIZADO", "1") != "0"
+
+
+@profiling.cache_resource(show_spinner=False)
+def view_cache():
+    return views.ViewCache(
+        maxsize=int(os.environ.get("DLOG_VIEWS_MAX", "64")),
+        max_mb=int(os.environ.get("DLOG_VIEWS_MAX_MB", "256")),
+        ttl=int(os.environ.get("DLOG_VIEWS_TTL", "3600")),
+    )
+
+def selecao(versao, unidades=None, combustiveis=None):
+    # Seleção canônica (ordenada) e sua forma na chave: None quando tudo está selecionado
+    indice = filter_index(versao)
+    todas = (tuple(indice.options('UNIDADE')), tuple(indice.options('COMBUSTIVEL_DOMINANTE')))
+    sel = todas if unidades is None else (tuple(sorted(unidades)), tuple(sorted(combustiveis)))
+    return sel, None if sel == todas else sel
+
+def view(nome, versao, unidades=None, combustiveis=None):
+    # A seleção completa é a visão padrão, compartilhada por todos
+    depende, construir = VISOES[nome]
+    indice = filter_index(versao)
+    sel, chave_sel = selecao(versao, unidades, combustiveis)
+    chave = (versao, chave_sel if depende else None, nome)
+
+    def calcular():
+        if LER_MATERIALIZADO and chave[1] is None and nome in materialize.tabelas("viaturas", versao):
+            return materialize.ler("viaturas", versao, nome)
+        df, cube = indice.select(list(sel[0]), list(sel[1]))
+        return construir(versao, df, cube)
+    with profiling.etapa(f"visão {nome}"):
+        return view_cache().get(chave, calcular)
+
+
+# ---------- Figuras das visões (dlog/charts.py), no mesmo cache ----------
+# nome: (visão de origem, construtor(tabela, top)); top = N maiores + "Outros" (None: todas)
+FIGURAS = {
+    'consumo_unidade': ('consumo_unidade', lambda t, top: charts.barras_h(
+        t, 'TOTAL_LITROS', 'UNIDADE', {'TOTAL_LITROS': 'Litros', 'UNIDADE': 'Unidade'},
+        'Consumo por Unidade (Litros)', top)),
+    'gasto_unidade': ('gasto_unidade', lambda t, top: charts.barras_h(
+        t, 'VALOR_TOTAL', 'UNIDADE', {'VALOR_TOTAL': 'Valor R$', 'UNIDADE': 'Unidade'},
+        'Gasto por Unidade (R$)', top)),
+    'frota_total': ('frota_pivot', lambda t, top: charts.barras_h(
+        t.reset_index()[['OPM', 'TOTAL']].sort_values('TOTAL', ascending=False), 'TOTAL', 'OPM',
+        {'TOTAL': 'Total de Veículos', 'OPM': 'OPM'}, 'Total de Frota por OPM', top)),
+}
+
+def figura(nome, versao, unidades=None, combustiveis=None, top=None):
+    # A figura é compartilhada entre sessões: só leitura (o st.plotly_chart copia antes de enviar)
+    origem, construir = FIGURAS[nome]
+    depende = VISOES[origem][0]
+    chave_sel = selecao(versao, unidades, combustiveis)[1] if depende else None
+    chave = (versao, chave_sel, f"figura {nome}", top)
+    with profiling.etapa(f"figura {nome}"):
+        return view_cache().get(chave, lambda: construir(view(origem, versao, unidades, combustiveis), top))
+
+
+@profiling.cache_resource(show_spinner=False)
+def exportador():
+    return exports.Exportador(max_workers=int(os.environ.get("DLOG_EXPORT_WORKERS", "2")))
+
+
+FONTES_EFETIVO = ("efetivo", "funcoes")
+
+
+@profiling.cache_resource(show_spinner=False)
+def roster(versao):
+    with profiling.etapa("leitura parquet"):
+        df_efetivo = snapshot.load_table("efetivo").fillna("")
+        df_funcoes = snapshot.load_table("funcoes").fillna("")
+    modelo = Roster(df_efetivo, df_funcoes)
+    memory.registrar("efetivo: quadro", modelo.efetivo)
+    memory.registrar("efetivo: busca", modelo.resultado)
+    return modelo
+
+
+# ---------- Dashboard de combustível (base local incremental; ver dlog/fuel_store.py) ----------
+@profiling.cache_resource(show_spinner=False)
+def fuel_store():
+    return FuelStore()
+
+# Cubo diário OPM x combustível com somas acumuladas (ver dlog/rollup.py)
+@profiling.cache_resource(ttl=3600, max_entries=2, show_spinner=False)
+def rollup(chave, _df):
+    return DailyRollup(_df)
+
+# Escores de anomalia por viatura, atualizados só nas linhas novas ou alteradas (ver dlog/anomaly.py)
+@profiling.cache_resource(show_spinner=False)
+def motor_anomalias():
+    return AnomalyEngine()
+
+# Pontos do mapa agregados no servidor, cacheados por estado de filtro (ver dlog/geo.py)
+@profiling.cache_data(ttl=3600, show_spinner=False)
+def camada_mapa(chave, ini, fim, opms, agregacao, _cubo, _coords):
+    pontos = pontos_opm(_cubo.por_opm(ini, fim, list(opms)), _coords)
+    return grade(pontos) if agregacao.startswith("Grade") else pontos
+
+# Figuras prontas por (versão da base, período, OPMs); o rerun só serializa (ver dlog/charts.py)
+@profiling.cache_resource(ttl=3600, max_entries=32, show_spinner=False)
+def figura_combustivel(tipo, chave, ini, fim, opms, _cubo):
+    if tipo == "pizza":
+        totais = _cubo.totais(ini, fim, list(opms))
+        df_kpi = totais[_cubo.combustiveis].rename_axis('Combustível').reset_index(name='Litros')
+        return charts.pizza(df_kpi, 'Combustível', 'Litros')
+    return charts.linhas(_cubo.mensal(ini, fim, list(opms)), 'Data')
+
+
+# ---------- Aquecimento em segundo plano ----------
+def _versoes():
+    return snapshot.version(*FONTES_VIATURAS), snapshot.version(*FONTES_EFETIVO)
+
+def _aquecer(versoes):
+    versao_viaturas, versao_efetivo = versoes
+    for nome in VISOES:
+        view(nome, versao_viaturas)
+    for nome in FIGURAS:
+        figura(nome, versao_viaturas)
+    roster(versao_efetivo)
+
+@profiling.cache_resource(show_spinner=False)
+def atualizador():
+    # Uma thread por processo; DLOG_VIEWS_INTERVALO=0 desliga
+    if INTERVALO_ATUALIZACAO <= 0:
+        return None
+    return views.Atualizador(_versoes, _aquecer, INTERVALO_ATUALIZACAO)
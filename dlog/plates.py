@@ -0,0 +1,144 @@
+# ---------- Conciliação de placas (abastecimentos x cadastro da frota) ----------
+# A chave canônica leva placas do padrão antigo e Mercosul ao mesmo valor (ABC1234 e
+# ABC1C34 -> ABC1234: a letra da 5ª posição vira o dígito correspondente, A=0 ... J=9).
+# O casamento exato é um lookup no dicionário chave -> placa da frota; só as placas que
+# sobram consultam um índice de vizinhança por deleções das chaves da frota: duas chaves a
+# distância de edição <= d têm em comum alguma variante com até d caracteres removidos, e a
+# distância exata só é calculada para as poucas chaves que compartilham variante. Cada
+# consulta custa O(tamanho da placa) lookups, em vez de comparar com a frota inteira.
+import re
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+PADRAO_PLACA = re.compile(r'^[A-Z]{3}[0-9][A-Z0-9][0-9]{2}$')
+LETRAS_MERCOSUL = 'ABCDEFGHIJ'
+DISTANCIA_MAXIMA = 1
+SEM_PLACA = {'', 'NAN', 'NONE'}
+METODOS = ['exata', 'mercosul', 'aproximada', 'ambígua', 'sem correspondência']
+
+
+def chave_canonica(placa):
+    placa = str(placa)
+    if PADRAO_PLACA.match(placa) and placa[4] in LETRAS_MERCOSUL:
+        return placa[:4] + str(LETRAS_MERCOSUL.index(placa[4])) + placa[5:]
+    return placa
+
+def chave_canonica_series(s):
+    s = s.astype(object).astype(str)
+    mercosul = s.str.match(PADRAO_PLACA.pattern) & s.str[4].isin(list(LETRAS_MERCOSUL))
+    digito = s[mercosul].str[4].map({c: str(i) for i, c in enumerate(LETRAS_MERCOSUL)})
+    return s.where(~mercosul, s.str[:4] + digito.reindex(s.index).fillna('') + s.str[5:])
+
+def levenshtein(a, b, limite=None):
+    # Distância de edição com corte antecipado: passou do limite, devolve limite + 1
+    if len(a) < len(b):
+        a, b = b, a
+    if limite is not None and len(a) - len(b) > limite:
+        return limite + 1
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        atual = [i]
+        for j, cb in enumerate(b, 1):
+            atual.append(min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (ca != cb)))
+        if limite is not None and min(atual) > limite:
+            return limite + 1
+        anterior = atual
+    return anterior[-1]
+
+
+def delecoes(palavra, d):
+    # A palavra e todas as variantes com até d caracteres removidos
+    variantes = {palavra}
+    for k in range(1, min(d, len(palavra)) + 1):
+        for pos in combinations(range(len(palavra)), k):
+            variantes.add(''.join(c for i, c in enumerate(palavra) if i not in pos))
+    return variantes
+
+
+class IndiceDelecoes:
+    # Variante -> chaves que a geram; a busca junta os candidatos das variantes da consulta
+    # e confirma a distância com levenshtein (que descarta falsos candidatos, ex.: duas
+    # deleções em posições diferentes)
+    def __init__(self, palavras=(), distancia=DISTANCIA_MAXIMA):
+        self.distancia = distancia
+        self.variantes = defaultdict(set)
+        self.n = 0
+        for p in palavras:
+            self.adicionar(p)
+
+    def adicionar(self, palavra):
+        self.n += 1
+        for v in delecoes(palavra, self.distancia):
+            self.variantes[v].add(palavra)
+
+    def buscar(self, palavra, raio=None):
+        raio = self.distancia if raio is None else min(raio, self.distancia)
+        candidatos = set()
+        for v in delecoes(palavra, raio):
+            candidatos |= self.variantes.get(v, set())
+        achados = ((levenshtein(palavra, c, raio), c) for c in candidatos)
+        return sorted((d, c) for d, c in achados if d <= raio)
+
+
+class Conciliador:
+    def __init__(self, placas_frota, distancia=DISTANCIA_MAXIMA):
+        placas = pd.Series(pd.unique(pd.Series(placas_frota).astype(str)))
+        placas = placas[~placas.isin(SEM_PLACA)]
+        chaves = chave_canonica_series(placas)
+        # chave -> placa como está no cadastro (a primeira, se houver duplicidade)
+        self.indice = dict(zip(chaves.tolist()[::-1], placas.tolist()[::-1]))
+        self.exatas = set(placas.tolist())
+        self.distancia = distancia
+        self._aproximado = None
+
+    @property
+    def aproximado(self):
+        # Montado só se alguma placa não casar pela chave
+        if self._aproximado is None:
+            self._aproximado = IndiceDelecoes(self.indice, self.distancia)
+        return self._aproximado
+
+    def conciliar(self, placas):
+        # Uma linha por placa distinta: placa na frota, método, distância e candidatos
+        placas = pd.Series(pd.unique(pd.Series(placas).astype(str)), name='PLACA')
+        chaves = chave_canonica_series(placas)
+        exata = placas.isin(self.exatas)
+        # Placa presente no cadastro é a própria viatura, mesmo que outra placa do cadastro
+        # tenha a mesma chave canônica (ex.: ABC1C34 e ABC1234 cadastradas)
+        frota = chaves.map(self.indice).where(~exata, placas)
+        metodo = np.where(exata, 'exata', np.where(frota.notna(), 'mercosul', None))
+        relatorio = pd.DataFrame({'PLACA': placas, 'PLACA_FROTA': frota, 'MÉTODO': metodo,
+                                  'DISTÂNCIA': np.where(frota.notna(), 0, np.nan), 'CANDIDATOS': ''})
+        # Só entram como candidatas as placas da frota sem abastecimento casado pela chave:
+        # um erro de digitação costuma ser o único registro da viatura no período
+        casadas = set(chaves[frota.notna()].tolist())
+        for i in np.flatnonzero(frota.isna().to_numpy()):
+            if placas.iat[i] in SEM_PLACA:
+                relatorio.iloc[i, 2] = 'sem correspondência'
+                continue
+            achados = self.aproximado.buscar(chaves.iat[i])
+            livres = [(d, v) for d, v in achados if v not in casadas]
+            melhores = [v for d, v in livres if d == livres[0][0]] if livres else []
+            if len(melhores) == 1:
+                relatorio.iloc[i, [1, 2, 3]] = [self.indice[melhores[0]], 'aproximada', livres[0][0]]
+            elif melhores:
+                relatorio.iloc[i, [2, 3, 4]] = ['ambígua', livres[0][0], ', '.join(self.indice[v] for v in melhores)]
+            else:
+                relatorio.iloc[i, [2, 4]] = ['sem correspondência', ', '.join(self.indice[v] for d, v in achados)]
+        relatorio['MÉTODO'] = pd.Categorical(relatorio['MÉTODO'], categories=METODOS)
+        return relatorio
+
+def aplicar(df, relatorio, coluna='PLACA'):
+    # Troca a placa do abastecimento pela do cadastro quando a conciliação achou uma única
+    mapa = relatorio.dropna(subset=['PLACA_FROTA'])
+    mapa = mapa[(mapa['MÉTODO'] != 'exata') & (mapa['PLACA'] != mapa['PLACA_FROTA'])]
+    if mapa.empty:
+        return df
+    return df.assign(**{coluna: df[coluna].replace(dict(zip(mapa['PLACA'], mapa['PLACA_FROTA'])))})
+
+def resumo(relatorio):
+    contagem = relatorio['MÉTODO'].value_counts().reindex(METODOS, fill_value=0)
+    return contagem.rename_axis('Método').reset_index(name='Placas')
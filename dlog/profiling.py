@@ -0,0 +1,247 @@
+# ---------- Instrumentação leve por etapa (tempo e memória) ----------
+# Cada rerun de página abre um registro (inicio/fim) e cada etapa do pipeline, fragmento ou
+# gráfico entra nele com duração e variação de memória residente. Os registros ficam em
+# memória do processo, os últimos N por sessão, e alimentam o painel de diagnóstico
+# (dlog/diagnostics.py). As funções cacheadas das páginas usam cache_data/cache_resource
+# daqui, que contam acertos e faltas de cada cache.
+#
+# O primeiro rerun completo de cada página no processo fica marcado como a primeira
+# renderização (tempo do rerun e segundos desde o início do processo); o aquecimento do boot
+# (dlog/startup.py) entra como um registro do tipo "boot".
+#
+# Custo por etapa: dois perf_counter e duas leituras de /proc/self/statm. Desligável com
+# DLOG_PROFILING=0; DLOG_PROFILING_LOG=<arquivo.jsonl> grava cada rerun numa linha JSON.
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+ATIVO = os.environ.get("DLOG_PROFILING", "1") != "0"
+ARQUIVO_LOG = os.environ.get("DLOG_PROFILING_LOG")
+MAX_RERUNS = int(os.environ.get("DLOG_PROFILING_RERUNS", "50"))
+MAX_SESSOES = 200
+
+_local = threading.local()
+_lock = threading.Lock()
+_sessoes = {}
+_caches = {}
+_primeiras = {}
+
+try:
+    _PAGINA = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGINA = None
+
+
+def rss_mb():
+    # Memória residente atual (Linux); None onde /proc não existe
+    if _PAGINA is None:
+        return None
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGINA / 2**20
+    except OSError:
+        return None
+
+def _inicio_processo():
+    # Início do processo em epoch (Linux: /proc/self/stat); fora dele, a importação deste módulo
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            ticks = int(f.read().rsplit(b")", 1)[1].split()[19])
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.time()
+
+INICIO_PROCESSO = _inicio_processo()
+
+def _sessao():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else "sem-sessao"
+
+def _guardar(reg):
+    with _lock:
+        fila = _sessoes.get(reg["sessao"])
+        if fila is None:
+            if len(_sessoes) >= MAX_SESSOES:
+                _sessoes.pop(next(iter(_sessoes)))
+            fila = _sessoes[reg["sessao"]] = deque(maxlen=MAX_RERUNS)
+        fila.append(reg)
+    if ARQUIVO_LOG:
+        linha = json.dumps(reg, ensure_ascii=False, default=str)
+        with _lock, open(ARQUIVO_LOG, "a", encoding="utf-8") as f:
+            f.write(linha + "\n")
+
+def _novo_registro(pagina, tipo):
+    return {"sessao": _sessao(), "pagina": pagina, "tipo": tipo,
+            "inicio": time.time(), "_t0": time.perf_counter(), "_m0": rss_mb(), "etapas": []}
+
+def _fechar(reg, erro=None):
+    reg["total_ms"] = round((time.perf_counter() - reg.pop("_t0")) * 1000, 2)
+    m0, m1 = reg.pop("_m0"), rss_mb()
+    reg["rss_mb"] = round(m1, 1) if m1 is not None else None
+    reg["delta_rss_mb"] = round(m1 - m0, 2) if m1 is not None and m0 is not None else None
+    reg["erro"] = erro
+    if reg["tipo"] == "rerun" and erro is None:
+        with _lock:
+            if reg["pagina"] not in _primeiras:
+                reg["primeira"] = True
+                reg["desde_inicio_s"] = round(time.time() - INICIO_PROCESSO, 2)
+                _primeiras[reg["pagina"]] = {"pagina": reg["pagina"], "render_ms": reg["total_ms"],
+                                             "desde_inicio_s": reg["desde_inicio_s"], "inicio": reg["inicio"]}
+    _guardar(reg)
+
+
+# ---------- Rerun de página ----------
+def inicio(pagina, tipo="rerun"):
+    # Abre o registro do rerun; um registro ainda aberto (rerun interrompido) é fechado antes
+    if not ATIVO:
+        return
+    anterior = getattr(_local, "atual", None)
+    if anterior is not None:
+        _fechar(anterior, "interrompido")
+    _local.atual = _novo_registro(pagina, tipo)
+    _local.pilha = []
+
+def fim():
+    reg = getattr(_local, "atual", None)
+    if reg is None:
+        return
+    _local.atual = None
+    _fechar(reg)
+
+@contextmanager
+def rerun(pagina, tipo="rerun"):
+    inicio(pagina, tipo)
+    erro = None
+    try:
+        yield
+    except BaseException as e:
+        erro = type(e).__name__
+        raise
+    finally:
+        reg = getattr(_local, "atual", None)
+        _local.atual = None
+        if reg is not None:
+            _fechar(reg, erro)
+
+
+# ---------- Etapas ----------
+@contextmanager
+def etapa(nome):
+    # Fora de um rerun (ex.: fragmento reexecutado sozinho) a etapa vira um registro próprio
+    if not ATIVO:
+        yield
+        return
+    reg = getattr(_local, "atual", None)
+    if reg is None:
+        reg = _local.atual = _novo_registro(nome, "fragmento")
+        _local.pilha = []
+        try:
+            yield
+        finally:
+            _local.atual = None
+            _fechar(reg)
+        return
+    pilha = _local.pilha
+    pilha.append(nome)
+    t0, m0 = time.perf_counter(), rss_mb()
+    try:
+        yield
+    finally:
+        m1 = rss_mb()
+        reg["etapas"].append({
+            "etapa": " › ".join(pilha),
+            "ms": round((time.perf_counter() - t0) * 1000, 2),
+            "delta_rss_mb": round(m1 - m0, 2) if m1 is not None and m0 is not None else None,
+        })
+        pilha.pop()
+
+def medir(nome):
+    # Decorator: a função inteira é uma etapa
+    def deco(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with etapa(nome):
+                return func(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+# ---------- Caches com contagem de acertos/faltas ----------
+class _Contador:
+    __slots__ = ("chamadas", "faltas", "tipo")
+
+    def __init__(self, tipo):
+        self.chamadas = self.faltas = 0
+        self.tipo = tipo
+
+def _contado(decorator, tipo, func, kwargs):
+    if func is None:
+        return lambda f: _contado(decorator, tipo, f, kwargs)
+    nome = f"{func.__module__}.{func.__qualname__}".replace("<locals>.", "")
+    with _lock:
+        cont = _caches.setdefault(nome, _Contador(tipo))
+
+    # O corpo só executa numa falta; o wrapper externo conta todas as chamadas
+    @functools.wraps(func)
+    def executa(*args, **kw):
+        with _lock:
+            cont.faltas += 1
+        return func(*args, **kw)
+
+    cacheada = decorator(**kwargs)(executa)
+
+    @functools.wraps(func)
+    def chamada(*args, **kw):
+        with _lock:
+            cont.chamadas += 1
+        with etapa(nome.rsplit(".", 1)[-1]):
+            return cacheada(*args, **kw)
+
+    chamada.clear = cacheada.clear
+    return chamada
+
+def cache_data(func=None, **kwargs):
+    return _contado(st.cache_data, "cache_data", func, kwargs)
+
+def cache_resource(func=None, **kwargs):
+    return _contado(st.cache_resource, "cache_resource", func, kwargs)
+
+
+# ---------- Leitura para o painel / exportação ----------
+def estatisticas_cache():
+    with _lock:
+        itens = [(n, c.tipo, c.chamadas, c.faltas) for n, c in _caches.items()]
+    return [{"cache": n, "tipo": t, "chamadas": ch, "acertos": ch - f, "faltas": f,
+             "taxa_acerto": round((ch - f) / ch, 3) if ch else None} for n, t, ch, f in itens]
+
+def reruns(sessao=None):
+    with _lock:
+        if sessao is not None:
+            return list(_sessoes.get(sessao, ()))
+        return [r for fila in _sessoes.values() for r in fila]
+
+def primeiras_renderizacoes():
+    with _lock:
+        return list(_primeiras.values())
+
+def sessoes():
+    with _lock:
+        return {s: len(fila) for s, fila in _sessoes.items()}
+
+def sessao_atual():
+    return _sessao()
+
+def limpar():
+    with _lock:
+        _sessoes.clear()
+        for c in _caches.values():
+            c.chamadas = c.faltas = 0
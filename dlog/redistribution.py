@@ -0,0 +1,230 @@
+# ---------- Plano de redistribuição de viaturas entre OPMs ----------
+# A partir do resumo (OPM, Viaturas, Municípios, Bairros), calcula a meta inteira de cada OPM
+# proporcional ao alvo (municípios ou bairros de Maceió), pelo método dos maiores restos,
+# e devolve um plano inteiro de transferências origem -> destino.
+#   modo='greedy'   : dois ponteiros vetorizado sobre as somas acumuladas de excesso/falta
+#   modo='min_cost' : transporte de custo mínimo (simplex de rede) ponderado pela distância
+#                     (km) entre as OPMs
+import numpy as np
+import pandas as pd
+
+COLUNAS_PLANO = ['Origem', 'Destino', 'Viaturas', 'Custo']
+ESCALA_CUSTO = 10**6
+BLOCO = 4096
+
+
+def metas(summary, alvo='Municípios'):
+    base = summary[summary[alvo] > 0][['OPM', 'Viaturas', alvo]].reset_index(drop=True)
+    pesos = base[alvo].to_numpy(dtype=float)
+    total = int(base['Viaturas'].sum())
+    if base.empty or total == 0:
+        return base.assign(Meta=0, Saldo=0)
+    ideal = total * pesos / pesos.sum()
+    meta = np.floor(ideal).astype(int)
+    resto = total - meta.sum()
+    if resto > 0:
+        # maiores restos; empate resolvido pela ordem original
+        ordem = np.argsort(-(ideal - meta), kind='stable')[:resto]
+        meta[ordem] += 1
+    base['Meta'] = meta
+    base['Saldo'] = base['Viaturas'].to_numpy(dtype=int) - meta
+    return base
+
+def _greedy(oferta, demanda):
+    # Sobreposição dos intervalos [acum_oferta) x [acum_demanda): cada trecho é uma transferência
+    acum_o, acum_d = np.cumsum(oferta), np.cumsum(demanda)
+    cortes = np.union1d(acum_o, acum_d)
+    inicio = np.concatenate(([0], cortes[:-1]))
+    qtd = cortes - inicio
+    ok = qtd > 0
+    inicio, qtd = inicio[ok], qtd[ok]
+    i = np.searchsorted(acum_o, inicio, side='right')
+    j = np.searchsorted(acum_d, inicio, side='right')
+    return i, j, qtd
+
+def _menor_custo(oferta, demanda, c):
+    # Solução inicial pelo método do menor custo: percorre as células em ordem de custo e
+    # fecha exatamente uma linha ou coluna por alocação, o que deixa uma base em árvore
+    # (nd + nr - 1 células, algumas com zero)
+    nd, nr = c.shape
+    s, d = oferta.tolist(), demanda.tolist()
+    linha_ok, coluna_ok = [True] * nd, [True] * nr
+    abertas_l, abertas_c = nd, nr
+    base = []
+    for idx in np.argsort(c, axis=None, kind='stable').tolist():
+        i, j = divmod(idx, nr)
+        if not (linha_ok[i] and coluna_ok[j]):
+            continue
+        q = min(s[i], d[j])
+        s[i] -= q
+        d[j] -= q
+        base.append((i, j, q))
+        if abertas_l == 1 and abertas_c == 1:
+            break
+        if s[i] == 0 and abertas_l > 1:
+            linha_ok[i] = False
+            abertas_l -= 1
+        else:
+            coluna_ok[j] = False
+            abertas_c -= 1
+    return base
+
+def _simplex_transporte(oferta, demanda, c):
+    # Simplex de rede sobre o problema de transporte equilibrado. Nós 0..nd-1 são as
+    # doadoras e nd..nd+nr-1 as receptoras; a base é uma árvore enraizada no nó 0 com pai,
+    # profundidade, filhos e o fluxo do arco até o pai guardado no filho. Os preços
+    # (custos reduzidos) saem em blocos de linhas com numpy; a cada pivô só a subárvore
+    # que troca de lado é percorrida para corrigir profundidades e potenciais.
+    nd, nr = c.shape
+    n = nd + nr
+    viz = [[] for _ in range(n)]
+    inicial = {}
+    for i, j, q in _menor_custo(oferta, demanda, c):
+        viz[i].append(nd + j)
+        viz[nd + j].append(i)
+        inicial[i, j] = q
+    pai, prof, fluxo = [-1] * n, [0] * n, [0] * n
+    filhos = [set() for _ in range(n)]
+    pot_l = [0] * n
+    fila = [0]
+    for u in fila:
+        for w in viz[u]:
+            if w != pai[u]:
+                i, j = (u, w - nd) if u < nd else (w, u - nd)
+                pai[w], prof[w], fluxo[w] = u, prof[u] + 1, inicial[i, j]
+                pot_l[w] = int(c[i, j]) - pot_l[u]
+                filhos[u].add(w)
+                fila.append(w)
+    pot = np.array(pot_l, dtype=np.int64)
+    u_pot, v_pot = pot[:nd], pot[nd:]
+    sinal = np.concatenate([np.ones(nd, dtype=np.int64), -np.ones(nr, dtype=np.int64)])
+
+    linhas = max(1, BLOCO // nr)
+    blocos = -(-nd // linhas)
+    ini, sem_negativo = 0, 0
+    while sem_negativo < blocos:
+        fim = min(ini + linhas, nd)
+        red = c[ini:fim] - u_pot[ini:fim, None] - v_pot[None, :]
+        k = int(red.argmin())
+        r = int(red.flat[k])
+        a, b = ini + k // nr, nd + k % nr
+        ini = fim if fim < nd else 0
+        if r >= 0:
+            sem_negativo += 1
+            continue
+        sem_negativo = 0
+
+        # Ciclo: caminhos de b e de a até o ancestral comum; os arcos em posição par (a
+        # partir de cada ponta) perdem theta e os ímpares ganham
+        x, y = b, a
+        lado_b, lado_a = [], []
+        while x != y:
+            if prof[x] >= prof[y]:
+                lado_b.append(x)
+                x = pai[x]
+            else:
+                lado_a.append(y)
+                y = pai[y]
+        theta, sai, sai_em_b = None, None, False
+        for q in range(len(lado_a) - 1 - (len(lado_a) - 1) % 2, -1, -2):
+            if theta is None or fluxo[lado_a[q]] <= theta:
+                theta, sai, sai_em_b = fluxo[lado_a[q]], lado_a[q], False
+        for p in range(0, len(lado_b), 2):
+            if theta is None or fluxo[lado_b[p]] <= theta:
+                theta, sai, sai_em_b = fluxo[lado_b[p]], lado_b[p], True
+        if theta:
+            for lado in (lado_a, lado_b):
+                for p, no in enumerate(lado):
+                    fluxo[no] += theta if p % 2 else -theta
+
+        # Sai o arco (sai, pai[sai]); a ponta do arco que entra do mesmo lado passa a ser
+        # filha da outra e o caminho até `sai` inverte de sentido
+        x, y, delta = (b, a, -r) if sai_em_b else (a, b, r)
+        cur, novo_pai, novo_fluxo = x, y, theta
+        while True:
+            velho_pai, velho_fluxo = pai[cur], fluxo[cur]
+            filhos[velho_pai].discard(cur)
+            filhos[novo_pai].add(cur)
+            pai[cur], fluxo[cur] = novo_pai, novo_fluxo
+            if cur == sai:
+                break
+            cur, novo_pai, novo_fluxo = velho_pai, cur, velho_fluxo
+        pilha, sub = [x], []
+        while pilha:
+            w = pilha.pop()
+            sub.append(w)
+            prof[w] = prof[pai[w]] + 1
+            pilha.extend(filhos[w])
+        sub = np.array(sub)
+        pot[sub] += sinal[sub] * delta
+
+    i, j, qtd = [], [], []
+    for w in range(1, n):
+        if fluxo[w] > 0:
+            d, r = (w, pai[w]) if w < nd else (pai[w], w)
+            i.append(d)
+            j.append(r - nd)
+            qtd.append(fluxo[w])
+    return np.array(i, dtype=int), np.array(j, dtype=int), np.array(qtd, dtype=np.int64)
+
+def _min_cost(oferta, demanda, custo):
+    # Transporte de custo mínimo exato. Custos em inteiros (escala ESCALA_CUSTO) para
+    # comparações exatas; oferta e demanda desiguais ganham uma linha/coluna fictícia de
+    # custo zero que absorve a diferença
+    nd, nr = custo.shape
+    maximo = float(custo.max()) if custo.size else 0.0
+    c = np.rint(custo / (maximo if maximo > 0 else 1.0) * ESCALA_CUSTO).astype(np.int64)
+    oferta = np.asarray(oferta, dtype=np.int64)
+    demanda = np.asarray(demanda, dtype=np.int64)
+    sobra = int(oferta.sum() - demanda.sum())
+    if sobra > 0:
+        c = np.hstack([c, np.zeros((nd, 1), dtype=np.int64)])
+        demanda = np.append(demanda, sobra)
+    elif sobra < 0:
+        c = np.vstack([c, np.zeros((1, nr), dtype=np.int64)])
+        oferta = np.append(oferta, -sobra)
+    i, j, qtd = _simplex_transporte(oferta, demanda, c)
+    ok = (i < nd) & (j < nr)
+    i, j, qtd = i[ok], j[ok], qtd[ok]
+    ordem = np.lexsort((j, i))
+    return i[ordem], j[ordem], qtd[ordem]
+
+def distancias_opm(opms, coords):
+    # Haversine em km entre as OPMs a partir de (OPM, Latitude, Longitude); OPMs sem
+    # coordenadas ficam à maior distância observada
+    opms = list(opms)
+    c = coords.drop_duplicates('OPM').set_index('OPM').reindex(opms)
+    lat = np.radians(c['Latitude'].to_numpy(dtype=float))
+    lon = np.radians(c['Longitude'].to_numpy(dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    dist = 2 * 6371.0 * np.arcsin(np.sqrt(a))
+    return np.nan_to_num(dist, nan=np.nanmax(dist) if np.isfinite(dist).any() else 1.0)
+
+def plano_transferencias(summary, alvo='Municípios', modo='greedy', distancias=None):
+    base = metas(summary, alvo)
+    doadoras = base[base['Saldo'] > 0].sort_values('Saldo', ascending=False, kind='stable')
+    receptoras = base[base['Saldo'] < 0].sort_values('Saldo', kind='stable')
+    if doadoras.empty or receptoras.empty:
+        return pd.DataFrame(columns=COLUNAS_PLANO)
+    oferta = doadoras['Saldo'].to_numpy()
+    demanda = -receptoras['Saldo'].to_numpy()
+    if modo == 'min_cost':
+        if distancias is None:
+            raise ValueError("modo 'min_cost' exige a matriz de distâncias entre as OPMs")
+        dist = pd.DataFrame(distancias, index=summary['OPM'], columns=summary['OPM'])
+        custo = dist.loc[doadoras['OPM'], receptoras['OPM']].to_numpy(dtype=float)
+        i, j, qtd = _min_cost(oferta, demanda, custo)
+        custos = custo[i, j] * qtd
+    elif modo == 'greedy':
+        i, j, qtd = _greedy(oferta, demanda)
+        custos = np.full(len(qtd), np.nan)
+    else:
+        raise ValueError(f"modo desconhecido: {modo}")
+    return pd.DataFrame({
+        'Origem': doadoras['OPM'].to_numpy()[i],
+        'Destino': receptoras['OPM'].to_numpy()[j],
+        'Viaturas': qtd.astype(int),
+        'Custo': custos,
+    })
@@ -0,0 +1,117 @@
+# ---------- Cubo diário com somas acumuladas (Dashboard de combustível) ----------
+# Agrega os abastecimentos por dia x OPM x medida (litros por combustível, custo e nº de
+# registros) e guarda a soma acumulada ao longo dos dias. Qualquer total de período e
+# subconjunto de OPMs, série mensal ou distribuição por combustível sai de fatias do
+# cubo, sem voltar aos registros brutos. Um segundo cubo dia x placa (contagem de
+# registros) responde quantas viaturas abasteceram no período.
+import numpy as np
+import pandas as pd
+
+COMBUSTIVEIS = ['Gasolina (Lts)','Álcool (Lts)','Diesel (Lts)','Diesel S10 (Lts)']
+REGISTROS = '_registros'
+
+
+class DailyRollup:
+    def __init__(self, df, combustiveis=COMBUSTIVEIS, por_placa=True):
+        df = df[df['Data'].notna()]
+        self.medidas = [c for c in combustiveis if c in df.columns]
+        if 'Custo' in df.columns:
+            self.medidas.append('Custo')
+        self.combustiveis = [c for c in combustiveis if c in df.columns]
+        self.tem_custo = 'Custo' in df.columns
+
+        dias = df['Data'].dt.normalize()
+        self.inicio = dias.min() if len(dias) else pd.Timestamp('today').normalize()
+        self.n_dias = int((dias.max() - self.inicio).days) + 1 if len(dias) else 0
+        d = (dias - self.inicio).dt.days.to_numpy()
+
+        # OPM ausente (NaN) vira uma categoria própria, como no isin() original
+        o, self.opms = pd.factorize(df['OPM'], use_na_sentinel=False)
+        valores = df[self.medidas].apply(pd.to_numeric, errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        valores = np.column_stack([valores, np.ones(len(df))])
+        cubo = np.zeros((self.n_dias + 1, len(self.opms), len(self.medidas) + 1))
+        np.add.at(cubo, (d + 1, o), valores)
+        self.acum = np.cumsum(cubo, axis=0)
+
+        self.acum_placa = None
+        if por_placa:
+            p, self.placas = pd.factorize(df['Placa'])
+            cont = np.zeros((self.n_dias + 1, len(self.placas)), dtype=np.int32)
+            np.add.at(cont, (d[p >= 0] + 1, p[p >= 0]), 1)
+            self.acum_placa = np.cumsum(cont, axis=0)
+            # OPM de cada placa (a primeira vista), para filtrar a contagem por OPM
+            self.opm_da_placa = pd.Series(o[p >= 0]).groupby(p[p >= 0]).first().reindex(range(len(self.placas))).to_numpy()
+
+    def _intervalo(self, ini, fim):
+        # Dias [i, j] do cubo (vazio quando j < i)
+        i = max(int((pd.Timestamp(ini).normalize() - self.inicio).days), 0)
+        j = min(int((pd.Timestamp(fim).normalize() - self.inicio).days), self.n_dias - 1)
+        return i, j
+
+    def _opm_idx(self, opms):
+        if opms is None:
+            return np.arange(len(self.opms))
+        return np.flatnonzero(pd.Index(self.opms).isin(opms))
+
+    def _fatia(self, ini, fim, opms):
+        i, j = self._intervalo(ini, fim)
+        if j < i:
+            return np.zeros(len(self.medidas) + 1)
+        idx = self._opm_idx(opms)
+        return (self.acum[j + 1, idx] - self.acum[i, idx]).sum(axis=0)
+
+    def opms_no_periodo(self, ini, fim):
+        i, j = self._intervalo(ini, fim)
+        if j < i:
+            return []
+        regs = self.acum[j + 1, :, -1] - self.acum[i, :, -1]
+        return [self.opms[k] for k in np.flatnonzero(regs > 0)]
+
+    def totais(self, ini, fim, opms=None):
+        return pd.Series(self._fatia(ini, fim, opms)[:-1], index=self.medidas)
+
+    def registros(self, ini, fim, opms=None):
+        return int(self._fatia(ini, fim, opms)[-1])
+
+    def n_placas(self, ini, fim, opms=None):
+        i, j = self._intervalo(ini, fim)
+        if self.acum_placa is None or j < i:
+            return 0
+        ativas = (self.acum_placa[j + 1] - self.acum_placa[i]) > 0
+        if opms is not None:
+            ativas &= np.isin(self.opm_da_placa, self._opm_idx(opms))
+        return int(ativas.sum())
+
+    def mensal(self, ini, fim, opms=None):
+        i, j = self._intervalo(ini, fim)
+        if j < i:
+            return pd.DataFrame(columns=['Data'] + self.combustiveis)
+        idx = self._opm_idx(opms)
+        serie = self.acum[:, idx].sum(axis=1)          # acumulado diário das OPMs escolhidas
+        datas = self.inicio + pd.to_timedelta(np.arange(i, j + 1), unit='D')
+        fim_mes = datas.to_period('M').to_timestamp(how='end').normalize()
+        # último dia de cada mês dentro do período -> diferença dos acumulados
+        ultimos = np.flatnonzero(np.r_[fim_mes[1:] != fim_mes[:-1], True]) + i
+        cortes = np.r_[i, ultimos + 1]
+        valores = serie[cortes[1:]] - serie[cortes[:-1]]
+        df_m = pd.DataFrame(valores[:, :len(self.medidas)], columns=self.medidas)
+        df_m.insert(0, 'Data', fim_mes[ultimos - i])
+        regs = valores[:, -1]
+        # como o pd.Grouper: do primeiro ao último mês com registros
+        com_dados = np.flatnonzero(regs > 0)
+        if len(com_dados) == 0:
+            return df_m.iloc[0:0][['Data'] + self.combustiveis]
+        df_m = df_m.iloc[com_dados[0]:com_dados[-1] + 1]
+        return df_m[['Data'] + self.combustiveis].reset_index(drop=True)
+
+    def por_opm(self, ini, fim, opms=None):
+        # Totais do período por OPM (medidas + nº de registros)
+        i, j = self._intervalo(ini, fim)
+        idx = self._opm_idx(opms)
+        if j < i:
+            valores = np.zeros((len(idx), len(self.medidas) + 1))
+        else:
+            valores = self.acum[j + 1, idx] - self.acum[i, idx]
+        tab = pd.DataFrame(valores, columns=self.medidas + [REGISTROS])
+        tab.insert(0, 'OPM', [self.opms[k] for k in idx])
+        return tab[tab[REGISTROS] > 0].reset_index(drop=True)
@@ -0,0 +1,91 @@
+# ---------- Modelo do efetivo (página Efetivo) ----------
+# Montado uma vez por snapshot: quadro com SETOR categórico, visão sem duplicidades, junção
+# com as funções de praças, cubos de contagem P/G x SETOR e o índice de busca. KPIs, gráficos
+# e tabelas da página são fatias desses cubos. O P/G canônico (abreviações unificadas, ordem
+# hierárquica) só entra nos cubos; tabelas e busca mostram o P/G como está na planilha.
+import pandas as pd
+
+from dlog.memory import compactar
+from dlog.search import SearchIndex
+
+# --- ORDEM HIERÁRQUICA (Cel ao Sd) ---
+ordem_grad = ["CEL", "TEN CEL", "MAJ", "CAP", "1º TEN", "2º TEN",
+              "SUBTENENTE", "1º SARGENTO", "2º SARGENTO", "3º SARGENTO", "CB", "SD"]
+
+# Abreviações usadas na planilha -> nome da ordem hierárquica
+ALIASES_GRAD = {
+    "SUBTEN": "SUBTENENTE", "ST": "SUBTENENTE",
+    "1º SGT": "1º SARGENTO", "2º SGT": "2º SARGENTO", "3º SGT": "3º SARGENTO",
+}
+
+# --- Setores oficiais da DLOG ---
+setores_dlog = [
+    "DLOG 1", "DLOG 2", "DLOG 3", "DLOG 4", "DLOG 5", "DLOG 6",
+    "CMM", "CMO", "CMB", "DIRETORIA", "SUBDIRETORIA", "SECRETARIA"
+]
+
+COLUNAS_BUSCA = ["NOME", "P/G", "SETOR", "LOTAÇÃO", "N GUERRA"]
+# Colunas de texto repetitivo guardadas como categóricas (o quadro chega todo como str)
+CATEGORIAS = ["P/G", "LOTAÇÃO", "QUADRO"]
+
+
+def _grad_categorica(s):
+    s = s.str.upper().str.strip().str.split().str.join(' ').replace(ALIASES_GRAD)
+    extras = sorted(set(s.dropna()) - set(ordem_grad))
+    return pd.Series(pd.Categorical(s, categories=ordem_grad + extras, ordered=True), index=s.index, name="P/G")
+
+def _contagem(grad, df):
+    if grad is None or "SETOR" not in df.columns:
+        return None
+    return pd.crosstab(grad.loc[df.index], df["SETOR"], dropna=False)
+
+
+class Roster:
+    def __init__(self, df_efetivo, df_funcoes):
+        df_efetivo = df_efetivo.copy()
+        df_funcoes = df_funcoes.copy()
+        # --- Normaliza nomes de colunas ---
+        df_efetivo.columns = df_efetivo.columns.str.upper().str.strip()
+        df_funcoes.columns = df_funcoes.columns.str.upper().str.strip()
+        grad = _grad_categorica(df_efetivo["P/G"]) if "P/G" in df_efetivo.columns else None
+        if "SETOR" in df_efetivo.columns:
+            setor = df_efetivo["SETOR"].str.upper().str.strip()
+            df_efetivo["SETOR"] = pd.Categorical(setor, categories=sorted(setor.unique()))
+        self.efetivo = compactar(df_efetivo, CATEGORIAS)
+        df_efetivo = self.efetivo
+
+        # --- Remove duplicidades por nome completo ---
+        self.unicos = df_efetivo.drop_duplicates(subset=["NOME"])
+        self.em_dlog = self.unicos["SETOR"].isin(setores_dlog).to_numpy()
+        self.outros = self.unicos[~self.em_dlog]
+
+        # --- Graduação da função ocupada (merge pelo nome de guerra) ---
+        resultado = self.unicos
+        if "N GUERRA" in resultado.columns and "NOME DE GUERRA" in df_funcoes.columns and "GRADUAÇÃO DA FUNÇÃO" in df_funcoes.columns:
+            resultado = resultado.merge(df_funcoes[["NOME DE GUERRA", "GRADUAÇÃO DA FUNÇÃO"]],
+                                        left_on="N GUERRA", right_on="NOME DE GUERRA", how="left")
+        self.resultado = resultado.reset_index(drop=True)
+        self.busca = SearchIndex(self.resultado, COLUNAS_BUSCA)
+
+        # --- Cubos de contagem P/G x SETOR (todos os registros e únicos) ---
+        self.cubo = _contagem(grad, df_efetivo)
+        self.cubo_unicos = _contagem(grad, self.unicos)
+
+    def por_graduacao(self):
+        cont = self.cubo.sum(axis=1)
+        return cont[cont > 0].rename_axis("Posto/Graduação").reset_index(name="Quantidade")
+
+    def por_setor(self):
+        cols = [s for s in self.cubo_unicos.columns if s in setores_dlog]
+        cont = self.cubo_unicos[cols].sum(axis=0)
+        return cont[cont > 0].rename_axis("SETOR").reset_index(name="Quantidade")
+
+    def tabela_grad_setor(self):
+        cols = [s for s in self.cubo.columns if s in setores_dlog]
+        tabela = self.cubo[cols].reindex(ordem_grad, fill_value=0)
+        tabela.index = list(tabela.index)
+        tabela.columns = list(tabela.columns)
+        tabela = tabela.loc[:, tabela.sum(axis=0) > 0]
+        tabela["TOTAL"] = tabela.sum(axis=1)
+        total_row = pd.DataFrame([tabela.sum(axis=0)], index=["TOTAL"])
+        return pd.concat([tabela, total_row]).astype(int)
@@ -0,0 +1,82 @@
+# ---------- Índice de busca sem acentos (Busca Detalhada do Efetivo) ----------
+# Guarda uma coluna de texto única, sem acentos e em maiúsculas, para str.contains
+# vetorizado, e um índice invertido de tokens (prefixo) e trigramas (substring).
+# Consultas com vários termos são combinadas com E (interseção).
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+SEPARADOR = ' | '
+
+
+def fold(texto):
+    sem_acento = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sem_acento.upper().split())
+
+def fold_series(s):
+    s = s.astype(object).fillna('').astype(str)
+    s = s.str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+    return s.str.upper().str.replace(r'\s+', ' ', regex=True).str.strip()
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class SearchIndex:
+    def __init__(self, df, colunas):
+        colunas = [c for c in colunas if c in df.columns]
+        partes = [fold_series(df[c]) for c in colunas]
+        texto = partes[0] if partes else pd.Series('', index=df.index)
+        for p in partes[1:]:
+            texto = texto + SEPARADOR + p
+        self.texto = texto.reset_index(drop=True)
+        self.n = len(self.texto)
+
+        tokens, trigramas = defaultdict(list), defaultdict(list)
+        for linha, valor in enumerate(self.texto.tolist()):
+            for tok in set(re.findall(r'[A-Z0-9]+', valor)):
+                tokens[tok].append(linha)
+            for tri in _trigramas(valor):
+                trigramas[tri].append(linha)
+        self.vocabulario = sorted(tokens)
+        self.tokens = {t: np.array(v, dtype=np.int64) for t, v in tokens.items()}
+        self.trigramas = {t: np.array(v, dtype=np.int64) for t, v in trigramas.items()}
+
+    def prefixo(self, termo):
+        # Linhas com algum token começando por termo (busca binária no vocabulário)
+        ini = bisect.bisect_left(self.vocabulario, termo)
+        fim = bisect.bisect_left(self.vocabulario, termo + '\uffff')
+        listas = [self.tokens[t] for t in self.vocabulario[ini:fim]]
+        return np.unique(np.concatenate(listas)) if listas else np.empty(0, dtype=np.int64)
+
+    def substring(self, termo):
+        if len(termo) < 3:
+            return np.flatnonzero(self.texto.str.contains(termo, regex=False).to_numpy())
+        candidatos = None
+        for tri in sorted(_trigramas(termo), key=lambda t: len(self.trigramas.get(t, ()))):
+            linhas = self.trigramas.get(tri)
+            if linhas is None:
+                return np.empty(0, dtype=np.int64)
+            candidatos = linhas if candidatos is None else np.intersect1d(candidatos, linhas, assume_unique=True)
+            if len(candidatos) == 0:
+                return candidatos
+        # Trigramas presentes não garantem a substring: confirma só nos candidatos
+        ok = self.texto.iloc[candidatos].str.contains(termo, regex=False).to_numpy()
+        return candidatos[ok]
+
+    def search(self, consulta, modo='substring'):
+        termos = fold(consulta).split()
+        if not termos:
+            return np.arange(self.n)
+        busca = self.prefixo if modo == 'prefixo' else self.substring
+        linhas = None
+        for termo in sorted(termos, key=len, reverse=True):
+            achou = busca(termo)
+            linhas = achou if linhas is None else np.intersect1d(linhas, achou, assume_unique=True)
+            if len(linhas) == 0:
+                break
+        return linhas
@@ -0,0 +1,174 @@
+# ---------- Snapshot colunar local (Parquet) das planilhas do repositório ----------
+# As planilhas .xlsx são convertidas uma única vez para Parquet tipado em SNAPSHOT_DIR,
+# junto de um manifesto com o hash SHA-256 de cada arquivo de origem. As páginas leem o
+# Parquet do disco local (memory-map) e só voltam ao Excel quando o hash muda; o Excel
+# remoto do GitHub é usado apenas quando não existe planilha local nem snapshot.
+#
+# Uso em linha de comando:  python -m dlog.snapshot [nome ...]
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import urllib.request
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = Path(os.environ.get("DLOG_DATA_DIR", BASE_DIR))
+SNAPSHOT_DIR = Path(os.environ.get("DLOG_SNAPSHOT_DIR", BASE_DIR / "snapshot"))
+MANIFEST = "manifest.json"
+URL_BASE = "https://github.com/DLOG2025/Dashboard/raw/refs/heads/main/"
+
+# nome lógico -> (planilha local, URL remota, argumentos do read_excel)
+SOURCES = {
+    "abastecimentos": ("Abastecimentos_Consolidados.xlsx", URL_BASE + "Abastecimentos_Consolidados.xlsx", {}),
+    "frota": ("Frota_Master_Enriched.xlsx", URL_BASE + "Frota_Master_Enriched.xlsx", {}),
+    "opm": ("OPM_Municipios_Enriched.xlsx", URL_BASE + "OPM_Municipios_Enriched.xlsx", {}),
+    "padroes": ("PADRÕES_LOCADOS.xlsx", URL_BASE + "PADR%C3%95ES_LOCADOS.xlsx", {}),
+    "efetivo": ("EFETIVO_GERAL_DA_DLOG .xlsx", URL_BASE + "EFETIVO_GERAL_DA_DLOG%20.xlsx", {"dtype": str}),
+    "funcoes": ("FUNCOES_DE_PRACAS_COM_BGO.xlsx", URL_BASE + "FUNCOES_DE_PRACAS_COM_BGO.xlsx", {"dtype": str}),
+}
+
+_lock = threading.Lock()
+
+
+def file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read_manifest():
+    path = SNAPSHOT_DIR / MANIFEST
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(manifest):
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = SNAPSHOT_DIR / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, SNAPSHOT_DIR / MANIFEST)
+
+
+def _typed(df):
+    # Colunas object com tipos misturados (ex.: CPF int/str) viram texto para o Arrow
+    df = df.copy()
+    df.columns = [str(c) for c in df.columns]
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v)).astype(object)
+    return df
+
+
+def _write_parquet(name, df):
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    path = SNAPSHOT_DIR / f"{name}.parquet"
+    tmp = path.with_suffix(".parquet.tmp")
+    pq.write_table(pa.Table.from_pandas(_typed(df), preserve_index=False), tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def _local_path(name):
+    return DATA_DIR / SOURCES[name][0]
+
+
+def _is_current(name, entry):
+    # Verificação barata por mtime/tamanho; o hash só é recalculado quando eles mudam
+    if not entry or not (SNAPSHOT_DIR / entry["parquet"]).exists():
+        return False
+    local = _local_path(name)
+    if not local.exists():
+        return True
+    st_ = local.stat()
+    if st_.st_mtime_ns == entry.get("mtime_ns") and st_.st_size == entry.get("tamanho"):
+        return True
+    return file_hash(local.read_bytes()) == entry["sha256"]
+
+
+def ingest(name, force=False):
+    with _lock:
+        manifest = _read_manifest()
+        entry = manifest.get(name)
+        if not force and _is_current(name, entry):
+            return entry
+        arquivo, url, kwargs = SOURCES[name]
+        local = _local_path(name)
+        if local.exists():
+            data = local.read_bytes()
+            st_ = local.stat()
+            origem, mtime_ns, tamanho = str(local.name), st_.st_mtime_ns, st_.st_size
+        else:
+            with urllib.request.urlopen(url) as resp:
+                data = resp.read()
+            origem, mtime_ns, tamanho = url, None, len(data)
+        digest = file_hash(data)
+        if entry and entry["sha256"] == digest and (SNAPSHOT_DIR / entry["parquet"]).exists():
+            entry.update(mtime_ns=mtime_ns, tamanho=tamanho)
+        else:
+            df = pd.read_excel(io.BytesIO(data), **kwargs)
+            path = _write_parquet(name, df)
+            entry = {
+                "arquivo": arquivo,
+                "origem": origem,
+                "sha256": digest,
+                "parquet": path.name,
+                "linhas": int(len(df)),
+                "mtime_ns": mtime_ns,
+                "tamanho": tamanho,
+            }
+        manifest[name] = entry
+        _write_manifest(manifest)
+        return entry
+
+
+def store(name, df, origem):
+    # Grava um quadro já carregado como snapshot de `name` (ex.: dados sintéticos)
+    with _lock:
+        manifest = _read_manifest()
+        path = _write_parquet(name, df)
+        manifest[name] = {
+            "arquivo": SOURCES[name][0],
+            "origem": origem,
+            "sha256": file_hash(path.read_bytes()),
+            "parquet": path.name,
+            "linhas": int(len(df)),
+            "mtime_ns": None,
+            "tamanho": None,
+        }
+        _write_manifest(manifest)
+        return manifest[name]
+
+
+def version(*names):
+    # Hash combinado das fontes; usado como chave dos caches das páginas
+    h = hashlib.sha256()
+    for name in names:
+        h.update(name.encode())
+        h.update(ingest(name)["sha256"].encode())
+    return h.hexdigest()[:16]
+
+
+def load_table(name):
+    entry = ingest(name)
+    table = pq.read_table(SNAPSHOT_DIR / entry["parquet"], memory_map=True)
+    return table.to_pandas()
+
+
+def main(argv=None):
+    names = (argv if argv is not None else sys.argv[1:]) or list(SOURCES)
+    for name in names:
+        entry = ingest(name, force=True)
+        print(f"{name:<15} {entry['linhas']:>7} linhas  {entry['sha256'][:12]}  {entry['parquet']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# ---------- Inicialização rápida: importações adiadas e aquecimento no boot ----------
+# plotly e pydeck só são importados quando um gráfico é montado (dlog/charts.py, mapa do
+# Dashboard); pandas, numpy e pyarrow ficam fora da home (app.py). O aquecimento roda numa
+# thread do processo do servidor: importa os módulos pesados, lê os snapshots, registra a
+# versão atual do efetivo e da frota no histórico e preenche os caches de dados e de visões
+# no estado padrão dos filtros de pages/viaturas.py, pages/efetivo.py e Dashboard, para
+# que o primeiro visitante já encontre tudo pronto.
+# Depois disso entrega a vez ao atualizador de visões (dlog/views.py).
+#
+# O tempo de cada importação e de cada etapa fica no registro "inicialização" (tipo "boot")
+# do dlog/profiling.py, ao lado da primeira renderização de cada página; tudo aparece no
+# painel de diagnóstico e no DLOG_PROFILING_LOG.
+#
+# Uso:
+#   python -m dlog.startup [script] [opções do streamlit run]   sobe o servidor já aquecendo
+#   python -m dlog.startup --medir                             mede importações e aquecimento e sai
+# Com `streamlit run app.py` o aquecimento começa na primeira visita à home.
+# DLOG_AQUECER=0 desliga.
+import argparse
+import importlib
+import os
+import sys
+import threading
+import time
+
+from dlog import profiling
+
+ATIVO = os.environ.get("DLOG_AQUECER", "1") != "0"
+IMPORTACOES = ("numpy", "pandas", "pyarrow", "openpyxl", "plotly.express", "pydeck")
+ESPERA_RUNTIME = 30
+
+_lock = threading.Lock()
+_aquecimento = None
+
+
+class Aquecimento:
+    def __init__(self):
+        self.importacoes = {}
+        self.etapas = {}
+        self.total_ms = None
+        self.erro = None
+        self.concluido = threading.Event()
+
+    def _medir(self, destino, nome, func, *args):
+        t = time.perf_counter()
+        with profiling.etapa(nome):
+            r = func(*args)
+        destino[nome] = round((time.perf_counter() - t) * 1000, 1)
+        return r
+
+    def rodar(self):
+        t = time.perf_counter()
+        try:
+            with profiling.rerun("inicialização", "boot"):
+                for modulo in IMPORTACOES:
+                    try:
+                        self._medir(self.importacoes, modulo, importlib.import_module, modulo)
+                    except ImportError:
+                        self.importacoes[modulo] = None
+                pipeline = self._medir(self.importacoes, "dlog.pipeline", importlib.import_module, "dlog.pipeline")
+                self._medir(self.etapas, "histórico", _historico, pipeline)
+                self._medir(self.etapas, "viaturas", _viaturas, pipeline)
+                self._medir(self.etapas, "efetivo", _efetivo, pipeline)
+                self._medir(self.etapas, "dashboard", _dashboard, pipeline)
+        except Exception as e:
+            self.erro = repr(e)
+        finally:
+            self.total_ms = round((time.perf_counter() - t) * 1000, 1)
+            self.concluido.set()
+
+    def relatorio(self):
+        linhas = [f"{'import ' + m:<28} {'indisponível' if ms is None else f'{ms:>9.1f} ms'}"
+                  for m, ms in self.importacoes.items()]
+        linhas += [f"{'aquecer ' + e:<28} {ms:>9.1f} ms" for e, ms in self.etapas.items()]
+        linhas.append(f"{'total':<28} {self.total_ms:>9.1f} ms" if self.total_ms is not None else "em andamento")
+        if self.erro:
+            linhas.append(f"ERRO: {self.erro}")
+        return "\n".join(linhas)
+
+
+# ---------- Estado padrão de cada página ----------
+def _historico(pipeline):
+    # Versão atual do efetivo e da frota no histórico de alterações (dlog/history.py)
+    for nome in pipeline.HISTORICOS:
+        pipeline.registrar_historico(nome)
+
+def _viaturas(pipeline):
+    # Índice de filtros, conciliação, visões e figuras da seleção completa (filtros padrão)
+    from dlog import snapshot
+    versao = snapshot.version(*pipeline.FONTES_VIATURAS)
+    for nome in pipeline.VISOES:
+        pipeline.view(nome, versao)
+    for nome in pipeline.FIGURAS:
+        pipeline.figura(nome, versao)
+
+def _efetivo(pipeline):
+    from dlog import snapshot
+    modelo = pipeline.roster(snapshot.version(*pipeline.FONTES_EFETIVO))
+    if modelo.cubo is not None:
+        modelo.por_graduacao()
+
+def _dashboard(pipeline):
+    # Mesmo período e OPMs que os filtros do Dashboard trazem marcados na primeira visita
+    import pandas as pd
+
+    from dlog.geo import coordenadas_opm
+    store = pipeline.fuel_store()
+    chave, df = store.estado()
+    if df.empty or store.frota.empty or store.opm.empty:
+        return
+    cubo = pipeline.rollup(chave, df)
+    motor = pipeline.motor_anomalias()
+    motor.atualizar(df, chave, store.placas_alteradas(motor.versao))
+    ini, fim = pd.to_datetime(df['Data'].min().date()), pd.to_datetime(df['Data'].max().date())
+    opms = tuple(cubo.opms_no_periodo(ini, fim))
+    for tipo in ("pizza", "mensal"):
+        pipeline.figura_combustivel(tipo, chave, ini, fim, opms, cubo)
+    pipeline.camada_mapa(chave, ini, fim, opms, "Por OPM", cubo, coordenadas_opm(store.opm))
+
+
+# ---------- Disparo ----------
+def _esperar_runtime():
+    # Os caches do Streamlit usam o runtime do servidor; no launcher ele sobe logo depois
+    from streamlit.runtime import Runtime
+    limite = time.monotonic() + ESPERA_RUNTIME
+    while not Runtime.exists() and time.monotonic() < limite:
+        time.sleep(0.1)
+
+def iniciar():
+    # Uma vez por processo; devolve o Aquecimento (None se desligado)
+    global _aquecimento
+    if not ATIVO:
+        return None
+    with _lock:
+        if _aquecimento is None:
+            _aquecimento = Aquecimento()
+
+            def alvo():
+                _esperar_runtime()
+                _aquecimento.rodar()
+                from dlog import pipeline
+                pipeline.atualizador()
+            threading.Thread(target=alvo, name="dlog-aquecimento", daemon=True).start()
+    return _aquecimento
+
+def estado():
+    return _aquecimento
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sobe o Streamlit aquecendo os caches no boot")
+    parser.add_argument("script", nargs="?", default="app.py")
+    parser.add_argument("--medir", action="store_true", help="só mede importações e aquecimento, sem subir o servidor")
+    args, resto = parser.parse_known_args(argv)
+    if args.medir:
+        aquecimento = Aquecimento()
+        aquecimento.rodar()
+        print(aquecimento.relatorio())
+        return 1 if aquecimento.erro else 0
+
+    iniciar()
+    from streamlit.web import cli
+    sys.argv = ["streamlit", "run", args.script, *resto]
+    return cli.main(prog_name="streamlit")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
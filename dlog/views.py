@@ -0,0 +1,207 @@
+# ---------- Visões calculadas compartilhadas entre sessões ----------
+# As tabelas derivadas da página Viaturas (pivôs da frota, resumo OPM x municípios, Top-N,
+# ranking, múltiplas OPMs) são funções puras dos quadros do snapshot e da seleção de filtros.
+# O ViewCache guarda o resultado por (versão do snapshot, seleção, nome da visão) num LRU
+# limitado por quantidade e por MB, com expiração por TTL; chamadas simultâneas da mesma
+# chave calculam uma vez só. As visões devolvidas são compartilhadas: só leitura.
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from dlog.cube import ranking, top_n
+from dlog.normalize import truncar
+
+
+class ViewCache:
+    def __init__(self, maxsize=64, max_mb=256, ttl=3600):
+        self.maxsize = maxsize
+        self.max_bytes = max_mb * 2**20
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self._calculando = {}
+        self.bytes = 0
+        self.hits = self.misses = self.expirados = self.descartados = 0
+
+    def _buscar(self, chave):
+        item = self._dados.get(chave)
+        if item is None:
+            return None
+        expira, _, valor = item
+        if expira < time.monotonic():
+            self._remover(chave)
+            self.expirados += 1
+            return None
+        self._dados.move_to_end(chave)
+        return item
+
+    def _remover(self, chave):
+        _, tamanho, _ = self._dados.pop(chave)
+        self.bytes -= tamanho
+
+    def get(self, chave, calcular):
+        with self._lock:
+            item = self._buscar(chave)
+            if item is not None:
+                self.hits += 1
+                return item[2]
+            evento = self._calculando.get(chave)
+            dono = evento is None
+            if dono:
+                evento = self._calculando[chave] = threading.Event()
+        if not dono:
+            # Outra sessão já está calculando esta chave: espera e relê
+            evento.wait()
+            with self._lock:
+                item = self._buscar(chave)
+                if item is not None:
+                    self.hits += 1
+                    return item[2]
+            return self.get(chave, calcular)
+        try:
+            valor = calcular()
+            self.put(chave, valor)
+            with self._lock:
+                self.misses += 1
+            return valor
+        finally:
+            with self._lock:
+                self._calculando.pop(chave, None)
+            evento.set()
+
+    def put(self, chave, valor):
+        tamanho = _tamanho(valor)
+        with self._lock:
+            if chave in self._dados:
+                self._remover(chave)
+            self._dados[chave] = (time.monotonic() + self.ttl, tamanho, valor)
+            self.bytes += tamanho
+            while len(self._dados) > 1 and (len(self._dados) > self.maxsize or self.bytes > self.max_bytes):
+                self._remover(next(iter(self._dados)))
+                self.descartados += 1
+
+    def __contains__(self, chave):
+        with self._lock:
+            return self._buscar(chave) is not None
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+            self.bytes = 0
+
+    def estatisticas(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"entradas": len(self._dados), "MB": round(self.bytes / 2**20, 3),
+                    "acertos": self.hits, "faltas": self.misses,
+                    "taxa_acerto": round(self.hits / total, 3) if total else None,
+                    "expirados": self.expirados, "descartados": self.descartados}
+
+def _tamanho(valor):
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(valor.memory_usage(deep=True).sum()) if isinstance(valor, pd.DataFrame) else int(valor.memory_usage(deep=True))
+    if isinstance(valor, (tuple, list)):
+        return sum(_tamanho(v) for v in valor)
+    if isinstance(valor, dict):
+        return sum(_tamanho(v) for v in valor.values())
+    if hasattr(valor, "to_plotly_json"):
+        # Figura Plotly: o tamanho do JSON que será enviado
+        return len(valor.to_json())
+    return 64
+
+
+# ---------- Visões da página Viaturas ----------
+def por_unidade(df, coluna):
+    return df.groupby('UNIDADE', observed=True)[coluna].sum().reset_index().sort_values(coluna, ascending=False)
+
+def top20(cube, coluna):
+    tabela = top_n(cube, coluna)
+    tabela['Litros'] = tabela['Litros'].apply(truncar).map(lambda x: f"{x:,.2f}")
+    tabela['Valor'] = tabela['Valor'].apply(truncar).map(lambda x: f"R$ {x:,.2f}")
+    return tabela[['PLACA', 'Unidade', 'Litros', 'Valor']].fillna('NÃO LOCALIZADO')
+
+def pivo_frota(df_frota, coluna):
+    contagem = df_frota.groupby(['OPM', coluna], observed=True).agg(
+        Qtde=('PLACA', 'nunique')
+    ).reset_index()
+    pivo = contagem.pivot(index='OPM', columns=coluna, values='Qtde').fillna(0).astype(int)
+    pivo['TOTAL'] = pivo.sum(axis=1)
+    return pivo
+
+def resumo_opm(df_frota, cobertura):
+    # Viaturas por OPM sobre o índice de cobertura (dlog/coverage.py), montado uma vez por snapshot
+    vehs = df_frota.groupby('OPM', observed=True)['PLACA'].nunique().reset_index(name='Viaturas')
+    return cobertura.resumo(vehs)
+
+def resumo_municipios(summary):
+    # OPMs do interior com a diferença para a média de Vtr/Município
+    resumo = summary[summary['Municípios'] > 0][['OPM', 'Viaturas', 'Municípios', 'Vtr/Município']].copy()
+    resumo['Dif'] = resumo['Vtr/Município'] - resumo['Vtr/Município'].mean()
+    resumo['Situação'] = np.where(resumo['Dif'] > 0, 'Acima da média', 'Abaixo da média')
+    return resumo
+
+def resumo_bairros(summary):
+    resumo = summary[summary['Bairros'] > 0].copy()
+    resumo['Dif_bairro'] = resumo['Vtr/Bairro'] - resumo['Vtr/Bairro'].mean()
+    resumo['Situação'] = np.where(resumo['Dif_bairro'] > 0, 'Acima da média', 'Abaixo da média')
+    return resumo
+
+def multiplas_opms(df, cube):
+    multi_opm = cube[cube['N_OPMS'] > 1]
+    if multi_opm.empty:
+        return None
+    multi_frotas = df[df['PLACA'].isin(multi_opm['PLACA'])]
+    valores_opm = multi_frotas.groupby(['PLACA','UNIDADE'], observed=True)['VALOR_TOTAL'].sum().reset_index()
+    valores_opm['VALOR_TOTAL'] = valores_opm['VALOR_TOTAL'].apply(truncar)
+    total_placa = multi_opm[['PLACA', 'Valor']].rename(columns={'Valor':'VALOR_TOTAL_GERAL'})
+    total_placa['VALOR_TOTAL_GERAL'] = total_placa['VALOR_TOTAL_GERAL'].apply(truncar)
+    tabela = valores_opm.merge(total_placa, on='PLACA')
+    tabela['VALOR_TOTAL'] = tabela['VALOR_TOTAL'].map(lambda x: f"R$ {x:,.2f}")
+    tabela['VALOR_TOTAL_GERAL'] = tabela['VALOR_TOTAL_GERAL'].map(lambda x: f"R$ {x:,.2f}")
+    tabela = tabela.rename(columns={'PLACA':'Placa', 'UNIDADE':'OPMs abastecidas', 'VALOR_TOTAL':'Valor abastecido', 'VALOR_TOTAL_GERAL':'Valor total'})
+    return tabela[['Placa','OPMs abastecidas','Valor abastecido','Valor total']]
+
+def ranking_geral(cube):
+    rank_geral = ranking(cube).rename(columns={'Unidade':'OPM'})
+    rank_geral['Litros'] = pd.to_numeric(rank_geral['Litros'], errors='coerce').fillna(0).apply(truncar).map(lambda x: f"{x:,.2f}")
+    rank_geral['Valor'] = pd.to_numeric(rank_geral['Valor'], errors='coerce').fillna(0).apply(truncar).map(lambda x: f"R$ {x:,.2f}")
+    return rank_geral[['Posição','PLACA','OPM','Litros','Valor']].fillna('NÃO LOCALIZADO')
+
+
+# ---------- Atualização em segundo plano ----------
+class Atualizador:
+    # Thread daemon: a cada `intervalo` segundos consulta a versão das fontes e, quando ela
+    # muda, recalcula as visões padrão antes que alguma sessão precise delas.
+    def __init__(self, versao, aquecer, intervalo=60):
+        self._versao = versao
+        self._aquecer = aquecer
+        self.intervalo = intervalo
+        self.ultima = None
+        self.ultimo_ms = None
+        self.rodadas = 0
+        self.erro = None
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._laco, name="dlog-visoes", daemon=True)
+        self._thread.start()
+
+    def _laco(self):
+        espera = 0
+        while not self._parar.wait(espera):
+            espera = self.intervalo
+            try:
+                versao = self._versao()
+                if versao != self.ultima:
+                    t = time.perf_counter()
+                    self._aquecer(versao)
+                    self.ultima = versao
+                    self.ultimo_ms = round((time.perf_counter() - t) * 1000, 1)
+                    self.rodadas += 1
+                self.erro = None
+            except Exception as e:
+                self.erro = repr(e)
+
+    def parar(self):
+        self._parar.set()
@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+
+from dlog import charts, history, pipeline, profiling, snapshot
 
 st.set_page_config(page_title="Efetivo", page_icon="🪖", layout="wide")
+profiling.inicio("efetivo")
 
 # --- Botão HOME estilizado menor ---
 st.markdown("""
@@ -36,39 +37,16 @@ st.markdown("""
 """, unsafe_allow_html=True)
 st.markdown('<a href="/" class="home-btn" target="_self">HOME</a>', unsafe_allow_html=True)
 
-# ---- Configuração dos arquivos ----
-URL_EFETIVO = "https://github.com/DLOG2025/Dashboard/raw/refs/heads/main/EFETIVO_GERAL_DA_DLOG%20.xlsx"
-URL_FUNCOES = "https://github.com/DLOG2025/Dashboard/raw/refs/heads/main/FUNCOES_DE_PRACAS_COM_BGO.xlsx"
-
-@st.cache_data
-def load_data():
-    df_efetivo = pd.read_excel(URL_EFETIVO, dtype=str).fillna("")
-    df_funcoes = pd.read_excel(URL_FUNCOES, dtype=str).fillna("")
-    return df_efetivo, df_funcoes
-
-df_efetivo, df_funcoes = load_data()
-
-# --- Normaliza nomes de colunas ---
-df_efetivo.columns = df_efetivo.columns.str.upper().str.strip()
-df_funcoes.columns = df_funcoes.columns.str.upper().str.strip()
-
-# --- ORDEM HIERÁRQUICA (Cel ao Sd) ---
-ordem_grad = ["CEL", "TEN CEL", "MAJ", "CAP", "1º TEN", "2º TEN",
-              "SUBTENENTE", "1º SARGENTO", "2º SARGENTO", "3º SARGENTO", "CB", "SD"]
-
-# --- Setores oficiais da DLOG ---
-setores_dlog = [
-    "DLOG 1", "DLOG 2", "DLOG 3", "DLOG 4", "DLOG 5", "DLOG 6",
-    "CMM", "CMO", "CMB", "DIRETORIA", "SUBDIRETORIA", "SECRETARIA"
-]
-
-# --- Remove duplicidades por nome completo ---
-df_efetivo_unique = df_efetivo.drop_duplicates(subset=["NOME"])
+# ---- Modelo do efetivo (snapshot Parquet local, cacheado por hash; ver dlog/roster.py) ----
+pipeline.atualizador()
+with profiling.etapa("snapshot.version"):
+    versao = snapshot.version(*pipeline.FONTES_EFETIVO)
+modelo = pipeline.roster(versao)
 
 # --- KPIs básicos ---
 st.subheader("✨ Indicadores Gerais")
-total_efetivo = len(df_efetivo_unique)
-total_setores = df_efetivo_unique["SETOR"].str.upper().isin([s.upper() for s in setores_dlog]).sum()
+total_efetivo = len(modelo.unicos)
+total_setores = int(modelo.em_dlog.sum())
 col1, col2 = st.columns(2)
 col1.metric("Efetivo Atual (únicos)", total_efetivo)
 col2.metric("Militares em setores DLOG", total_setores)
@@ -77,11 +55,12 @@ st.divider()
 
 # --- Efetivo por Posto/Graduação (Ordem Hierárquica, sem duplicidade) ---
 st.subheader("📊 Efetivo por Posto/Graduação")
-if "P/G" in df_efetivo.columns:
-    efetivo_grad = df_efetivo["P/G"].value_counts().reset_index()
-    efetivo_grad.columns = ["Posto/Graduação", "Quantidade"]
-    fig_grad = px.bar(efetivo_grad, x="Posto/Graduação", y="Quantidade", color="Posto/Graduação", title="Distribuição por Graduação")
-    st.plotly_chart(fig_grad, use_container_width=True)
+if modelo.cubo is not None:
+    efetivo_grad = modelo.por_graduacao()
+    with profiling.etapa("figuras plotly"):
+        fig_grad = charts.barras(efetivo_grad, x="Posto/Graduação", y="Quantidade", color="Posto/Graduação", title="Distribuição por Graduação")
+    with profiling.etapa("envio plotly"):
+        st.plotly_chart(fig_grad, use_container_width=True)
 else:
     st.warning("Coluna 'P/G' não encontrada nos dados do efetivo.")
 
@@ -89,60 +68,45 @@ st.divider()
 
 # --- Efetivo por Setor (apenas setores oficiais DLOG) ---
 st.subheader("👥 Efetivo por Setor")
-df_efetivo_dlog = df_efetivo_unique[df_efetivo_unique["SETOR"].str.upper().isin([s.upper() for s in setores_dlog])]
-efetivo_setor = df_efetivo_dlog.groupby("SETOR")["NOME"].count().reset_index(name="Quantidade")
-st.dataframe(efetivo_setor, use_container_width=True)
+if modelo.cubo_unicos is not None:
+    st.dataframe(modelo.por_setor(), use_container_width=True)
 
 st.subheader("📋 Quantidade de Militares por P/G e Setor DLOG")
 
-if "P/G" in df_efetivo.columns and "SETOR" in df_efetivo.columns:
-    df_efetivo["P/G"] = df_efetivo["P/G"].str.upper().str.strip()
-    df_efetivo["SETOR"] = df_efetivo["SETOR"].str.upper().str.strip()
-    df_dlog = df_efetivo[df_efetivo["SETOR"].isin([s.upper() for s in setores_dlog])]
-    tabela = pd.pivot_table(
-        df_dlog,
-        index="P/G",
-        columns="SETOR",
-        values="NOME",
-        aggfunc="count",
-        fill_value=0
-    ).reindex(ordem_grad, fill_value=0)
-    tabela["TOTAL"] = tabela.sum(axis=1)
-    total_row = pd.DataFrame([tabela.sum(axis=0)], index=["TOTAL"])
-    tabela = pd.concat([tabela, total_row])
-    st.dataframe(tabela.astype(int), use_container_width=True)
+if modelo.cubo is not None:
+    st.dataframe(modelo.tabela_grad_setor(), use_container_width=True)
 else:
     st.warning("Colunas 'P/G' e/ou 'SETOR' não encontradas nos dados.")
 
 # (Opcional: Mostra militares em outros setores)
-df_efetivo_otros = df_efetivo_unique[~df_efetivo_unique["SETOR"].str.upper().isin([s.upper() for s in setores_dlog])]
-if not df_efetivo_otros.empty:
+if not modelo.outros.empty:
     st.markdown("#### 👥 Efetivo lotado na DLOG, mas atuando em outros setores/locais:")
-    st.dataframe(df_efetivo_otros[["NOME", "P/G", "SETOR", "LOTAÇÃO"]], use_container_width=True)
+    st.dataframe(modelo.outros[["NOME", "P/G", "SETOR", "LOTAÇÃO"]], use_container_width=True)
 
 st.divider()
 
 # --- Busca Detalhada do Efetivo ---
 st.subheader("🔎 Busca Detalhada do Efetivo")
-busca_nome = st.text_input("Buscar por nome, posto/graduação, setor ou lotação:").upper()
-
-# Adiciona a graduação/posto da função ocupada (merge pelo nome de guerra, se possível)
-df_result = df_efetivo_unique.copy()
-if "N GUERRA" in df_efetivo_unique.columns and "NOME DE GUERRA" in df_funcoes.columns and "GRADUAÇÃO DA FUNÇÃO" in df_funcoes.columns:
-    df_result = df_result.merge(df_funcoes[["NOME DE GUERRA", "GRADUAÇÃO DA FUNÇÃO"]],
-                                left_on="N GUERRA", right_on="NOME DE GUERRA", how="left")
+busca_nome = st.text_input("Buscar por nome, posto/graduação, setor ou lotação:")
 
-# Filtro de busca
+# Filtro de busca (índice sem acentos do modelo; ver dlog/search.py)
+df_result = modelo.resultado
 if busca_nome:
-    df_filtrado = df_result[
-        df_result.apply(lambda row: any(busca_nome in str(row[c]).upper() for c in ["NOME", "P/G", "SETOR", "LOTAÇÃO"] if c in row), axis=1)
-    ]
+    with profiling.etapa("busca"):
+        df_filtrado = df_result.iloc[modelo.busca.search(busca_nome)]
 else:
-    df_filtrado = df_result.copy()
+    df_filtrado = df_result
 
 colunas_mostrar = [col for col in ["NOME", "P/G", "SETOR", "LOTAÇÃO", "GRADUAÇÃO DA FUNÇÃO"] if col in df_filtrado.columns]
 st.dataframe(df_filtrado[colunas_mostrar], use_container_width=True)
 
+st.divider()
+
+# --- Histórico de alterações (versões anteriores da planilha; ver dlog/history.py) ---
+st.subheader("🕓 Histórico de Alterações do Efetivo")
+pipeline.registrar_historico("efetivo")
+history.painel(pipeline.historico("efetivo"), "Militar", "hist_efetivo")
+
 # --- Rodapé centralizado ---
 st.markdown("""
     <div style="position: fixed; left: 0; bottom: 0; width: 100vw; background: rgba(255,255,255,0.0);
@@ -151,3 +115,4 @@ st.markdown("""
     Desenvolvido pela Secretaria - DLOG/PMAL | 2025
     </div>
 """, unsafe_allow_html=True)
+profiling.fim()
@@ -1,12 +1,16 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import numpy as np
-import math
-import unicodedata
-import re
+
+from dlog import exports, history, pipeline, plates, profiling, snapshot
+from dlog.charts import MAX_BARRAS
+from dlog.grid import formato_numero, paginated_grid
+from dlog.normalize import truncar
+from dlog.coverage import Simulador
+from dlog.geo import coordenadas_opm
+from dlog.redistribution import distancias_opm, plano_transferencias
 
 st.set_page_config(page_title="Viaturas", page_icon="🚓", layout="wide")
+profiling.inicio("viaturas")
 
 PAGE_TITLE = "🚓 DASHBOARD_VIATURAS - DLOG"
 st.title(PAGE_TITLE)
@@ -43,115 +47,60 @@ st.markdown("""
 """, unsafe_allow_html=True)
 st.markdown('<a href="/" class="home-btn" target="_self">HOME</a>', unsafe_allow_html=True)
 
-# ---------- URLs dos arquivos ----------
-URL_ABAST = "https://github.com/DLOG2025/Dashboard/raw/refs/heads/main/Abastecimentos_Consolidados.xlsx"
-URL_FROTA = "https://github.com/DLOG2025/Dashboard/raw/refs/heads/main/Frota_Master_Enriched.xlsx"
-URL_OPM = "https://github.com/DLOG2025/Dashboard/raw/refs/heads/main/OPM_Municipios_Enriched.xlsx"
-URL_PADROES = "https://github.com/DLOG2025/Dashboard/raw/refs/heads/main/PADR%C3%95ES_LOCADOS.xlsx"
-
-@st.cache_data
-def load_data():
-    df_abast = pd.read_excel(URL_ABAST)
-    df_frota = pd.read_excel(URL_FROTA)
-    df_opm = pd.read_excel(URL_OPM)
-    df_padroes = pd.read_excel(URL_PADROES)
-    return df_abast, df_frota, df_opm, df_padroes
-
-df_abast, df_frota, df_opm, df_padroes = load_data()
-
-# ---------- Ajuste colunas df_opm ----------
-df_opm.rename(columns={'MUNICÍPIO':'MUNICIPIO', 'MUNICÍPIO_REFERÊNCIA':'MUNICIPIO_REFERENCIA'}, inplace=True)
-
-def normalize_text(s):
-    if pd.isna(s): return s
-    nk = unicodedata.normalize('NFKD', str(s))
-    return ''.join(c for c in nk if not unicodedata.combining(c))
-
-def unify_opm(name):
-    if pd.isna(name): return name
-    raw = normalize_text(name)
-    raw = re.sub(r'(?<=\d)[A-Za-zºª°]+', '', raw)
-    raw = re.sub(r'(\d+)\W*CPM\W*I', lambda m: f"{int(m.group(1))} CPMI", raw, flags=re.IGNORECASE)
-    raw = re.sub(r'(\d+)\W*BPM', lambda m: f"{int(m.group(1))} BPM", raw, flags=re.IGNORECASE)
-    raw = re.sub(r'(\d+)\W*SECAO\W*EMG', lambda m: f"{int(m.group(1))} SECAO EMG", raw, flags=re.IGNORECASE)
-    raw = raw.replace('/', ' ')
-    raw = re.sub(r'[^A-Za-z0-9 ]', ' ', raw)
-    s = ' '.join(raw.split()).upper()
-    return s
-
-def clean_plate(x):
-    return str(x).upper().replace('-', '').replace(' ', '')
-
-def parse_currency(x):
-    if pd.isna(x): return 0.0
-    if isinstance(x, (int, float)): return float(x)
-    s = re.sub(r'[^0-9,\.]', '', str(x))
-    if s.count(',') and s.count('.'):
-        s = s.replace('.', '').replace(',', '.')
-    else:
-        s = s.replace(',', '.')
-    try: return float(s)
-    except: return 0.0
-
-def truncar(x, casas=2):
-    try:
-        f = 10 ** casas
-        return math.floor(float(x) * f) / f
-    except:
-        return x
-
-# ---------- Pré-processamento ----------
-df_abast['UNIDADE'] = df_abast['UNIDADE'].apply(unify_opm)
-df_frota['OPM'] = df_frota['OPM'].apply(unify_opm)
-df_abast['PLACA'] = df_abast['PLACA'].apply(clean_plate)
-df_frota['PLACA'] = df_frota['PLACA'].apply(clean_plate)
-
-# Filtros
+# ---------- Dados normalizados (snapshot Parquet local, cacheado por hash) ----------
+pipeline.atualizador()
+with profiling.etapa("snapshot.version"):
+    versao = snapshot.version(*pipeline.FONTES_VIATURAS)
+df_abast, df_frota, df_opm = pipeline.load_viaturas(versao)
+
+# Filtros (índice compartilhado por snapshot, ver dlog/filters.py)
+indice = pipeline.filter_index(versao)
 st.sidebar.header('🎯 Filtros')
 unidades = st.sidebar.multiselect(
     'Selecione OPM abastecimento:',
-    sorted(df_abast['UNIDADE'].dropna().unique()),
-    default=sorted(df_abast['UNIDADE'].dropna().unique())
+    indice.options('UNIDADE'),
+    default=indice.options('UNIDADE')
 )
 combustiveis = st.sidebar.multiselect(
     'Selecione Combustíveis:',
-    sorted(df_abast['COMBUSTIVEL_DOMINANTE'].dropna().unique()),
-    default=sorted(df_abast['COMBUSTIVEL_DOMINANTE'].dropna().unique())
+    indice.options('COMBUSTIVEL_DOMINANTE'),
+    default=indice.options('COMBUSTIVEL_DOMINANTE')
 )
-df = df_abast[
-    df_abast['UNIDADE'].isin(unidades) &
-    df_abast['COMBUSTIVEL_DOMINANTE'].isin(combustiveis)
-].copy()
-
-# padrões locação
-idc, valc = df_padroes.columns[0], df_padroes.columns[1]
-df_padroes.rename(columns={idc:'PADRAO', valc:'CUSTO_LOCACAO_PADRAO'}, inplace=True)
-df_padroes['CUSTO_LOCACAO_PADRAO'] = df_padroes['CUSTO_LOCACAO_PADRAO'].apply(parse_currency)
-df_frota = df_frota.merge(df_padroes[['PADRAO','CUSTO_LOCACAO_PADRAO']], on='PADRAO', how='left')
-mask_loc = df_frota['Frota'].str.upper()=='LOCADO'
-df_frota['CUSTO_PADRAO_MENSAL'] = 0.0
-df_frota.loc[mask_loc,'CUSTO_PADRAO_MENSAL'] = df_frota.loc[mask_loc,'CUSTO_LOCACAO_PADRAO']
-if 'CUSTO_LOCACAO_PADRAO' in df_frota.columns: df_frota.drop(columns=['CUSTO_LOCACAO_PADRAO'], inplace=True)
-
-# merge final com frota
-merge_cols = ['PLACA','OPM','Frota','PADRAO','CARACTERIZACAO','CUSTO_PADRAO_MENSAL']
-df = df.merge(df_frota[merge_cols], on='PLACA', how='left')
-df.fillna({'Frota':'NÃO LOCALIZADO','PADRAO':'N/D','CARACTERIZACAO':'N/D'}, inplace=True)
-df['Nº de frotas abastecidas'] = df.groupby('PLACA')['UNIDADE'].transform('nunique')
-
-# ---------- Criação de abas ----------
-t1, t2, t3, t4 = st.tabs([
-    '🔎 Visão Geral','🚘 Frota por OPM','📍 OPMs & Municípios','📋 Detalhamento'
-])
+with profiling.etapa("filtro"):
+    df, cube = indice.select(unidades, combustiveis)
+
+def visao(nome):
+    # Tabelas derivadas do cache entre sessões (ver dlog/views.py); só leitura
+    return pipeline.view(nome, versao, unidades, combustiveis)
+
+def figura(nome, top=None):
+    return pipeline.figura(nome, versao, unidades, combustiveis, top)
+
+# ---------- Seções (só a seção visível é calculada; cada uma é um st.fragment) ----------
+SECOES = ['🔎 Visão Geral','🚘 Frota por OPM','📍 OPMs & Municípios','📋 Detalhamento','🕓 Histórico']
+COLUNAS_DETALHE = {
+    'PLACA':'PLACA',
+    'OPM':'CARGA',
+    'UNIDADE':'OPM ABASTECIMENTO',
+    'COMBUSTIVEL_DOMINANTE':'Combustível',
+    'TOTAL_LITROS':'Litros',
+    'VALOR_TOTAL':'Valor R$',
+    'Frota':'Frota',
+    'PADRAO':'Padrão',
+    'CARACTERIZACAO':'Caracterização',
+    'Nº de frotas abastecidas':'Nº de frotas abastecidas'
+}
 
 # -------- VISÃO GERAL --------
-with t1:
+@st.fragment
+@profiling.medir("Visão Geral")
+def visao_geral(df, cube):
     st.subheader('✨ Indicadores Principais')
-    veh = df['PLACA'].nunique()
-    lit = df['TOTAL_LITROS'].sum()
-    val = df['VALOR_TOTAL'].sum()
-    avg_l = df.groupby('PLACA')['TOTAL_LITROS'].sum().mean()
-    avg_v = df.groupby('PLACA')['VALOR_TOTAL'].sum().mean()
+    veh = len(cube)
+    lit = cube['Litros'].sum()
+    val = cube['Valor'].sum()
+    avg_l = cube['Litros'].mean()
+    avg_v = cube['Valor'].mean()
     c = st.columns(6)
     c[0].metric('Registros',f'{len(df):,}')
     c[1].metric('Viaturas',f'{veh}')
@@ -161,124 +110,76 @@ with t1:
     c[5].metric('Média Gasto/Viatura',f'R$ {truncar(avg_v):,.2f}')
 
     st.divider()
-    # Consumo por Unidade
-    consumo_unidade = df.groupby('UNIDADE')['TOTAL_LITROS'].sum().reset_index()
-    fig_litros = px.bar(
-        consumo_unidade.sort_values('TOTAL_LITROS', ascending=False),
-        x='TOTAL_LITROS', y='UNIDADE', orientation='h',
-        labels={'TOTAL_LITROS': 'Litros', 'UNIDADE': 'Unidade'},
-        title='Consumo por Unidade (Litros)'
-    )
-    st.plotly_chart(fig_litros, use_container_width=True)
-
-    # Gasto por Unidade
-    gasto_unidade = df.groupby('UNIDADE')['VALOR_TOTAL'].sum().reset_index()
-    fig_valor = px.bar(
-        gasto_unidade.sort_values('VALOR_TOTAL', ascending=False),
-        x='VALOR_TOTAL', y='UNIDADE', orientation='h',
-        labels={'VALOR_TOTAL': 'Valor R$', 'UNIDADE': 'Unidade'},
-        title='Gasto por Unidade (R$)'
-    )
-    st.plotly_chart(fig_valor, use_container_width=True)
+    # Consumo por Unidade (figuras cacheadas por filtro e snapshot; ver dlog/charts.py)
+    top = MAX_BARRAS if st.checkbox(f'Mostrar só as {MAX_BARRAS} maiores unidades (demais em "Outros")', key='top_unidades') else None
+    with profiling.etapa("figuras plotly"):
+        fig_litros = figura('consumo_unidade', top)
+        fig_valor = figura('gasto_unidade', top)
+    with profiling.etapa("envio plotly"):
+        st.plotly_chart(fig_litros, use_container_width=True)
+        st.plotly_chart(fig_valor, use_container_width=True)
 
     st.divider()
     st.subheader('🚗 Top 20 Viaturas por Consumo (Litros)')
-    top20_litros = df.groupby('PLACA').agg(
-        Litros=('TOTAL_LITROS', 'sum'),
-        Valor=('VALOR_TOTAL', 'sum'),
-        Unidade=('UNIDADE', 'first')
-    ).reset_index().sort_values('Litros', ascending=False).head(20)
-    top20_litros['Litros'] = top20_litros['Litros'].apply(truncar).map(lambda x: f"{x:,.2f}")
-    top20_litros['Valor'] = top20_litros['Valor'].apply(truncar).map(lambda x: f"R$ {x:,.2f}")
-    st.dataframe(top20_litros[['PLACA', 'Unidade', 'Litros', 'Valor']].fillna('NÃO LOCALIZADO'), use_container_width=True)
+    st.dataframe(visao('top20_litros'), use_container_width=True)
 
     st.divider()
     st.subheader('🚗 Top 20 Viaturas por Valor Gasto (R$)')
-    top20_valor = df.groupby('PLACA').agg(
-        Litros=('TOTAL_LITROS', 'sum'),
-        Valor=('VALOR_TOTAL', 'sum'),
-        Unidade=('UNIDADE', 'first')
-    ).reset_index().sort_values('Valor', ascending=False).head(20)
-    top20_valor['Litros'] = top20_valor['Litros'].apply(truncar).map(lambda x: f"{x:,.2f}")
-    top20_valor['Valor'] = top20_valor['Valor'].apply(truncar).map(lambda x: f"R$ {x:,.2f}")
-    st.dataframe(top20_valor[['PLACA', 'Unidade', 'Litros', 'Valor']].fillna('NÃO LOCALIZADO'), use_container_width=True)
+    st.dataframe(visao('top20_valor'), use_container_width=True)
 
 # -------- FROTA POR OPM --------
-with t2:
+@st.fragment
+@profiling.medir("Frota por OPM")
+def frota_por_opm():
     st.subheader('🚘 Frota por OPM')
-    frota_opm = df_frota.groupby(['OPM', 'Frota']).agg(
-        Qtde=('PLACA', 'nunique')
-    ).reset_index()
-    frota_pivot = frota_opm.pivot(index='OPM', columns='Frota', values='Qtde').fillna(0).astype(int)
-    frota_pivot['TOTAL'] = frota_pivot.sum(axis=1)
+    frota_pivot = visao('frota_pivot')
     st.dataframe(frota_pivot.reset_index().fillna('NÃO LOCALIZADO'), use_container_width=True)
 
     st.divider()
     st.subheader('📋 Caracterização da Frota por OPM')
-    char_opm = df_frota.groupby(['OPM', 'CARACTERIZACAO']).agg(
-        Qtde=('PLACA', 'nunique')
-    ).reset_index()
-    char_pivot = char_opm.pivot(index='OPM', columns='CARACTERIZACAO', values='Qtde').fillna(0).astype(int)
-    char_pivot['TOTAL'] = char_pivot.sum(axis=1)
+    char_pivot = visao('char_pivot')
     st.dataframe(char_pivot.reset_index().fillna('NÃO LOCALIZADO'), use_container_width=True)
 
     st.divider()
     st.subheader('📊 Frota por OPM (Barras)')
-    total_frota = frota_pivot.reset_index()[['OPM', 'TOTAL']].sort_values('TOTAL', ascending=False)
-    fig_bar = px.bar(
-        total_frota, x='TOTAL', y='OPM', orientation='h',
-        labels={'TOTAL': 'Total de Veículos', 'OPM': 'OPM'},
-        title='Total de Frota por OPM'
-    )
-    st.plotly_chart(fig_bar, use_container_width=True)
+    top = MAX_BARRAS if st.checkbox(f'Mostrar só as {MAX_BARRAS} maiores OPMs (demais em "Outros")', key='top_frota') else None
+    with profiling.etapa("figuras plotly"):
+        fig_bar = figura('frota_total', top)
+    with profiling.etapa("envio plotly"):
+        st.plotly_chart(fig_bar, use_container_width=True)
 
 # -------- OPMs & MUNICÍPIOS --------
-with t3:
+@st.fragment
+@profiling.medir("OPMs & Municípios")
+def opms_municipios():
     st.subheader('📍 OPMs & Municípios')
-    df_opm.rename(columns={'MUNICÍPIO':'MUNICIPIO', 'MUNICÍPIO_REFERÊNCIA':'MUNICIPIO_REFERENCIA'}, inplace=True)
-    df_opm['TIPO_NORM'] = df_opm['TIPO_LOCAL'].apply(lambda x: normalize_text(x).lower() if pd.notna(x) else '')
-    df_opm['MUNI_NORM'] = df_opm['MUNICIPIO'].apply(lambda x: normalize_text(x).upper() if pd.notna(x) else '')
-    df_opm['MUNI_REF_NORM'] = df_opm['MUNICIPIO_REFERENCIA'].apply(lambda x: normalize_text(x).upper() if pd.notna(x) else '')
-    interior = df_opm[(df_opm['TIPO_NORM']=='municipio') & (df_opm['MUNI_NORM']!='MACEIO')]
-    muni = interior.groupby('UNIDADE')['MUNICIPIO'].nunique().reset_index(name='Municípios')
-    muni.rename(columns={'UNIDADE':'OPM'},inplace=True)
-    bairros = df_opm[(df_opm['TIPO_NORM']=='bairro') & (df_opm['MUNI_REF_NORM']=='MACEIO')]
-    bair = bairros.groupby('UNIDADE')['LOCAL'].nunique().reset_index(name='Bairros')
-    bair.rename(columns={'UNIDADE':'OPM'},inplace=True)
-    vehs = df_frota.groupby('OPM')['PLACA'].nunique().reset_index(name='Viaturas')
-    summary = vehs.merge(muni,on='OPM',how='left').merge(bair,on='OPM',how='left')
-    summary[['Municípios','Bairros']] = summary[['Municípios','Bairros']].fillna(0).astype(int)
-    summary['Vtr/Município'] = (summary['Viaturas']/summary['Municípios']).replace(np.inf,0).round(2)
-    summary['Vtr/Bairro'] = (summary['Viaturas']/summary['Bairros']).replace(np.inf,0).round(2)
+    summary = visao('resumo_opm')
     st.dataframe(summary.fillna('NÃO LOCALIZADO'),use_container_width=True)
 
     st.divider()
     st.subheader('📈 Múltiplas Sugestões de Redistribuição')
-
-    valid = summary[summary['Municípios']>0].copy()
-    if valid.empty:
+    # Distância em km pelas coordenadas das OPMs da base do Dashboard; sem coordenadas não há
+    # distância que pese, e a opção nem aparece
+    coords = coordenadas_opm(pipeline.fuel_store().opm)
+    com_coord = summary['OPM'].isin(coords['OPM'])
+    ponderar = com_coord.sum() >= 2 and st.checkbox('Ponderar distância entre OPMs (fluxo de custo mínimo)')
+    if ponderar and not com_coord.all():
+        st.caption(f'{(~com_coord).sum()} OPM(s) sem coordenadas na base do Dashboard entram como as mais distantes.')
+    dist = distancias_opm(summary['OPM'], coords) if ponderar else None
+    modo = 'min_cost' if ponderar else 'greedy'
+
+    resumo = visao('resumo_municipios')
+    if resumo.empty:
         st.write('Não há dados suficientes para sugestão.')
     else:
-        valid['Dif'] = valid['Vtr/Município'] - valid['Vtr/Município'].mean()
-        st.markdown(f"- Média Vtr/Município: **{truncar(valid['Vtr/Município'].mean()):.2f}**")
-
-        # SUGESTÃO 1: Todos acima para todos abaixo da média
-        acima = valid[valid['Dif'] > 0].sort_values('Dif', ascending=False)
-        abaixo = valid[valid['Dif'] < 0].sort_values('Dif')
-        transferencias = []
-        for idx_b, row_b in abaixo.iterrows():
-            diff_abaixo = abs(row_b['Dif'])
-            for idx_a, row_a in acima.iterrows():
-                diff_acima = acima.at[idx_a, 'Dif']
-                if diff_acima > 0 and diff_abaixo > 0:
-                    mover = int(min(diff_acima, diff_abaixo))
-                    if mover > 0:
-                        transferencias.append(
-                            f"→ Sugerido transferir **{mover} viatura(s)** de **{row_a['OPM']}** para **{row_b['OPM']}**."
-                        )
-                        acima.at[idx_a, 'Dif'] -= mover
-                        valid.at[idx_b, 'Dif'] += mover
-                        diff_abaixo -= mover
+        st.markdown(f"- Média Vtr/Município: **{truncar(resumo['Vtr/Município'].mean()):.2f}**")
+
+        # SUGESTÃO 1: plano inteiro de transferências até a meta proporcional (dlog/redistribution.py)
+        plano = plano_transferencias(summary, 'Municípios', modo, dist)
+        transferencias = [
+            f"→ Sugerido transferir **{r.Viaturas} viatura(s)** de **{r.Origem}** para **{r.Destino}**."
+            for r in plano.itertuples()
+        ]
         if transferencias:
             for t in transferencias:
                 st.markdown(t)
@@ -288,8 +189,6 @@ with t3:
         st.divider()
         # SUGESTÃO 2: Quem está acima/abaixo da média
         st.markdown("#### 📝 Resumo Viaturas por OPM (Município)")
-        resumo = valid[['OPM', 'Viaturas', 'Municípios', 'Vtr/Município', 'Dif']].copy()
-        resumo['Situação'] = np.where(resumo['Dif'] > 0, 'Acima da média', 'Abaixo da média')
         st.dataframe(resumo.sort_values('Dif', ascending=False).fillna('NÃO LOCALIZADO'), use_container_width=True)
 
         # SUGESTÃO 3: Cobertura menor que 1 viatura por município
@@ -303,9 +202,7 @@ with t3:
     # SUGESTÃO 4: Análise por bairros (somente para OPMs de MACEIO)
     st.divider()
     st.markdown("#### 📝 Resumo Viaturas por OPM (Bairros de Maceió)")
-    resumo_bairros = summary[summary['Bairros'] > 0].copy()
-    resumo_bairros['Dif_bairro'] = resumo_bairros['Vtr/Bairro'] - resumo_bairros['Vtr/Bairro'].mean()
-    resumo_bairros['Situação'] = np.where(resumo_bairros['Dif_bairro'] > 0, 'Acima da média', 'Abaixo da média')
+    resumo_bairros = visao('resumo_bairros')
     st.dataframe(resumo_bairros[['OPM', 'Viaturas', 'Bairros', 'Vtr/Bairro', 'Dif_bairro', 'Situação']].sort_values('Dif_bairro', ascending=False).fillna('NÃO LOCALIZADO'), use_container_width=True)
 
     st.markdown("#### 🛑 OPMs com menos de 1 viatura por bairro:")
@@ -315,62 +212,160 @@ with t3:
     else:
         st.dataframe(crit_bairro[['OPM','Bairros','Viaturas','Vtr/Bairro']].fillna('NÃO LOCALIZADO'), use_container_width=True)
 
-    # DOWNLOAD
+    plano_bairros = plano_transferencias(summary, 'Bairros', modo, dist)
+    if not plano_bairros.empty:
+        st.markdown("#### 🔁 Sugestões de transferência (Bairros de Maceió):")
+        for r in plano_bairros.itertuples():
+            st.markdown(f"→ Sugerido transferir **{r.Viaturas} viatura(s)** de **{r.Origem}** para **{r.Destino}**.")
+
+    # SIMULAÇÃO: transferências hipotéticas sobre o resumo (dlog/coverage.py), por sessão
     st.divider()
-    st.markdown("#### ⬇️ Baixar Resumo de Viaturas por OPM")
-    resumo_csv = resumo.to_csv(index=False).encode('utf-8')
-    st.download_button("Baixar CSV Municípios", data=resumo_csv, file_name="redistribuicao_opm_municipios.csv", mime='text/csv')
+    st.markdown("#### 🧪 Simulação de transferências")
+    sim = st.session_state.get('simulacao')
+    if sim is None or st.session_state.get('simulacao_versao') != versao:
+        sim = st.session_state['simulacao'] = Simulador(summary)
+        st.session_state['simulacao_versao'] = versao
+    c = st.columns([3, 3, 1, 1])
+    origem = c[0].selectbox('De', sim.opms, key='sim_origem')
+    destino = c[1].selectbox('Para', sim.opms, key='sim_destino')
+    qtd = c[2].number_input('Viaturas', min_value=1, value=1, step=1, key='sim_qtd')
+    if c[3].button('Transferir', key='sim_mover'):
+        if not sim.mover(origem, destino, qtd):
+            st.warning('Transferência inválida (mesma OPM ou origem sem viaturas).')
+    c = st.columns([1, 1, 4])
+    if c[0].button('Desfazer última', key='sim_desfazer'):
+        sim.desfazer()
+    if c[1].button('Limpar simulação', key='sim_limpar'):
+        sim = st.session_state['simulacao'] = Simulador(summary)
+
+    if sim.movimentos:
+        for o, d, n in sim.movimentos:
+            st.markdown(f"→ {n} viatura(s) de **{o}** para **{d}**")
+        c = st.columns(4)
+        for col, alvo, rotulo in zip(c[:2], Simulador.ALVOS, ['Média Vtr/Município', 'Média Vtr/Bairro']):
+            col.metric(rotulo, f"{truncar(sim.media(alvo)):.2f}", f"{sim.media(alvo) - sim.inicial[alvo][0]:+.2f}")
+        for col, alvo, rotulo in zip(c[2:], Simulador.ALVOS, ['OPMs < 1 vtr/município', 'OPMs < 1 vtr/bairro']):
+            col.metric(rotulo, len(sim.abaixo[alvo]), len(sim.abaixo[alvo]) - sim.inicial[alvo][1], delta_color='inverse')
+        st.dataframe(sim.alteradas(), use_container_width=True, hide_index=True)
+        with st.expander('OPMs com menos de 1 viatura após a simulação'):
+            st.dataframe(sim.abaixo_de_1('Municípios'), use_container_width=True, hide_index=True)
+            st.dataframe(sim.abaixo_de_1('Bairros'), use_container_width=True, hide_index=True)
+    else:
+        st.caption('Escolha origem, destino e quantidade para ver o efeito nas médias e nas OPMs abaixo de 1 viatura.')
 
-    resumo_bairros_csv = resumo_bairros.to_csv(index=False).encode('utf-8')
-    st.download_button("Baixar CSV Bairros", data=resumo_bairros_csv, file_name="redistribuicao_opm_bairros.csv", mime='text/csv')
+    # DOWNLOAD (gerado só quando pedido; ver dlog/exports.py)
+    st.divider()
+    st.markdown("#### ⬇️ Baixar Resumo de Viaturas por OPM")
+    exportador = pipeline.exportador()
+    if not resumo.empty:
+        exports.botao(exportador, (versao, 'resumo_municipios'), 'csv',
+                      lambda destino: exports.csv_em_blocos(resumo, destino),
+                      "CSV Municípios", "redistribuicao_opm_municipios.csv", 'exp_resumo_mun')
+    exports.botao(exportador, (versao, 'resumo_bairros'), 'csv',
+                  lambda destino: exports.csv_em_blocos(resumo_bairros, destino),
+                  "CSV Bairros", "redistribuicao_opm_bairros.csv", 'exp_resumo_bairros')
 
 # -------- DETALHAMENTO --------
-with t4:
+@st.fragment
+@profiling.medir("Detalhamento")
+def detalhamento(df, cube):
     st.subheader('📋 Tabela Final Detalhada')
-    disp_full = df.rename(columns={
-        'OPM':'CARGA',
-        'UNIDADE':'OPM ABASTECIMENTO',
-        'COMBUSTIVEL_DOMINANTE':'Combustível',
-        'TOTAL_LITROS':'Litros',
-        'VALOR_TOTAL':'Valor R$',
-        'PADRAO':'Padrão',
-        'CARACTERIZACAO':'Caracterização',
-        'Nº de frotas abastecidas':'Nº de frotas abastecidas'
-    })[[
-        'PLACA','CARGA','OPM ABASTECIMENTO','Combustível','Litros','Valor R$','Frota','Padrão','Caracterização','Nº de frotas abastecidas'
-    ]]
-    for col in ['Litros','Valor R$']:
-        disp_full[col] = disp_full[col].apply(truncar).map(lambda x: f"{x:,.2f}")
-    st.dataframe(disp_full.fillna('NÃO LOCALIZADO'), use_container_width=True, height=500)
+    # Paginada no servidor: só a página visível é formatada e enviada (dlog/grid.py)
+    paginated_grid(df, 'detalhe', COLUNAS_DETALHE, (versao, pipeline.selecao(versao, unidades, combustiveis)[1]),
+                   formatos={'TOTAL_LITROS': formato_numero, 'VALOR_TOTAL': formato_numero})
+
+    conciliacao = pipeline.conciliacao(versao)
+    with st.expander('🔗 Conciliação de placas (abastecimentos x cadastro da frota)'):
+        contagem = plates.resumo(conciliacao)
+        c = st.columns(len(contagem))
+        for col, linha in zip(c, contagem.itertuples()):
+            col.metric(linha.Método.capitalize(), f'{linha.Placas:,}')
+        st.caption('Placas "mercosul" e "aproximada" foram associadas à viatura do cadastro; '
+                   '"ambígua" e "sem correspondência" seguem como NÃO LOCALIZADO.')
+        pendentes = conciliacao[~conciliacao['MÉTODO'].isin(['exata'])]
+        st.dataframe(pendentes.sort_values(['MÉTODO', 'PLACA']).fillna(''), use_container_width=True, hide_index=True)
 
     st.divider()
     st.subheader('🔄 Viaturas Abastecendo em Múltiplas OPMs')
-    multi_opm = df.groupby('PLACA')['UNIDADE'].nunique().reset_index()
-    multi_opm = multi_opm[multi_opm['UNIDADE'] > 1]
-    if not multi_opm.empty:
-        multi_frotas = df[df['PLACA'].isin(multi_opm['PLACA'])]
-        valores_opm = multi_frotas.groupby(['PLACA','UNIDADE'])['VALOR_TOTAL'].sum().reset_index()
-        valores_opm['VALOR_TOTAL'] = valores_opm['VALOR_TOTAL'].apply(truncar)
-        total_placa = multi_frotas.groupby('PLACA')['VALOR_TOTAL'].sum().reset_index().rename(columns={'VALOR_TOTAL':'VALOR_TOTAL_GERAL'})
-        total_placa['VALOR_TOTAL_GERAL'] = total_placa['VALOR_TOTAL_GERAL'].apply(truncar)
-        tabela = valores_opm.merge(total_placa, on='PLACA')
-        tabela['VALOR_TOTAL'] = tabela['VALOR_TOTAL'].map(lambda x: f"R$ {x:,.2f}")
-        tabela['VALOR_TOTAL_GERAL'] = tabela['VALOR_TOTAL_GERAL'].map(lambda x: f"R$ {x:,.2f}")
-        tabela = tabela.rename(columns={'PLACA':'Placa', 'UNIDADE':'OPMs abastecidas', 'VALOR_TOTAL':'Valor abastecido', 'VALOR_TOTAL_GERAL':'Valor total'})
-        st.dataframe(tabela[['Placa','OPMs abastecidas','Valor abastecido','Valor total']], use_container_width=True)
+    tabela = visao('multiplas_opms')
+    if tabela is not None:
+        st.dataframe(tabela, use_container_width=True)
     else:
         st.info('Nenhuma viatura abasteceu em mais de uma OPM no período filtrado.')
 
     st.divider()
     st.subheader('🏆 Ranking Geral das Viaturas')
-    rank_geral = df.groupby('PLACA').agg(
-        Litros=('TOTAL_LITROS', 'sum'),
-        Valor=('VALOR_TOTAL', 'sum'),
-        OPM=('UNIDADE', 'first')
-    ).reset_index().sort_values('Litros', ascending=False)
-    rank_geral['Posição'] = range(1, len(rank_geral)+1)
-    rank_geral['Litros'] = pd.to_numeric(rank_geral['Litros'], errors='coerce').fillna(0).apply(truncar).map(lambda x: f"{x:,.2f}")
-    rank_geral['Valor'] = pd.to_numeric(rank_geral['Valor'], errors='coerce').fillna(0).apply(truncar).map(lambda x: f"R$ {x:,.2f}")
-    st.dataframe(rank_geral[['Posição','PLACA','OPM','Litros','Valor']].fillna('NÃO LOCALIZADO'), use_container_width=True)
+    st.dataframe(visao('ranking'), use_container_width=True, hide_index=True)
+
+# -------- HISTÓRICO DA FROTA --------
+@st.fragment
+@profiling.medir("Histórico")
+def historico_frota():
+    st.subheader('🕓 Histórico de Alterações da Frota')
+    pipeline.registrar_historico('frota')
+    history.painel(pipeline.historico('frota'), 'Placa', 'hist_frota')
+
+# -------- EXPORTAÇÕES (sob demanda, na barra lateral) --------
+def indicadores(df, cube):
+    return {
+        'Registros': f'{len(df):,}',
+        'Viaturas': f'{len(cube)}',
+        'Total Litros': f"{truncar(cube['Litros'].sum()):,.2f} L",
+        'Total Gasto (R$)': f"R$ {truncar(cube['Valor'].sum()):,.2f}",
+        'Média Litros/Viatura': f"{truncar(cube['Litros'].mean()):,.2f} L",
+        'Média Gasto/Viatura': f"R$ {truncar(cube['Valor'].mean()):,.2f}",
+    }
+
+def planilhas(df):
+    summary = visao('resumo_opm')
+    return {
+        'Detalhamento': df[list(COLUNAS_DETALHE)].rename(columns=COLUNAS_DETALHE),
+        'Ranking': visao('ranking'),
+        'Frota por OPM': visao('frota_pivot').reset_index(),
+        'Caracterização': visao('char_pivot').reset_index(),
+        'OPMs & Municípios': summary,
+        'Conciliação de placas': pipeline.conciliacao(versao),
+    }
+
+def relatorio(df, cube, destino):
+    summary = visao('resumo_opm')
+    filtros = f"Unidades: {', '.join(map(str, unidades))}\nCombustíveis: {', '.join(map(str, combustiveis))}"
+    exports.relatorio_pdf(
+        destino, 'Relatório de Viaturas - DLOG', filtros, indicadores(df, cube),
+        visao('top20_litros'), visao('frota_pivot'),
+        plano_transferencias(summary, 'Municípios'), plano_transferencias(summary, 'Bairros'),
+    )
+
+@st.fragment
+@profiling.medir("Exportações")
+def exportacoes(df, cube):
+    st.header('⬇️ Exportar')
+    exportador = pipeline.exportador()
+    chave = (versao, pipeline.selecao(versao, unidades, combustiveis)[1])
+    exports.botao(exportador, chave + ('detalhe',), 'csv',
+                  lambda destino: exports.csv_em_blocos(df[list(COLUNAS_DETALHE)].rename(columns=COLUNAS_DETALHE), destino),
+                  'CSV detalhado', 'viaturas_detalhado.csv', 'exp_csv')
+    exports.botao(exportador, chave + ('planilhas',), 'xlsx',
+                  lambda destino: exports.excel(planilhas(df), destino),
+                  'Excel', 'viaturas.xlsx', 'exp_xlsx')
+    exports.botao(exportador, chave + ('relatorio',), 'pdf',
+                  lambda destino: relatorio(df, cube, destino),
+                  'Relatório PDF', 'relatorio_viaturas.pdf', 'exp_pdf')
+
+with st.sidebar:
+    exportacoes(df, cube)
+
+secao = st.radio('Seção', SECOES, horizontal=True, label_visibility='collapsed', key='secao')
+if secao == SECOES[0]:
+    visao_geral(df, cube)
+elif secao == SECOES[1]:
+    frota_por_opm()
+elif secao == SECOES[2]:
+    opms_municipios()
+elif secao == SECOES[3]:
+    detalhamento(df, cube)
+else:
+    historico_frota()
 
 st.info('🔧 Ajuste filtros conforme necessário.')
+profiling.fim()
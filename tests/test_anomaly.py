@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from dlog.anomaly import AnomalyEngine
+
+
+def _abast(n=1500, seed=0):
+    # 40 placas em 3 coortes, jan-mar; índice crescente como o da base local
+    rng = np.random.default_rng(seed)
+    placas = [f'PLC{i:04d}' for i in range(40)]
+    padrao = {p: ['A', 'B', 'C'][i % 3] for i, p in enumerate(placas)}
+    placa = rng.choice(placas, n)
+    df = pd.DataFrame({
+        'Placa': placa,
+        'Data': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 90 * 24, n), unit='h'),
+        'Gasolina (Lts)': rng.normal(45, 6, n).round(2),
+        'Diesel (Lts)': 0.0,
+        'PADRAO': [padrao[p] for p in placa],
+        'CARACTERIZACAO': 'CARACTERIZADA',
+    })
+    return df
+
+def _mesmos_escores(a, b):
+    a, b = a.scores.sort_index(), b.scores.sort_index()
+    pd.testing.assert_frame_equal(a, b, check_dtype=False)
+
+def _completo(df):
+    motor = AnomalyEngine()
+    motor.append(df)
+    return motor
+
+
+def test_cargas_em_ordem_de_data_igual_a_carga_unica():
+    df = _abast()
+    mes = df['Data'].dt.month
+    motor = AnomalyEngine()
+    for m in (1, 2, 3):
+        motor.append(df[mes == m])
+    _mesmos_escores(motor, _completo(df))
+
+def test_carga_retroativa_igual_a_carga_unica():
+    df = _abast(seed=1)
+    mes = df['Data'].dt.month
+    motor = AnomalyEngine()
+    for m in (3, 1, 2):
+        motor.append(df[mes == m])
+    _mesmos_escores(motor, _completo(df))
+
+def test_outlier_em_carga_retroativa_e_detectado():
+    df = _abast(seed=2)
+    placa = df['Placa'].value_counts().index[0]
+    jan = df.index[(df['Placa'] == placa) & (df['Data'].dt.month == 1)]
+    df.loc[jan[-1], 'Gasolina (Lts)'] = 400.0
+    mes = df['Data'].dt.month
+    motor = AnomalyEngine()
+    motor.append(df[mes >= 2])
+    motor.append(df[mes == 1])
+    assert motor.scores.loc[jan[-1], 'Anomalia']
+    _mesmos_escores(motor, _completo(df))
+
+def test_troca_de_coorte_repontua_as_linhas_da_placa():
+    df = _abast(seed=3)
+    motor = _completo(df)
+    placa = df['Placa'].iloc[0]
+    novo = df.copy()
+    novo.loc[novo['Placa'] == placa, 'PADRAO'] = 'D'
+    motor.atualizar(novo, versao=2, alteradas={placa})
+    _mesmos_escores(motor, _completo(novo))
+
+def test_atualizar_pontua_so_o_que_falta_uma_vez_por_versao():
+    df = _abast(seed=4)
+    motor = AnomalyEngine()
+    motor.atualizar(df.iloc[:1000], versao=1)
+    motor.atualizar(df.iloc[:1000], versao=1)
+    motor.atualizar(df, versao=2)
+    assert len(motor.scores) == len(df)
+    _mesmos_escores(motor, _completo(df))
@@ -0,0 +1,16 @@
+import pandas as pd
+
+from dlog.cube import ranking, vehicle_cube
+
+
+def test_ranking_ordena_pela_posicao_sem_repetir_no_indice():
+    df = pd.DataFrame({
+        'PLACA': ['A', 'B', 'C', 'A'],
+        'TOTAL_LITROS': [10.0, 50.0, 30.0, 5.0],
+        'VALOR_TOTAL': [60.0, 300.0, 180.0, 30.0],
+        'UNIDADE': ['1 BPM', '2 BPM', '1 BPM', '3 BPM'],
+    })
+    r = ranking(vehicle_cube(df))
+    assert r['PLACA'].tolist() == ['B', 'C', 'A']
+    assert r['Posição'].tolist() == [1, 2, 3]
+    assert isinstance(r.index, pd.RangeIndex)
@@ -0,0 +1,13 @@
+from dlog import diagnostics
+
+
+def test_sem_token_configurado_o_painel_fica_fechado(monkeypatch):
+    monkeypatch.setattr(diagnostics, "TOKEN", None)
+    for valor in (None, "", "0", "1", "sim"):
+        assert not diagnostics.autorizado(valor)
+
+def test_com_token_so_abre_com_o_valor_exato(monkeypatch):
+    monkeypatch.setattr(diagnostics, "TOKEN", "segredo")
+    assert diagnostics.autorizado("segredo")
+    for valor in (None, "", "1", "segred", "segredo2"):
+        assert not diagnostics.autorizado(valor)
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from dlog.fuel_store import FuelStore
+
+
+def _abast(placas, litros, dia):
+    return pd.DataFrame({
+        'Placa': placas, 'Data': pd.Timestamp(dia),
+        'Gasolina (Lts)': litros, 'Etanol (Lts)': 0.0, 'Diesel (Lts)': 0.0, 'Diesel S10 (Lts)': 0.0,
+        'Custo': [x * 6 for x in litros],
+    })
+
+def _store(tmp_path):
+    store = FuelStore(tmp_path)
+    store.ingest_frames(
+        abast=_abast(['ABC1234', 'DEF5678'], [10.0, 20.0], '2025-01-10'),
+        frota=pd.DataFrame({'Placa': ['ABC1234', 'DEF5678'], 'OPM': ['1 BPM', '2 BPM']}),
+        opm=pd.DataFrame({'OPM': ['1 BPM', '2 BPM'], 'Latitude': [-9.6, -9.7], 'Longitude': [-35.7, -36.0]}),
+    )
+    return store
+
+def test_ingestao_troca_o_quadro_sem_alterar_o_publicado(tmp_path):
+    store = _store(tmp_path)
+    versao, dados = store.estado()
+    antes = dados.copy()
+    store.ingest_frames(frota=pd.DataFrame({'Placa': ['ABC1234'], 'OPM': ['2 BPM']}))
+    store.ingest_frames(abast=_abast(['ABC1234'], [5.0], '2025-01-11'))
+    # O par lido antes continua íntegro; o novo par traz a versão e os dados juntos
+    pd.testing.assert_frame_equal(dados, antes)
+    nova_versao, novos = store.estado()
+    assert nova_versao == versao + 2
+    assert len(novos) == 3
+    assert set(novos.loc[novos['Placa'] == 'ABC1234', 'OPM']) == {'2 BPM'}
+    assert set(novos.loc[novos['Placa'] == 'ABC1234', 'Latitude']) == {-9.7}
+
+def test_reabrir_reproduz_o_estado(tmp_path):
+    store = _store(tmp_path)
+    store.ingest_frames(opm=pd.DataFrame({'OPM': ['1 BPM'], 'Latitude': [-9.0], 'Longitude': [-36.5]}))
+    versao, dados = store.estado()
+    reaberta = FuelStore(tmp_path)
+    assert reaberta.versao == versao
+    pd.testing.assert_frame_equal(
+        reaberta.dados.sort_index()[sorted(dados.columns)], dados.sort_index()[sorted(dados.columns)], check_dtype=False)
+
+def test_placas_alteradas_desde_a_versao(tmp_path):
+    store = _store(tmp_path)
+    inicial = store.versao
+    store.ingest_frames(frota=pd.DataFrame({'Placa': ['ABC1234'], 'OPM': ['2 BPM']}))
+    meio = store.versao
+    store.ingest_frames(opm=pd.DataFrame({'OPM': ['2 BPM'], 'Latitude': [-9.1], 'Longitude': [-36.0]}))
+    assert store.placas_alteradas(meio) == {'ABC1234', 'DEF5678'}
+    assert store.placas_alteradas(inicial) >= {'ABC1234', 'DEF5678'}
+    assert store.placas_alteradas(store.versao) == set()
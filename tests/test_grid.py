@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from dlog.grid import SEM_ORDEM, _linhas
+
+
+def _df():
+    return pd.DataFrame({
+        'PLACA': ['ABC1234', 'DEF5678', 'GHI9012', 'JKL3456'],
+        'UNIDADE': pd.Categorical(['1 BPM', '2 BPM', '1 BPM', '3 BPM']),
+        'TOTAL_LITROS': [100.0, 250.5, np.nan, 40.0],
+        'VALOR_TOTAL': [600.0, 1500.0, 30.0, 240.0],
+    })
+
+def test_busca_ignora_colunas_numericas():
+    assert _linhas(_df(), '1 bpm', SEM_ORDEM, True).tolist() == [0, 2]
+    assert _linhas(_df(), '250', SEM_ORDEM, True).tolist() == []
+
+def test_faixas_numericas():
+    df = _df()
+    assert _linhas(df, '', SEM_ORDEM, True, {'TOTAL_LITROS': (50, None)}).tolist() == [0, 1]
+    assert _linhas(df, '', SEM_ORDEM, True, {'TOTAL_LITROS': (None, 100)}).tolist() == [0, 3]
+    assert _linhas(df, '', SEM_ORDEM, True, {'VALOR_TOTAL': (200, 1000)}).tolist() == [0, 3]
+    # Faixa combinada com a busca e com a ordenação
+    faixas = {'TOTAL_LITROS': (0, 300), 'VALOR_TOTAL': (None, 2000)}
+    assert _linhas(df, 'bpm', 'TOTAL_LITROS', True, faixas).tolist() == [1, 0, 3]
+
+def test_ordenacao_deixa_nan_no_fim():
+    assert _linhas(_df(), '', 'TOTAL_LITROS', False).tolist() == [3, 0, 1, 2]
@@ -0,0 +1,66 @@
+import pandas as pd
+
+from dlog import plates
+
+
+def test_chave_canonica_leva_mercosul_ao_padrao_antigo():
+    assert plates.chave_canonica("ABC1C34") == "ABC1234"
+    assert plates.chave_canonica("ABC1A34") == "ABC1034"
+    assert plates.chave_canonica("ABC1234") == "ABC1234"
+    s = pd.Series(["ABC1C34", "ABC1234", "XYZ9J99", "SEMPLACA"])
+    assert plates.chave_canonica_series(s).tolist() == ["ABC1234", "ABC1234", "XYZ9999", "SEMPLACA"]
+
+def test_conciliar_mercosul_nos_dois_sentidos():
+    # Frota no padrão antigo, abastecimento Mercosul; e o contrário
+    r = plates.Conciliador(["ABC1234", "DEF5G67"]).conciliar(["ABC1C34", "DEF5667"]).set_index("PLACA")
+    assert r.loc["ABC1C34", "PLACA_FROTA"] == "ABC1234"
+    assert r.loc["DEF5667", "PLACA_FROTA"] == "DEF5G67"
+    assert set(r["MÉTODO"]) == {"mercosul"}
+
+def test_conciliar_exata_e_aproximada():
+    r = plates.Conciliador(["ABC1234", "QRS4321"]).conciliar(["ABC1234", "QRS4331"]).set_index("PLACA")
+    assert r.loc["ABC1234", "MÉTODO"] == "exata"
+    assert r.loc["QRS4331", "MÉTODO"] == "aproximada"
+    assert r.loc["QRS4331", "PLACA_FROTA"] == "QRS4321"
+    assert r.loc["QRS4331", "DISTÂNCIA"] == 1
+
+def test_conciliar_ambigua():
+    # Duas placas da frota a uma edição de distância: nenhuma é escolhida
+    r = plates.Conciliador(["ABC1234", "ABC1239"]).conciliar(["ABC1235"]).iloc[0]
+    assert r["MÉTODO"] == "ambígua"
+    assert pd.isna(r["PLACA_FROTA"])
+    assert set(r["CANDIDATOS"].split(", ")) == {"ABC1234", "ABC1239"}
+
+def test_conciliar_sem_correspondencia():
+    r = plates.Conciliador(["ABC1234"]).conciliar(["XYZ9876", "", "NAN"])
+    assert (r["MÉTODO"] == "sem correspondência").all()
+    assert r["PLACA_FROTA"].isna().all()
+
+def test_placa_da_frota_ja_casada_nao_e_candidata():
+    # ABC1234 tem abastecimento exato: ABC1235 não é associada a ela por aproximação
+    r = plates.Conciliador(["ABC1234"]).conciliar(["ABC1234", "ABC1235"]).set_index("PLACA")
+    assert r.loc["ABC1235", "MÉTODO"] == "sem correspondência"
+    assert r.loc["ABC1235", "CANDIDATOS"] == "ABC1234"
+
+def test_indice_delecoes_confere_com_levenshtein():
+    palavras = ["ABC1234", "ABC124", "ABCD1234", "ABD1243", "XBC1234", "ZZZ0000"]
+    indice = plates.IndiceDelecoes(palavras, 1)
+    for consulta in ["ABC1234", "ABC1243", "AB1234", "ZZZ000"]:
+        esperado = sorted((plates.levenshtein(consulta, p), p) for p in palavras
+                          if plates.levenshtein(consulta, p) <= 1)
+        assert indice.buscar(consulta) == esperado
+
+def test_aplicar_troca_so_placas_conciliadas():
+    df = pd.DataFrame({"PLACA": ["ABC1C34", "XYZ9876", "ABC1234"]})
+    r = plates.Conciliador(["ABC1234"]).conciliar(df["PLACA"])
+    assert plates.aplicar(df, r)["PLACA"].tolist() == ["ABC1234", "XYZ9876", "ABC1234"]
+
+def test_exata_mantem_a_propria_placa_com_chave_repetida_no_cadastro():
+    # ABC1C34 e ABC1234 são viaturas distintas no cadastro com a mesma chave canônica
+    frota = ["ABC1C34", "ABC1234"]
+    df = pd.DataFrame({"PLACA": ["ABC1234", "ABC1C34"]})
+    r = plates.Conciliador(frota).conciliar(df["PLACA"]).set_index("PLACA")
+    assert (r["MÉTODO"] == "exata").all()
+    assert r.loc["ABC1234", "PLACA_FROTA"] == "ABC1234"
+    assert r.loc["ABC1C34", "PLACA_FROTA"] == "ABC1C34"
+    assert plates.aplicar(df, r.reset_index())["PLACA"].tolist() == ["ABC1234", "ABC1C34"]
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dlog import redistribution
+
+
+def _resumo(viaturas, municipios):
+    return pd.DataFrame({
+        'OPM': [f'{i} BPM' for i in range(len(viaturas))],
+        'Viaturas': viaturas,
+        'Municípios': municipios,
+        'Bairros': 0,
+    })
+
+def _aleatorio(n, seed):
+    rng = np.random.default_rng(seed)
+    return _resumo(rng.integers(1, 60, n), rng.integers(0, 12, n))
+
+def _coords(summary, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'OPM': summary['OPM'],
+        'Latitude': rng.uniform(-10.5, -8.8, len(summary)),
+        'Longitude': rng.uniform(-38.2, -35.2, len(summary)),
+    })
+
+
+def test_metas_maiores_restos():
+    # ideal 3,5 / 2,1 / 1,4: a sobra vai para o maior resto; OPM sem município fica de fora
+    base = redistribution.metas(_resumo([4, 2, 1, 9], [5, 3, 2, 0]))
+    assert base['OPM'].tolist() == ['0 BPM', '1 BPM', '2 BPM']
+    assert base['Meta'].tolist() == [4, 2, 1]
+    assert base['Saldo'].tolist() == [0, 0, 0]
+
+def test_metas_empate_segue_a_ordem_original():
+    base = redistribution.metas(_resumo([10, 0, 0], [1, 1, 1]))
+    assert base['Meta'].tolist() == [4, 3, 3]
+    assert base['Meta'].sum() == 10
+
+@pytest.mark.parametrize('modo', ['greedy', 'min_cost'])
+def test_plano_conserva_viaturas(modo):
+    summary = _aleatorio(300, seed=3)
+    dist = redistribution.distancias_opm(summary['OPM'], _coords(summary, 4))
+    plano = redistribution.plano_transferencias(summary, 'Municípios', modo, dist)
+    saldo = redistribution.metas(summary).set_index('OPM')['Saldo']
+    assert plano['Viaturas'].dtype.kind == 'i' and (plano['Viaturas'] > 0).all()
+    enviado = plano.groupby('Origem')['Viaturas'].sum()
+    recebido = plano.groupby('Destino')['Viaturas'].sum()
+    assert enviado.sum() == recebido.sum() == saldo[saldo > 0].sum()
+    assert enviado.to_dict() == saldo[saldo > 0].to_dict()
+    assert recebido.to_dict() == (-saldo[saldo < 0]).to_dict()
+
+def test_min_cost_nao_perde_para_o_greedy():
+    summary = _aleatorio(300, seed=5)
+    dist = redistribution.distancias_opm(summary['OPM'], _coords(summary, 6))
+    d = pd.DataFrame(dist, index=summary['OPM'], columns=summary['OPM'])
+    greedy = redistribution.plano_transferencias(summary, 'Municípios', 'greedy')
+    min_cost = redistribution.plano_transferencias(summary, 'Municípios', 'min_cost', dist)
+    custo_greedy = sum(d.at[r.Origem, r.Destino] * r.Viaturas for r in greedy.itertuples())
+    assert min_cost['Viaturas'].sum() == greedy['Viaturas'].sum()
+    assert min_cost['Custo'].sum() <= custo_greedy
+
+def test_min_cost_cruzado():
+    # O greedy casaria 0->0 e 1->1 (custo 20); o ótimo cruza (custo 2)
+    i, j, qtd = redistribution._min_cost(np.array([3, 2]), np.array([3, 2]), np.array([[10.0, 1.0], [1.0, 10.0]]))
+    plano = dict(zip(zip(i.tolist(), j.tolist()), qtd.tolist()))
+    assert plano == {(0, 0): 1, (0, 1): 2, (1, 0): 2}
+
+def test_min_cost_igual_a_forca_bruta():
+    # Todas as alocações inteiras de instâncias 2x3 pequenas
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        oferta = rng.integers(1, 5, 2)
+        demanda = rng.multinomial(oferta.sum(), [1 / 3] * 3)
+        custo = rng.integers(0, 20, (2, 3)).astype(float)
+        melhor = min(
+            custo[0] @ np.array(a) + custo[1] @ (demanda - np.array(a))
+            for a in np.ndindex(*(demanda + 1))
+            if sum(a) == oferta[0]
+        )
+        i, j, qtd = redistribution._min_cost(oferta, demanda, custo)
+        assert (np.bincount(i, qtd, 2) == oferta).all() and (np.bincount(j, qtd, 3) == demanda).all()
+        assert custo[i, j] @ qtd == melhor
+
+def test_min_cost_sobra_de_oferta():
+    i, j, qtd = redistribution._min_cost(np.array([5, 5]), np.array([4]), np.array([[2.0], [1.0]]))
+    assert (i.tolist(), j.tolist(), qtd.tolist()) == ([1], [0], [4])
+
+def test_distancias_opm_sem_coordenadas_fica_no_maximo():
+    coords = pd.DataFrame({'OPM': ['A', 'B'], 'Latitude': [-9.6, -9.7], 'Longitude': [-35.7, -35.7]})
+    dist = redistribution.distancias_opm(['A', 'B', 'C'], coords)
+    assert dist[0, 1] == pytest.approx(11.1, abs=0.1)
+    assert dist[0, 2] == dist[1, 2] == dist[0, 1]
+    assert (np.diag(dist)[:2] == 0).all()
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from dlog.roster import Roster
+
+
+def _modelo():
+    efetivo = pd.DataFrame({
+        "NOME": ["ANA", "BRUNO", "CARLA", "DIEGO"],
+        "N GUERRA": ["ANA", "BRUNO", "CARLA", "DIEGO"],
+        "P/G": ["3º Sgt", "3º SARGENTO", "Subten", "Cel"],
+        "SETOR": ["DLOG 1", "DLOG 1", "CMB", "OUTRO"],
+        "LOTAÇÃO": ["DLOG"] * 4,
+    })
+    funcoes = pd.DataFrame({"NOME DE GUERRA": ["ANA"], "GRADUAÇÃO DA FUNÇÃO": ["3º SGT"]})
+    return Roster(efetivo, funcoes)
+
+def test_tabelas_e_busca_mantem_pg_da_planilha():
+    m = _modelo()
+    assert m.resultado["P/G"].astype(str).tolist() == ["3º Sgt", "3º SARGENTO", "Subten", "Cel"]
+    assert m.outros["P/G"].astype(str).tolist() == ["Cel"]
+    assert m.resultado.iloc[m.busca.search("sgt")]["NOME"].tolist() == ["ANA"]
+
+def test_cubos_usam_pg_canonico():
+    m = _modelo()
+    grad = m.por_graduacao().set_index("Posto/Graduação")["Quantidade"]
+    assert grad.to_dict() == {"CEL": 1, "SUBTENENTE": 1, "3º SARGENTO": 2}
+    tabela = m.tabela_grad_setor()
+    assert tabela.loc["3º SARGENTO", "DLOG 1"] == 2
+    assert tabela.loc["TOTAL", "TOTAL"] == 3